@@ -1,12 +1,60 @@
 import pygame
+import numpy as np
 import sys
 import math
 import random
 from collections import defaultdict
+from tracing import NULL_TRACER, DEBUG, INFO, get_default_tracer
+import vision
+
+# Discrete action set shared by every agent and learner
+ACTIONS = ["move", "left", "right", "open", "close"]
+
+# Agents turn in fixed 30 degree steps, so there are only 12 headings
+HEADING_STEP = 30
+NUM_HEADINGS = 360 // HEADING_STEP
+# Unit vector (cos, sin) for each heading index (angle = index * HEADING_STEP)
+HEADING_VECTORS = [
+    (math.cos(math.radians(i * HEADING_STEP)), math.sin(math.radians(i * HEADING_STEP)))
+    for i in range(NUM_HEADINGS)
+]
+_RAY_FANS = {}  # (angle, half_fov, step_angle, casted_rays) -> [(cos, sin), ...]
+
+
+def direction(angle):
+    """Unit vector for an angle in degrees, from HEADING_VECTORS for the 12 headings."""
+    if angle % HEADING_STEP == 0 and 0 <= angle < 360:
+        return HEADING_VECTORS[int(angle) // HEADING_STEP]
+    radians = math.radians(angle)
+    return math.cos(radians), math.sin(radians)
+
+
+def ray_fan(angle, half_fov, step_angle, casted_rays):
+    """Direction vectors of every vision ray for a heading, computed once and cached."""
+    key = (angle, half_fov, step_angle, casted_rays)
+    fan = _RAY_FANS.get(key)
+    if fan is None:
+        start_angle = math.radians(angle) - half_fov
+        fan = [
+            (
+                math.cos(start_angle + ray * step_angle),
+                math.sin(start_angle + ray * step_angle),
+            )
+            for ray in range(casted_rays)
+        ]
+        _RAY_FANS[key] = fan
+    return fan
+
+
+# Keys of Agent.reward_breakdown, one per term of compute_reward()
+REWARD_COMPONENTS = ["explore", "region", "interaction", "vision", "catch", "wall"]
 
 
 class Agent:
-    def __init__(self, x, y, type, cell_size):
+    # Wall/door ray hits shared by every agent; set to None to march every tick
+    vision_cache = vision.StaticVisionCache()
+
+    def __init__(self, x, y, type, cell_size, id=0):
         self.grid_x = x
         self.grid_y = y
         self.initial_x = x
@@ -22,14 +70,103 @@ class Agent:
         self.lookahead_distance = cell_size
         self.move_step = 2
         self.radius = self.cell_size // 4
-        self.vision_arc = defaultdict(
-            list
-        )  # Format: [("wall", distance), ("empty", max_range), ("object", distance)]
         self.fov = math.pi / 3  # Field of view (60 degrees)
         self.half_fov = self.fov / 2
         self.casted_rays = 20  # Number of rays
         self.step_angle = self.fov / self.casted_rays
         self.max_depth = cell_size * 8  # Maximum vision range
+        # Vision output, one entry per ray, overwritten in place every tick:
+        # vision.HIT_* code, distance to the hit and type code of a hit agent
+        self.vision_hits = np.zeros(self.casted_rays, dtype=np.int8)
+        self.vision_depths = np.full(self.casted_rays, self.max_depth, dtype=np.int64)
+        self.vision_agent_types = np.full(self.casted_rays, vision.NO_AGENT, dtype=np.int8)
+        self._vision_key = None  # Inputs of the last update_vision_arc
+        self._vision_grid = None
+
+        # Game state used by the environment and reward function
+        self.id = id
+        self.initial_pos = (self.x, self.y)
+        self.destroyed = False
+        self.total_reward = 0  # Accumulated reward over an episode for logging
+        self.rank_point = 0  # For hider ranking
+        self.tracer = NULL_TRACER  # Debug events, see tracing.Tracer
+
+        # Per-round counters for metrics logging
+        self.reward_breakdown = dict.fromkeys(REWARD_COMPONENTS, 0.0)
+        self.catches = 0
+        self.door_toggles = 0
+
+        # Constants for vision-based rewards/actions
+        self.VISION_PROXIMITY_MAX_BONUS = (
+            200  # Max reward/penalty magnitude for seeing opponent
+        )
+        self.VISION_PROXIMITY_DECAY_RATE = (
+            self.cell_size * 2.5
+        )  # Controls how fast effect drops with distance
+        self.VISION_CATCH_THRESHOLD = (
+            self.cell_size * 1.5
+        )  # Distance within which a seeker catches (based on vision)
+        self.CATCH_BONUS = 1000  # Reward for seeker catching hider
+        self.SEEN_PENALTY_MULTIPLIER = (
+            1.5  # How much stronger penalty is for hider being seen vs seeker reward
+        )
+        self.WALL_PENALTY = 10  # Penalty for trying to move into wall/door
+
+    def reset(self):
+        """Puts the agent back on its spawn for a new round, clearing per-round state."""
+        self.x, self.y = self.initial_pos
+        self.angle = 0
+        self.total_distance = 0
+        self.vision_hits[:] = vision.HIT_EMPTY
+        self.vision_depths[:] = self.max_depth
+        self.vision_agent_types[:] = vision.NO_AGENT
+        self._vision_key = None
+        self._vision_grid = None
+        self.destroyed = False
+        self.total_reward = 0
+        self.rank_point = 0
+        self.reward_breakdown = dict.fromkeys(REWARD_COMPONENTS, 0.0)
+        self.catches = 0
+        self.door_toggles = 0
+
+    def clone(self):
+        """Copy for a branched world: constants are shared, per-round mutable state is copied.
+
+        A store-backed agent's copy still points at the same store slot; give
+        it its own with AgentStore.clone().
+        """
+        twin = object.__new__(type(self))
+        twin.__dict__.update(self.__dict__)
+        twin.vision_hits = self.vision_hits.copy()
+        twin.vision_depths = self.vision_depths.copy()
+        twin.vision_agent_types = self.vision_agent_types.copy()
+        twin.reward_breakdown = dict(self.reward_breakdown)
+        return twin
+
+    @property
+    def vision_arc(self):
+        """The vision arrays in the old {"1".."N": [(kind, depth[, type])]} form, built on demand."""
+        type_names = {code: name for name, code in vision.AGENT_TYPE_CODES.items()}
+        arc = defaultdict(list)
+        for ray in range(self.casted_rays):
+            code = int(self.vision_hits[ray])
+            depth = int(self.vision_depths[ray])
+            if code == vision.HIT_AGENT:
+                agent_type = type_names.get(int(self.vision_agent_types[ray]), "unknown")
+                arc[str(ray + 1)].append(("agent", depth, agent_type))
+            else:
+                arc[str(ray + 1)].append((vision.HIT_NAMES[code], depth))
+        return arc
+
+    @property
+    def view_comments(self):
+        """True while debug events are being traced for this agent."""
+        return self.tracer.active
+
+    @view_comments.setter
+    def view_comments(self, enabled):
+        # Kept for compatibility: routes debug output to the shared trace file
+        self.tracer = get_default_tracer() if enabled else NULL_TRACER
 
     def will_collide_with(self, other_agent, dx, dy):
         next_x = self.x + dx
@@ -39,17 +176,20 @@ class Agent:
 
     def draw(self, screen):
         # Triangle (agent)
+        cos_a, sin_a = direction(self.angle)
+        cos_l, sin_l = direction((self.angle + 120) % 360)
+        cos_r, sin_r = direction((self.angle - 120) % 360)
         tip = (
-            self.x + math.cos(math.radians(self.angle)) * self.length,
-            self.y + math.sin(math.radians(self.angle)) * self.length,
+            self.x + cos_a * self.length,
+            self.y + sin_a * self.length,
         )
         left = (
-            self.x + math.cos(math.radians(self.angle + 120)) * self.length // 1.5,
-            self.y + math.sin(math.radians(self.angle + 120)) * self.length // 1.5,
+            self.x + cos_l * self.length // 1.5,
+            self.y + sin_l * self.length // 1.5,
         )
         right = (
-            self.x + math.cos(math.radians(self.angle - 120)) * self.length // 1.5,
-            self.y + math.sin(math.radians(self.angle - 120)) * self.length // 1.5,
+            self.x + cos_r * self.length // 1.5,
+            self.y + sin_r * self.length // 1.5,
         )
 
         if getattr(self, "type", "") == "seeker":
@@ -60,69 +200,89 @@ class Agent:
         pygame.draw.circle(screen, (255, 0, 0), (int(tip[0]), int(tip[1])), 4)
 
         # Longer lookahead line (vision)
-        look_x = self.x + math.cos(math.radians(self.angle)) * self.lookahead_distance
-        look_y = self.y + math.sin(math.radians(self.angle)) * self.lookahead_distance
+        look_x = self.x + cos_a * self.lookahead_distance
+        look_y = self.y + sin_a * self.lookahead_distance
         pygame.draw.line(screen, (0, 255, 255), (self.x, self.y), (look_x, look_y), 1)
 
         # Draw vision arc lines
-        start_angle = math.radians(self.angle) - self.half_fov
+        fan = ray_fan(self.angle, self.half_fov, self.step_angle, self.casted_rays)
         for ray in range(self.casted_rays):
-            depth = self.max_depth
-            if self.vision_arc[str(ray + 1)]:
-                depth = max(pair[1] for pair in self.vision_arc[str(ray + 1)])
-            else:
-                depth = self.max_depth
-            end_x = self.x + math.cos(start_angle) * depth
-            end_y = self.y + math.sin(start_angle) * depth
+            depth = self.vision_depths[ray]
+            end_x = self.x + fan[ray][0] * depth
+            end_y = self.y + fan[ray][1] * depth
             pygame.draw.line(screen, (0, 255, 0), (self.x, self.y), (end_x, end_y), 1)
-            start_angle += self.step_angle
-
-    def move_forward(self, maze, screen, other_agents=[]):
-        dx = math.cos(math.radians(self.angle)) * self.move_step
-        dy = math.sin(math.radians(self.angle)) * self.move_step
 
-        look_x = self.x + math.cos(math.radians(self.angle)) * self.lookahead_distance
-        look_y = self.y + math.sin(math.radians(self.angle)) * self.lookahead_distance
+    def nearby_cells(self, maze):
+        """(row, col) of every cell the lookahead line can touch, in row-major order.
+
+        The line is lookahead_distance long, so one extra cell of margin
+        (for pygame rounding its end point) bounds the cells it can clip.
+        Scanning these finds the same walls and doors, in the same order,
+        as scanning the whole grid.
+        """
+        reach = int(self.lookahead_distance // self.cell_size) + 1
+        row, col = int(self.y // self.cell_size), int(self.x // self.cell_size)
+        return [
+            (y, x)
+            for y in range(max(0, row - reach), min(len(maze), row + reach + 1))
+            for x in range(max(0, col - reach), min(len(maze[y]), col + reach + 1))
+        ]
+
+    def propose_move(self, maze, other_agents=()):
+        """The (dx, dy) a move would take, or None if a wall, closed door or agent blocks it."""
+        cos_a, sin_a = direction(self.angle)
+        dx = cos_a * self.move_step
+        dy = sin_a * self.move_step
+
+        look_x = self.x + cos_a * self.lookahead_distance
+        look_y = self.y + sin_a * self.lookahead_distance
 
         # Check wall
-        for y, row in enumerate(maze):
-            for x, cell in enumerate(row):
-                if cell == "w":
-                    rect = pygame.Rect(
-                        x * self.cell_size,
-                        y * self.cell_size,
-                        self.cell_size,
-                        self.cell_size,
-                    )
-                    if rect.clipline((self.x, self.y), (look_x, look_y)):
-                        # print("Penalty: Hit wall")
-                        return  # Penalty on wall hit
-                elif cell == "o":
-                    rect = pygame.Rect(
-                        x * self.cell_size,
-                        y * self.cell_size,
-                        self.cell_size,
-                        self.cell_size,
-                    )
-                    # if rect.clipline((self.x, self.y), (look_x, look_y)):
-                    #     print("!: Open door")
-                    # dont return go through in open door
-                elif cell == "d":
-                    rect = pygame.Rect(
-                        x * self.cell_size,
-                        y * self.cell_size,
-                        self.cell_size,
-                        self.cell_size,
-                    )
-                    if rect.clipline((self.x, self.y), (look_x, look_y)):
-                        # print("Penalty: Hit Closed door")
-                        return  # Penalty on wall hit
+        for y, x in self.nearby_cells(maze):
+            cell = maze[y][x]
+            if cell == "w":
+                rect = pygame.Rect(
+                    x * self.cell_size,
+                    y * self.cell_size,
+                    self.cell_size,
+                    self.cell_size,
+                )
+                if rect.clipline((self.x, self.y), (look_x, look_y)):
+                    # print("Penalty: Hit wall")
+                    return None  # Penalty on wall hit
+            elif cell == "o":
+                rect = pygame.Rect(
+                    x * self.cell_size,
+                    y * self.cell_size,
+                    self.cell_size,
+                    self.cell_size,
+                )
+                # if rect.clipline((self.x, self.y), (look_x, look_y)):
+                #     print("!: Open door")
+                # dont return go through in open door
+            elif cell == "d":
+                rect = pygame.Rect(
+                    x * self.cell_size,
+                    y * self.cell_size,
+                    self.cell_size,
+                    self.cell_size,
+                )
+                if rect.clipline((self.x, self.y), (look_x, look_y)):
+                    # print("Penalty: Hit Closed door")
+                    return None  # Penalty on wall hit
 
         # Check collision with another agent
         for other in other_agents:
             if self.will_collide_with(other, dx, dy):
                 # print("Penalty: Collided with another agent")
-                return
+                return None
+        return dx, dy
+
+    def move_forward(self, maze, screen, other_agents=[]):
+        step = self.propose_move(maze, other_agents)
+        if step is None:
+            return
+        dx, dy = step
 
         # Apply movement and track distance
         prev_x, prev_y = self.x, self.y
@@ -131,55 +291,53 @@ class Agent:
         self.total_distance += math.hypot(self.x - prev_x, self.y - prev_y)
         # self.update_vision_arc(maze)  # Update vision arc after movement
 
-    def open_door(self, maze):
-        look_x = self.x + math.cos(math.radians(self.angle)) * self.lookahead_distance
-        look_y = self.y + math.sin(math.radians(self.angle)) * self.lookahead_distance
-        for y, row in enumerate(maze):
-            for x, cell in enumerate(row):
-                if cell == "d":
-                    # print('found door')
-                    rect = pygame.Rect(
-                        x * self.cell_size,
-                        y * self.cell_size,
-                        self.cell_size,
-                        self.cell_size,
-                    )
-                    if rect.clipline((self.x, self.y), (look_x, look_y)):
-                        # print("Open door")
-                        # print('cell' , x, y, maze[y][x])
-                        maze[y][x] = "o"
-                        # print('cell' ,maze[y][x])
+    def door_target(self, maze, state):
+        """(row, col) of the first door in `state` ("d" closed, "o" open) on the lookahead line, or None."""
+        cos_a, sin_a = direction(self.angle)
+        look_x = self.x + cos_a * self.lookahead_distance
+        look_y = self.y + sin_a * self.lookahead_distance
+        for y, x in self.nearby_cells(maze):
+            if maze[y][x] == state:
+                rect = pygame.Rect(
+                    x * self.cell_size,
+                    y * self.cell_size,
+                    self.cell_size,
+                    self.cell_size,
+                )
+                if rect.clipline((self.x, self.y), (look_x, look_y)):
+                    return y, x
+        return None
 
-                        return maze  # Penalty on wall hit
+    def open_door(self, maze):
+        target = self.door_target(maze, "d")
+        if target is not None:
+            maze[target[0]][target[1]] = "o"
+            self.door_toggles += 1
+            vision.note_door_toggle()
+            if self.tracer.active:
+                self.tracer.emit(INFO, self.id, "door_toggle", cell=target, state="o")
         return maze
 
     def close_door(self, maze):
-        look_x = self.x + math.cos(math.radians(self.angle)) * self.lookahead_distance
-        look_y = self.y + math.sin(math.radians(self.angle)) * self.lookahead_distance
-        for y, row in enumerate(maze):
-            for x, cell in enumerate(row):
-                if cell == "o":
-                    # print('found door')
-                    rect = pygame.Rect(
-                        x * self.cell_size,
-                        y * self.cell_size,
-                        self.cell_size,
-                        self.cell_size,
-                    )
-                    if rect.clipline((self.x, self.y), (look_x, look_y)):
-                        # print("Close door")
-                        # print('cell' , x, y, maze[y][x])
-                        maze[y][x] = "d"
-                        # print('cell' ,maze[y][x])
-
-                        return maze  # Penalty on wall hit
+        target = self.door_target(maze, "o")
+        if target is not None:
+            maze[target[0]][target[1]] = "d"
+            self.door_toggles += 1
+            vision.note_door_toggle()
+            if self.tracer.active:
+                self.tracer.emit(INFO, self.id, "door_toggle", cell=target, state="d")
         return maze
 
+    @property
+    def heading(self):
+        """Index of the current angle in HEADING_VECTORS."""
+        return int(self.angle) // HEADING_STEP % NUM_HEADINGS
+
     def rotate_left(self):
-        self.angle = (self.angle - 30) % 360
+        self.angle = (self.angle - HEADING_STEP) % 360
 
     def rotate_right(self):
-        self.angle = (self.angle + 30) % 360
+        self.angle = (self.angle + HEADING_STEP) % 360
 
     # def update_vision_arc(self, maze):
     #     self.vision_arc = defaultdict(list)
@@ -216,86 +374,299 @@ class Agent:
     #     print(self.vision_arc)
 
     def update_vision_arc(self, maze, other_agents):
-        self.vision_arc = defaultdict(list)
-        start_angle = math.radians(self.angle) - self.half_fov
-        # Small offset to start ray casting slightly away from self center
-        ray_start_offset = 0.1
+        """Casts the vision rays into vision_hits, vision_depths and vision_agent_types."""
+        others = tuple(
+            (
+                agent.x,
+                agent.y,
+                agent.radius,
+                vision.AGENT_TYPE_CODES.get(getattr(agent, "type", None), vision.OTHER_AGENT_TYPE),
+            )
+            for agent in other_agents
+            if agent is not self and not getattr(agent, "destroyed", False)
+        )
+        # Blocked moves and door actions with no door in reach leave the whole
+        # view unchanged, so the previous arrays are kept as they are
+        key = (self.x, self.y, self.angle, vision.door_version, others)
+        if key == self._vision_key and maze is self._vision_grid:
+            return
+        self._vision_key, self._vision_grid = key, maze
+
+        fan = ray_fan(self.angle, self.half_fov, self.step_angle, self.casted_rays)
+        if self.vision_cache is not None:
+            static_rays = self.vision_cache.rays(
+                maze, self.x, self.y, self.angle, fan, self.cell_size, self.max_depth
+            )
+        else:
+            static_rays = vision.cast_static(
+                self.x, self.y, fan, maze, self.cell_size, self.max_depth
+            )
 
+        hits, depths, agent_types = self.vision_hits, self.vision_depths, self.vision_agent_types
         for ray in range(self.casted_rays):
-            current_angle = start_angle + ray * self.step_angle
-            # Keep track of the closest hit (wall, door, or agent) for this ray
-            closest_hit_depth = float("inf")
-            closest_hit_info = None
-
-            # Cast ray step by step
-            for depth_step in range(1, self.max_depth):
-                depth = depth_step * 1.0  # Use float depth
-                if (
-                    depth >= closest_hit_depth
-                ):  # Stop if we've already hit something closer
-                    break
-
-                target_x = self.x + math.cos(current_angle) * (depth + ray_start_offset)
-                target_y = self.y + math.sin(current_angle) * (depth + ray_start_offset)
-
-                # 1. Check for Agent Collision
-                agent_hit_this_step = False
-                for agent in other_agents:
-                    # Skip self or agents already checked (though other_agents list should exclude self)
-                    if agent is self or getattr(agent, "destroyed", False):
-                        continue
-
-                    # Simple circle collision check
-                    dist_sq = (target_x - agent.x) ** 2 + (target_y - agent.y) ** 2
-                    if dist_sq < (agent.radius**2):
-                        # Agent hit. Record it if it's the closest thing yet.
-                        if depth < closest_hit_depth:
-                            closest_hit_depth = depth
-                            # Store type for QLearningAgent to use
-                            closest_hit_info = (
-                                "agent",
-                                round(depth),
-                                getattr(agent, "type", "unknown"),
-                            )
-                        agent_hit_this_step = True
-                        break  # Stop checking other agents for this point
-
-                # If agent hit, it blocks further vision along this ray for this check
-                if agent_hit_this_step:
-                    break  # Stop casting this ray further if we hit an agent
-
-                # 2. Check for Maze Collision (Walls/Doors)
-                col = int(target_x / self.cell_size)
-                row = int(target_y / self.cell_size)
-
-                if not (0 <= row < len(maze) and 0 <= col < len(maze[0])):
-                    # Ray went out of bounds, treat as hitting edge
-                    if depth < closest_hit_depth:
-                        closest_hit_depth = depth
-                        closest_hit_info = ("out_of_bounds", round(depth))
-                    break  # Stop casting ray
-
-                cell = maze[row][col]
-                if cell == "w" or cell == "d":  # Wall or Closed Door blocks vision
-                    feature_type = "wall" if cell == "w" else "closed_door"
-                    if depth < closest_hit_depth:
-                        closest_hit_depth = depth
-                        closest_hit_info = (feature_type, round(depth))
-                    break  # Stop casting this ray further
-                elif cell == "o":  # Open door - note it but don't necessarily stop ray
-                    # Add open door info if nothing closer has been hit
-                    if depth < closest_hit_depth:
-                        # We only add 'open_door' if it's the final thing seen or nothing else blocks before it
-                        # Let's store it temporarily and add later if nothing else is closer
-                        pass  # Or potentially add to a list of transparent features seen
-
-            # End of casting for one ray. Add the closest hit info.
-            if closest_hit_info:
-                self.vision_arc[str(ray + 1)].append(closest_hit_info)
+            limit, code, depth = static_rays[ray]
+            agent_type = vision.NO_AGENT
+            # Agents block the ray before any wall or door at the same depth
+            if others:
+                agent_depth, hit_type = vision.first_agent_hit(
+                    self.x, self.y, fan[ray][0], fan[ray][1], others, limit
+                )
+                if agent_depth is not None:
+                    code, depth, agent_type = vision.HIT_AGENT, agent_depth, hit_type
+            hits[ray] = code
+            depths[ray] = depth
+            agent_types[ray] = agent_type
+
+    def get_state(self):
+        """Gets the current state representation (rounded position and angle)."""
+        # Consider rounding to larger increments (e.g., // 5 * 5) or using grid coords
+        # to reduce state space size if performance is an issue.
+        return (round(self.x), round(self.y), round(self.angle))
+
+    def apply_action(self, action, maze, screen, other_agents):
+        """Performs one of ACTIONS in the maze and returns the (possibly updated) maze."""
+        if action == "move":
+            self.move_forward(maze, screen, other_agents)
+        elif action == "left":
+            self.rotate_left()
+        elif action == "right":
+            self.rotate_right()
+        elif action == "open":
+            maze = self.open_door(maze)  # Returns updated maze
+        elif action == "close":
+            maze = self.close_door(maze)  # Returns updated maze
+        return maze
+
+    def observe(self, maze, other_agents):
+        """Updates the vision arc and returns the active (non-destroyed) other agents."""
+        active_others = []
+        try:
+            active_others = [
+                a
+                for a in other_agents
+                if not getattr(a, "destroyed", False) and a is not self
+            ]
+            self.update_vision_arc(maze, active_others)
+        except (AttributeError, TypeError) as e:
+            print(
+                f"CRITICAL WARNING: Agent {self.id} 'update_vision_arc' failed or missing/wrong arguments! Vision rewards will not work. Error: {e}"
+            )
+
+        return active_others
+
+    def compute_reward(self, action, maze, active_others):
+        """Calculates the reward for the action just taken, based on the new state/vision."""
+        current_reward = 0.0  # Accumulate rewards for this step
+
+        # --- Exploration Reward ---
+        distance_from_start = math.hypot(
+            self.x - self.initial_pos[0], self.y - self.initial_pos[1]
+        )
+        explore_reward = 0
+        if distance_from_start > 2000:
+            explore_reward = 60
+        elif distance_from_start > 1000:
+            explore_reward = 50
+        elif distance_from_start > 500:
+            explore_reward = 25
+        elif distance_from_start < self.cell_size * 10:
+            explore_reward = -5  # Penalize staying too close?
+        # You had a large penalty (-150) for dist < 500, keeping it similar:
+        if distance_from_start < 500:
+            explore_reward = -150
+        current_reward += explore_reward
+        # Add view_comments logic if needed
+
+        # --- Region/Door Interaction Rewards ---
+        my_region = self.get_current_region(maze)
+        region_reward = 0
+        if self.type == "hider":
+            base_region_reward = 300
+            if my_region == "2":
+                region_reward += base_region_reward + 300
+                if action == "close":
+                    region_reward += 500
+                elif action == "open":
+                    region_reward -= 500
+                self.rank_point += 3
+            elif my_region == "3":
+                region_reward += base_region_reward
+                if action == "close":
+                    region_reward += 300
+                elif action == "open":
+                    region_reward -= 300
+                self.rank_point += 2
+            elif my_region == "1":  # Add reward for region 1
+                if action == "open":
+                    region_reward += 200  # Reward for opening doors in region 1
+                self.rank_point += 1
             else:
-                # If nothing was hit, it means empty space up to max_depth
-                self.vision_arc[str(ray + 1)].append(("empty", self.max_depth))
+                self.rank_point += 1
+        elif self.type == "seeker":
+            if (
+                action == "open" and my_region != "w"
+            ):  # Reward opening doors (except walls)
+                region_reward += 500
+        current_reward += region_reward
+        # Add view_comments logic if needed
+
+        # --- Same Room Interaction Rewards ---
+        interaction_reward = 0
+        # Note: This iterates through ALL agents, use active_others?
+        for other in active_others:  # Use active agents only
+            other_region = self.get_agent_region(maze, other)  # Need another helper
+            if (
+                my_region is not None
+                and my_region == other_region
+                and my_region not in ["w", "o", "d", "h", "s"]
+            ):  # Check grid cells, not start/door cells
+                dist_to_other = math.hypot(self.x - other.x, self.y - other.y)
+                if self.type == "hider" and other.type == "hider":
+                    # Reward hiders sticking together in safe rooms?
+                    if my_region in ["2", "3"]:
+                        interaction_reward += 500  # Make sure this aligns with goals
+                elif self.type == "hider" and other.type == "seeker":
+                    if dist_to_other < 200:
+                        interaction_reward -= 100  # Penalty increases closer
+                    elif dist_to_other < 500:
+                        interaction_reward -= 20  # Smaller penalty further away
+                elif self.type == "seeker" and other.type == "hider":
+                    if dist_to_other < 200:
+                        interaction_reward += 50  # Reward increases closer
+                    elif dist_to_other < 500:
+                        interaction_reward += 10  # Smaller reward further away
+        current_reward += interaction_reward
+        # Add view_comments logic if needed
+
+        # --- Vision Arc Based Opponent Detection Reward/Penalty/Catch ---
+        opponent_type = "hider" if self.type == "seeker" else "seeker"
+        opponent_detected_in_fov = False
+        min_opponent_dist_in_fov = float("inf")
+        vision_reward = 0
+        catch_reward = 0
+
+        opponent_rays = (self.vision_hits == vision.HIT_AGENT) & (
+            self.vision_agent_types == vision.AGENT_TYPE_CODES.get(opponent_type)
+        )
+        if opponent_rays.any():
+            opponent_detected_in_fov = True
+            min_opponent_dist_in_fov = int(self.vision_depths[opponent_rays].min())
+
+        if opponent_detected_in_fov:
+            proximity_effect = self.VISION_PROXIMITY_MAX_BONUS * math.exp(
+                -min_opponent_dist_in_fov / self.VISION_PROXIMITY_DECAY_RATE
+            )
+
+            if self.type == "seeker":
+                vision_reward += proximity_effect
+                if self.tracer.active:
+                    self.tracer.emit(
+                        DEBUG,
+                        self.id,
+                        "saw_hider",
+                        reward=proximity_effect,
+                        dist=float(min_opponent_dist_in_fov),
+                    )
+
+                # Catching Logic
+                if min_opponent_dist_in_fov < self.VISION_CATCH_THRESHOLD:
+                    closest_hider_obj, min_actual_dist_sq = self.find_closest_opponent(
+                        active_others, "hider"
+                    )
+                    if (
+                        closest_hider_obj
+                        and min_actual_dist_sq
+                        < (self.VISION_CATCH_THRESHOLD * 1.1) ** 2
+                    ):
+                        if not closest_hider_obj.destroyed:
+                            closest_hider_obj.destroyed = True
+                            catch_reward += self.CATCH_BONUS  # Add catch bonus
+                            self.catches += 1
+                            if self.tracer.active:
+                                self.tracer.emit(
+                                    INFO,
+                                    self.id,
+                                    "caught_hider",
+                                    hider=closest_hider_obj.id,
+                                    dist=math.sqrt(min_actual_dist_sq),
+                                    bonus=self.CATCH_BONUS,
+                                )
+
+            elif self.type == "hider":
+                penalty = proximity_effect * self.SEEN_PENALTY_MULTIPLIER
+                vision_reward -= penalty
+                if self.tracer.active:
+                    self.tracer.emit(
+                        DEBUG,
+                        self.id,
+                        "saw_seeker",
+                        penalty=penalty,
+                        dist=float(min_opponent_dist_in_fov),
+                    )
+
+        current_reward += vision_reward + catch_reward
+
+        # --- Vision Arc Based Wall Collision Penalty ---
+        wall_penalty = 0
+        wall_rays = (self.vision_hits == vision.HIT_WALL) | (
+            self.vision_hits == vision.HIT_CLOSED_DOOR
+        )
+        # An obstacle very close on any ray
+        hit_wall_close = bool((wall_rays & (self.vision_depths < self.move_step * 1.5)).any())
+        min_wall_dist = (
+            int(self.vision_depths[wall_rays].min()) if wall_rays.any() else float("inf")
+        )
 
-        # Optional: You might want a flag to control this print statement
-        # if getattr(self, "view_comments", False):
-        #     print(f"Agent {getattr(self,'id','N/A')} vision: {dict(self.vision_arc)}")
+        # Apply penalty only if the action was 'move' and hit obstacle
+        if hit_wall_close and action == "move":
+            wall_penalty = -self.WALL_PENALTY  # Use the defined constant
+            if self.tracer.active:
+                self.tracer.emit(
+                    DEBUG,
+                    self.id,
+                    "wall_penalty",
+                    dist=float(min_wall_dist),
+                    penalty=wall_penalty,
+                )
+        current_reward += wall_penalty
+
+        breakdown = self.reward_breakdown
+        breakdown["explore"] += explore_reward
+        breakdown["region"] += region_reward
+        breakdown["interaction"] += interaction_reward
+        breakdown["vision"] += vision_reward
+        breakdown["catch"] += catch_reward
+        breakdown["wall"] += wall_penalty
+
+        return current_reward
+
+    # --- Helper Functions ---
+    def get_current_region(self, maze):
+        """Determines the maze grid cell type at the agent's current location."""
+        grid_x = int(self.x / self.cell_size)
+        grid_y = int(self.y / self.cell_size)
+        if 0 <= grid_y < len(maze) and 0 <= grid_x < len(maze[0]):
+            return maze[grid_y][grid_x]
+        return None  # Indicate agent is outside maze bounds
+
+    def get_agent_region(self, maze, agent):
+        """Determines the maze grid cell type for a given agent object."""
+        grid_x = int(agent.x / self.cell_size)
+        grid_y = int(agent.y / self.cell_size)
+        if 0 <= grid_y < len(maze) and 0 <= grid_x < len(maze[0]):
+            return maze[grid_y][grid_x]
+        return None
+
+    def find_closest_opponent(self, opponent_list, opponent_type_target):
+        """Finds the closest non-destroyed opponent of a specific type."""
+        closest_opponent_obj = None
+        min_dist_sq = float("inf")
+        for other in opponent_list:
+            if other.type == opponent_type_target and not getattr(
+                other, "destroyed", False
+            ):
+                dist_sq = (self.x - other.x) ** 2 + (self.y - other.y) ** 2
+                if dist_sq < min_dist_sq:
+                    min_dist_sq = dist_sq
+                    closest_opponent_obj = other
+        return closest_opponent_obj, min_dist_sq
@@ -0,0 +1,201 @@
+# agent_store.py
+
+import numpy as np
+
+# Column name -> dtype. Angles are whole degrees everywhere in the game.
+COLUMNS = {
+    "x": np.float64,
+    "y": np.float64,
+    "angle": np.int64,
+    "radius": np.float64,
+    "type": np.int8,  # Index into AgentStore.type_names
+    "destroyed": np.bool_,
+    "total_reward": np.float64,
+    "rank_point": np.int64,
+}
+
+
+class StoreField:
+    """Attribute read from and written to column `name` of obj._store at row obj._slot.
+
+    Single elements go through memoryviews of the columns, which return and
+    accept plain Python numbers several times faster than NumPy indexing.
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj._store.cells[self.name][obj._slot]
+
+    def __set__(self, obj, value):
+        try:
+            obj._store.cells[self.name][obj._slot] = value
+        except TypeError:
+            # e.g. an int into a float column; NumPy converts it
+            obj._store.columns[self.name][obj._slot] = value
+
+
+class TypeField(StoreField):
+    """The agent type, stored as a small integer code."""
+
+    __slots__ = ()
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj._store.type_names[obj._store.cells["type"][obj._slot]]
+
+    def __set__(self, obj, value):
+        obj._store.columns["type"][obj._slot] = obj._store.type_code(value)
+
+
+def _fields():
+    return {name: TypeField(name) if name == "type" else StoreField(name) for name in COLUMNS}
+
+
+class AgentView:
+    """Lightweight handle on one store slot with the Agent attribute names for its columns.
+
+    Two slots and no __dict__, for code that only needs the columns of an
+    agent, e.g. to hand many of them around without the full Agent object.
+    """
+
+    __slots__ = ("_store", "_slot")
+
+    def __init__(self, store, slot):
+        self._store = store
+        self._slot = slot
+
+
+for _name, _field in _fields().items():
+    setattr(AgentView, _name, _field)
+
+_stored_classes = {}  # Agent class -> its store-backed subclass
+
+
+def _new_stored(cls):
+    return object.__new__(stored_class(cls))
+
+
+def _reduce_stored(self, protocol):
+    # The subclass is made at run time and cannot be found by name, so
+    # pickle and copy rebuild it from the class it was made from
+    reduced = super(type(self), self).__reduce_ex__(protocol)
+    return (_new_stored, (type(self).__bases__[0],)) + tuple(reduced[2:])
+
+
+def stored_class(cls):
+    """Subclass of cls whose COLUMNS attributes are StoreFields, created once per class.
+
+    Only attached agents are switched to it, so agents outside a store keep
+    plain instance attributes and pay nothing for the store.
+    """
+    stored = _stored_classes.get(cls)
+    if stored is None:
+        namespace = _fields()
+        namespace["__module__"] = cls.__module__
+        namespace["__doc__"] = cls.__doc__
+        namespace["__reduce_ex__"] = _reduce_stored
+        stored = type(cls.__name__, (cls,), namespace)
+        _stored_classes[cls] = stored
+    return stored
+
+
+class AgentStore:
+    """Struct-of-arrays storage for the per-agent state every tick touches.
+
+    Each column in COLUMNS is one contiguous NumPy array indexed by slot, so
+    tick-wide work (observations, alive masks) is array arithmetic.
+    attach() moves an agent's values into a new slot and switches it to
+    stored_class(), so the agent keeps its attribute API; view() gives a
+    __slots__ handle for code that only needs the columns.
+    """
+
+    def __init__(self, capacity=8):
+        self.size = 0
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.cells = {name: memoryview(column) for name, column in self.columns.items()}
+        self.type_names = ["seeker", "hider"]
+        self.agents = []
+
+    def __len__(self):
+        return self.size
+
+    def __getstate__(self):
+        # Memoryviews cannot be copied or pickled; they are rebuilt on load
+        state = dict(self.__dict__)
+        del state["cells"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.cells = {name: memoryview(column) for name, column in self.columns.items()}
+
+    def type_code(self, name):
+        if name not in self.type_names:
+            self.type_names.append(name)
+        return self.type_names.index(name)
+
+    def _grow(self):
+        for name, column in self.columns.items():
+            grown = np.zeros(max(8, 2 * len(column)), dtype=column.dtype)
+            grown[: len(column)] = column
+            self.columns[name] = grown
+            self.cells[name] = memoryview(grown)
+
+    def attach(self, agent):
+        """Moves agent's column attributes into the next free slot; returns the slot."""
+        if self.size == len(self.columns["x"]):
+            self._grow()
+        slot = self.size
+        values = {name: getattr(agent, name) for name in COLUMNS}
+        for name in COLUMNS:
+            agent.__dict__.pop(name, None)
+        agent.__class__ = stored_class(type(agent))
+        agent._store, agent._slot = self, slot
+        self.size += 1
+        for name, value in values.items():
+            setattr(agent, name, value)
+        self.agents.append(agent)
+        return slot
+
+    def view(self, slot):
+        return AgentView(self, slot)
+
+    def views(self):
+        """An AgentView for every live slot, in slot order."""
+        return [AgentView(self, slot) for slot in range(self.size)]
+
+    def clone(self, agents):
+        """Copy of this store backing `agents`, copies of self.agents in the same order.
+
+        Columns are copied; each agent is pointed at its slot in the copy.
+        """
+        store = object.__new__(AgentStore)
+        store.size = self.size
+        store.columns = {name: column.copy() for name, column in self.columns.items()}
+        store.cells = {name: memoryview(column) for name, column in store.columns.items()}
+        store.type_names = list(self.type_names)
+        store.agents = list(agents)
+        for slot, agent in enumerate(store.agents):
+            agent._store, agent._slot = store, slot
+        return store
+
+    def column(self, name):
+        """The live part of a column (a view, not a copy)."""
+        return self.columns[name][: self.size]
+
+    def alive(self):
+        return ~self.column("destroyed")
+
+    def states(self):
+        """(n, 3) array of rounded (x, y, angle), the same values as Agent.get_state()."""
+        return np.stack(
+            [np.round(self.column("x")), np.round(self.column("y")), self.column("angle")],
+            axis=1,
+        ).astype(np.float64)
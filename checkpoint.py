@@ -0,0 +1,74 @@
+# checkpoint.py
+
+import threading
+
+
+class CheckpointWriter:
+    """Writes Q-table checkpoints on a background thread while training goes on.
+
+    submit() calls each agent's checkpoint() on the calling thread. That only
+    copies the table, which is quick; the returned write function, which does
+    the slow formatting and file I/O, runs later on the writer thread. Agents
+    write to a temporary file and rename it over the old one, so a crash
+    mid-write keeps the previous checkpoint. If a table is submitted again
+    before its last checkpoint was written, only the newest copy is written.
+    A write that raises or returns False is counted in `failed`, not `written`.
+    """
+
+    def __init__(self):
+        self.pending = {}  # qtable_path -> write function, in submission order
+        self.written = 0
+        self.failed = 0
+        self.superseded = 0
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, agents):
+        """Snapshots every agent's table now and queues the writes; returns immediately."""
+        writes = [(agent.qtable_path, agent.checkpoint()) for agent in agents]
+        with self._condition:
+            for path, write in writes:
+                if path in self.pending:
+                    self.superseded += 1
+                self.pending[path] = write
+            self._condition.notify_all()
+        return len(writes)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self.pending and not self._closed:
+                    self._condition.wait()
+                if not self.pending:
+                    return
+                path = next(iter(self.pending))
+                write = self.pending.pop(path)
+                self._busy = True
+            try:
+                ok = write() is not False
+            except Exception as e:
+                print(f"Error writing checkpoint {path}: {e}")
+                ok = False
+            with self._condition:
+                self._busy = False
+                if ok:
+                    self.written += 1
+                else:
+                    self.failed += 1
+                self._condition.notify_all()
+
+    def wait(self):
+        """Blocks until every submitted checkpoint is on disk."""
+        with self._condition:
+            while self.pending or self._busy:
+                self._condition.wait()
+
+    def close(self):
+        """Writes whatever is still queued, then stops the writer thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
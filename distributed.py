@@ -0,0 +1,380 @@
+# distributed.py
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+import numpy as np
+from agent import ACTIONS
+from checkpoint import CheckpointWriter
+from environment import HideAndSeekEnv, collect_rollout, update_from_rollout
+from q_learning import QLearningAgent
+
+ROUND_STEPS = 60 * 240
+FRAME = struct.Struct("!II")  # JSON header length, array payload length
+
+
+def send_message(sock, kind, arrays=None, **fields):
+    """Sends one frame: a JSON header naming `kind` and the arrays, then their raw bytes.
+
+    Only JSON and plain NumPy buffers cross the wire, never pickles, so a
+    peer cannot make the other side run code.
+    """
+    arrays = arrays or {}
+    header = dict(fields, kind=kind, arrays=[[name, a.dtype.str, a.shape] for name, a in arrays.items()])
+    header_bytes = json.dumps(header).encode()
+    payload = b"".join(np.ascontiguousarray(a).tobytes() for a in arrays.values())
+    sock.sendall(FRAME.pack(len(header_bytes), len(payload)) + header_bytes + payload)
+
+
+def _recv_exact(sock, size):
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("peer closed the connection")
+        received += n
+    return data
+
+
+def recv_message(sock):
+    """Reads one frame written by send_message(); returns (header, {name: array})."""
+    header_len, payload_len = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    header = json.loads(_recv_exact(sock, header_len))
+    payload = _recv_exact(sock, payload_len)
+    arrays, offset = {}, 0
+    for name, dtype, shape in header.pop("arrays"):
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(payload, dtype=dtype, count=count, offset=offset).reshape(shape)
+        offset += count * dtype.itemsize
+    return header, arrays
+
+
+def encode_rows(q_table, states):
+    """Packs Q-table rows as float32 key and Q-value arrays (positions and angles are whole numbers)."""
+    keys = np.array(states, dtype=np.float32).reshape(len(states), HideAndSeekEnv.OBSERVATION_SIZE)
+    q_values = np.array(
+        [[q_table[s].get(a, 0.0) for a in ACTIONS] for s in states], dtype=np.float32
+    ).reshape(len(states), len(ACTIONS))
+    return keys, q_values
+
+
+def agent_name(agent):
+    return f"{agent.type}_{agent.id}"
+
+
+class ActorPolicy(QLearningAgent):
+    """Read-only local copy of one learner table, refreshed from policy messages.
+
+    Actors only choose actions with it; learning and saving happen on the
+    learner, so nothing is loaded from or written to disk here.
+    """
+
+    def load_q_table(self):
+        return {}
+
+    def save_q_table(self):
+        pass
+
+    def checkpoint(self):
+        return lambda: None
+
+    def apply_rows(self, keys, q_values):
+        for key, row in zip(keys.tolist(), q_values.tolist()):
+            self.q_table[tuple(key)] = dict(zip(ACTIONS, row))
+
+
+class ActorConnection:
+    """Learner-side state of one connected actor."""
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.agents = None  # Table names in the actor's env order
+        self.sent_version = -1  # Newest table version the actor has
+        self.batches_since_push = 0
+
+
+class Learner:
+    """Owns the maze's Q-tables and learns from transition batches streamed by actors.
+
+    Connection threads only read frames into a queue; one loop applies every
+    batch with update_from_rollout(), so the tables have a single writer.
+    Each row remembers the version at which it last changed, and every
+    `push_every` batches an actor is sent just the rows it has not seen.
+    """
+
+    def __init__(self, maze_file, qtable_dir=".", push_every=4, checkpoint_every=100):
+        env = HideAndSeekEnv(maze_file)
+        env.reset()
+        self.tables = {
+            agent_name(a): QLearningAgent(
+                0, 0, env.cell_size, id=a.id, type=a.type,
+                qtable_path=os.path.join(qtable_dir, f"qtable_agent_{a.type}_{a.id}.txt"),
+            )
+            for a in env.agents
+        }
+        self.push_every = push_every
+        self.checkpoint_every = checkpoint_every
+        self.version = 0
+        self.row_versions = {name: {s: 0 for s in t.q_table} for name, t in self.tables.items()}
+        self.inbox = queue.Queue()
+        self.batches = 0
+        self.transitions = 0
+        self.checkpoints = CheckpointWriter()
+
+    def listen(self, host="127.0.0.1", port=0):
+        """Binds the server socket and accepts actors from a daemon thread; returns the port."""
+        self.server = socket.create_server((host, port))
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self.server.getsockname()[1]
+
+    def _accept(self):
+        while True:
+            try:
+                sock, address = self.server.accept()
+            except OSError:
+                return  # Server socket closed
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = ActorConnection(sock, address)
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn):
+        try:
+            while True:
+                header, arrays = recv_message(conn.sock)
+                self.inbox.put((conn, header, arrays))
+                if header["kind"] == "bye":
+                    return
+        except (ConnectionError, OSError, ValueError) as e:
+            self.inbox.put((conn, {"kind": "bye", "error": str(e)}, {}))
+
+    def snapshot(self, names, since):
+        """Rows of the named tables changed after version `since`, as policy arrays."""
+        arrays = {}
+        for name in set(names):
+            versions = self.row_versions[name]
+            states = [s for s, v in versions.items() if v > since]
+            arrays[f"{name}/keys"], arrays[f"{name}/q"] = encode_rows(self.tables[name].q_table, states)
+        return arrays
+
+    def push(self, conn):
+        send_message(conn.sock, "policy", self.snapshot(conn.agents, conn.sent_version), version=self.version)
+        conn.sent_version = self.version
+        conn.batches_since_push = 0
+
+    def apply(self, conn, arrays):
+        """Learns from one batch and marks the rows it touched with a new version."""
+        rollout = {
+            "obs": arrays["obs"].astype(np.float64),
+            "next_obs": arrays["next_obs"].astype(np.float64),
+            "actions": arrays["actions"].astype(np.int64),
+            "rewards": arrays["rewards"],
+            "alive": arrays["alive"],
+        }
+        learners = [self.tables[name] for name in conn.agents]
+        update_from_rollout(learners, rollout)
+        self.version += 1
+        alive = rollout["alive"]
+        for i, name in enumerate(conn.agents):
+            versions = self.row_versions[name]
+            for key in (rollout["obs"][alive[:, i], i], rollout["next_obs"][alive[:, i], i]):
+                for state in map(tuple, key.tolist()):
+                    versions[state] = self.version
+        self.batches += 1
+        self.transitions += int(alive.sum())
+
+    def save(self):
+        """Snapshots the tables; they are written by a background thread while learning goes on."""
+        self.checkpoints.submit(self.tables.values())
+
+    def run(self, expected_actors=0):
+        """Serves actors until `expected_actors` have said goodbye (0 = until interrupted)."""
+        finished = 0
+        start = last_report = time.perf_counter()
+        try:
+            while not expected_actors or finished < expected_actors:
+                try:
+                    conn, header, arrays = self.inbox.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                try:
+                    if header["kind"] == "hello":
+                        conn.agents = header["agents"]
+                        unknown = set(conn.agents) - set(self.tables)
+                        if unknown:
+                            print(f"Rejecting actor {conn.address}: unknown agents {sorted(unknown)}")
+                            conn.sock.close()
+                            continue
+                        self.push(conn)
+                    elif header["kind"] == "batch":
+                        self.apply(conn, arrays)
+                        conn.batches_since_push += 1
+                        if conn.batches_since_push >= self.push_every:
+                            self.push(conn)
+                        if self.checkpoint_every and self.batches % self.checkpoint_every == 0:
+                            self.save()
+                    elif header["kind"] == "bye":
+                        finished += 1
+                        conn.sock.close()
+                        if "error" in header:
+                            print(f"Actor {conn.address} dropped: {header['error']}")
+                except (OSError, KeyError, ValueError) as e:
+                    # A bad batch or a dead socket drops that actor, not the learner
+                    print(f"Dropping actor {conn.address}: {e}")
+                    conn.sock.close()
+                now = time.perf_counter()
+                if now - last_report >= 10.0:
+                    print(f"📡 {self.batches} batches, {self.transitions / (now - start):.0f} transitions/s")
+                    last_report = now
+        except KeyboardInterrupt:
+            print("Interrupted; saving tables.")
+        finally:
+            self.server.close()
+            self.save()
+            self.checkpoints.close()
+        elapsed = time.perf_counter() - start
+        print(f"📡 Learner done: {self.batches} batches, {self.transitions} transitions in {elapsed:.1f}s")
+
+
+def run_actor(maze_file, host, port, episodes=1, batch_steps=1000, max_steps=ROUND_STEPS, epsilon=0.2, seed=0):
+    """Plays episodes with the latest policy from the learner and streams back every transition."""
+    env = HideAndSeekEnv(maze_file, seed=seed, max_steps=max_steps)
+    env.reset()
+    names = [agent_name(a) for a in env.agents]
+    policies = {}
+    for a in env.agents:
+        policy = ActorPolicy(0, 0, env.cell_size, id=a.id, type=a.type, rng=env.rng)
+        policy.epsilon = epsilon
+        policies[agent_name(a)] = policy
+    learners = [policies[name] for name in names]
+
+    sock = socket.create_connection((host, port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    # Pushes are read as soon as they arrive, so the learner never blocks
+    # sending to an actor that is busy simulating
+    inbox = queue.Queue()
+
+    def read_policies():
+        try:
+            while True:
+                inbox.put(recv_message(sock)[1])
+        except (ConnectionError, OSError):
+            inbox.put(None)
+
+    def apply_policy(arrays):
+        if arrays is None:
+            raise ConnectionError("learner closed the connection")
+        for name, policy in policies.items():
+            if f"{name}/keys" in arrays:
+                policy.apply_rows(arrays[f"{name}/keys"], arrays[f"{name}/q"])
+
+    try:
+        send_message(sock, "hello", agents=names, seed=seed)
+        threading.Thread(target=read_policies, daemon=True).start()
+        apply_policy(inbox.get())
+        obs = None
+        for episode in range(episodes):
+            while True:
+                rollout = collect_rollout(env, learners, batch_steps, obs=obs)
+                send_message(
+                    sock,
+                    "batch",
+                    {
+                        "obs": rollout["obs"].astype(np.float32),
+                        "next_obs": rollout["next_obs"].astype(np.float32),
+                        "actions": rollout["actions"].astype(np.uint8),
+                        "rewards": rollout["rewards"],
+                        "alive": rollout["alive"],
+                    },
+                )
+                # Apply any policy updates that arrived meanwhile, without waiting
+                while not inbox.empty():
+                    apply_policy(inbox.get())
+                obs = rollout["next_obs"][-1]
+                if rollout["terminated"][-1].all() or rollout["truncated"][-1].any():
+                    obs = None
+                    break
+            caught = sum(h.destroyed for h in env.hiders)
+            print(f"🎭 actor {seed}: episode {episode}, {caught}/{len(env.hiders)} hiders caught")
+        send_message(sock, "bye")
+    finally:
+        sock.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Actor/learner training: actors simulate, one learner owns and updates the Q-tables"
+    )
+    parser.add_argument("mode", choices=["learner", "actor", "local"])
+    parser.add_argument("maze_file", nargs="?", default="maze3.txt")
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Learner address (actors) or bind address (learner); only expose it on trusted networks",
+    )
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("--qtable-dir", default=".")
+    parser.add_argument(
+        "--actors",
+        type=int,
+        default=0,
+        help="learner: stop after this many actors finish (0 = run until interrupted); local: actor processes",
+    )
+    parser.add_argument("--episodes", type=int, default=5, help="Episodes per actor")
+    parser.add_argument("--batch-steps", type=int, default=1000, help="Ticks per transition batch")
+    parser.add_argument("--max-steps", type=int, default=ROUND_STEPS)
+    parser.add_argument("--epsilon", type=float, default=0.2)
+    parser.add_argument("--push-every", type=int, default=4, help="Batches between policy pushes to an actor")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="Batches between table saves")
+    parser.add_argument("--seed", type=int, default=0, help="Actor seed (local: seed of the first actor)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.mode == "actor":
+        run_actor(
+            args.maze_file, args.host, args.port, args.episodes, args.batch_steps,
+            args.max_steps, args.epsilon, args.seed,
+        )
+        return
+
+    learner = Learner(args.maze_file, args.qtable_dir, args.push_every, args.checkpoint_every)
+    if args.mode == "learner":
+        port = learner.listen(args.host, args.port)
+        print(f"📡 Learner listening on {args.host}:{port}")
+        learner.run(args.actors)
+        return
+
+    # local: the learner plus actor processes, all on this machine
+    actors = args.actors or os.cpu_count() or 1
+    port = learner.listen("127.0.0.1", 0)
+    processes = [
+        multiprocessing.Process(
+            target=run_actor,
+            args=(
+                args.maze_file, "127.0.0.1", port, args.episodes, args.batch_steps,
+                args.max_steps, args.epsilon, args.seed + i,
+            ),
+            daemon=True,  # Do not outlive a learner that crashed
+        )
+        for i in range(actors)
+    ]
+    for process in processes:
+        process.start()
+    learner.run(actors)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,490 @@
+# environment.py
+
+import math
+import os
+import pickle
+import random
+import numpy as np
+import vision
+from agent import Agent, ACTIONS
+from agent_store import AgentStore
+from maze import Maze
+from q_learning import QLearningAgent
+from tracing import INFO
+
+
+class HideAndSeekEnv:
+    """Render-free hide-and-seek game with a batched, Gymnasium-style API.
+
+    Agents are ordered seekers first, then hiders, each by id. step() takes one
+    action per agent (an index into ACTIONS or the action name) and returns
+    per-agent observation, reward, terminated and truncated arrays. Learning is
+    left entirely to the caller.
+    """
+
+    OBSERVATION_SIZE = 3  # (x, y, angle), same rounding as Agent.get_state()
+
+    def __init__(
+        self, maze_file, cell_size=20, seed=None, max_steps=None, simultaneous=False
+    ):
+        self.maze_file = maze_file
+        self.cell_size = cell_size
+        self.max_steps = max_steps
+        # Two-phase ticks (see resolve_simultaneous) instead of acting in env order
+        self.simultaneous = simultaneous
+        self.maze_object = Maze(seed=seed)
+        self.rng = self.maze_object.rng
+        self.maze = None
+        self.door_positions = []
+        self.line_of_sight = None
+        self.seekers = []
+        self.hiders = []
+        self.agents = []
+        self.store = AgentStore()
+        self.step_count = 0
+
+    @property
+    def n_agents(self):
+        return len(self.agents)
+
+    @property
+    def n_actions(self):
+        return len(ACTIONS)
+
+    def reset(self, seed=None):
+        """Reloads the maze, respawns every agent and returns (observations, info)."""
+        if seed is not None:
+            self.rng.seed(seed)
+        self.maze, self.door_positions = self.maze_object.read_maze(self.maze_file)
+        self.line_of_sight = self.maze_object.line_of_sight(self.maze, self.cell_size)
+
+        self.seekers, self.hiders = [], []
+        for unique_id, agent_type, x, y in self.maze_object.find_spawns(self.maze):
+            body = Agent(x, y, agent_type, self.cell_size, id=unique_id)
+            if agent_type == "seeker":
+                self.seekers.append(body)
+            else:
+                self.hiders.append(body)
+        self.agents = self.seekers + self.hiders
+        # Slot i of the store is env agent i
+        self.store = AgentStore(len(self.agents))
+        for agent in self.agents:
+            self.store.attach(agent)
+        self.step_count = 0
+        return self.get_observations(), self.get_info()
+
+    def opponents(self, agent):
+        return self.hiders if agent.type == "seeker" else self.seekers
+
+    def step(self, actions):
+        """Advances the game by one tick.
+
+        By default agents act in the fixed env order, each seeing the world as
+        left by the agents before it (the same semantics as main1.game_loop).
+        With simultaneous=True every action is judged against the world at the
+        start of the tick, see resolve_simultaneous(). Destroyed agents ignore
+        their action and receive zero reward.
+        Returns (observations, rewards, terminated, truncated, info).
+        """
+        if len(actions) != len(self.agents):
+            raise ValueError(
+                f"Expected {len(self.agents)} actions, got {len(actions)}"
+            )
+        rewards = np.zeros(len(self.agents), dtype=np.float64)
+        actions = [a if isinstance(a, str) else ACTIONS[a] for a in actions]
+
+        if self.simultaneous:
+            live = [i for i, agent in enumerate(self.agents) if not agent.destroyed]
+            self.maze, live_rewards = resolve_simultaneous(
+                self.maze,
+                [self.agents[i] for i in live],
+                [actions[i] for i in live],
+                self.opponents,
+            )
+            for i, reward in zip(live, live_rewards):
+                self.agents[i].total_reward += reward
+                rewards[i] = reward
+        else:
+            for i, agent in enumerate(self.agents):
+                if agent.destroyed:
+                    continue
+                opponents = self.opponents(agent)
+                self.maze = agent.apply_action(actions[i], self.maze, None, opponents)
+                active_others = agent.observe(self.maze, opponents)
+                reward = agent.compute_reward(actions[i], self.maze, active_others)
+                agent.total_reward += reward
+                rewards[i] = reward
+
+        self.step_count += 1
+        terminated = self.store.column("destroyed").copy()
+        if self.hiders and terminated[len(self.seekers) :].all():
+            terminated[:] = True
+        truncated = np.full(
+            len(self.agents),
+            self.max_steps is not None and self.step_count >= self.max_steps,
+            dtype=bool,
+        )
+        return self.get_observations(), rewards, terminated, truncated, self.get_info()
+
+    def get_observations(self):
+        """Returns an (n_agents, OBSERVATION_SIZE) float array of agent states."""
+        return self.store.states()
+
+    def get_info(self):
+        return {
+            "ids": [a.id for a in self.agents],
+            "types": [a.type for a in self.agents],
+            "step": self.step_count,
+        }
+
+    def hiders_in_sight(self):
+        """Ids of the live hiders whose cell a live seeker's cell has line of sight to.
+
+        Cell-level only, ignoring heading and field of view. Computed on demand,
+        so step() does not pay for it.
+        """
+        return [
+            h.id
+            for h in self.hiders
+            if not h.destroyed and self.line_of_sight.seen_by_any(h, self.seekers)
+        ]
+
+    def render(self, screen):
+        """Draws the maze and the live agents onto a pygame surface."""
+        self.maze_object.draw_maze(screen, self.maze, self.cell_size)
+        for agent in self.agents:
+            if not agent.destroyed:
+                agent.draw(screen)
+
+    def clone(self):
+        """Independent copy of the current game, e.g. to branch it for lookahead.
+
+        The maze layout, line-of-sight masks and per-layout caches are shared;
+        the grid rows, agent bodies, store columns and RNG are copied, so
+        stepping either env never affects the other.
+        """
+        twin = object.__new__(HideAndSeekEnv)
+        twin.__dict__.update(self.__dict__)
+        twin.maze_object = object.__new__(Maze)
+        twin.maze_object.__dict__.update(self.maze_object.__dict__)
+        twin.maze_object.rng = twin.rng = random.Random()
+        twin.rng.setstate(self.rng.getstate())
+        twin.maze = [row[:] for row in self.maze]
+        twin.line_of_sight = self.line_of_sight.copy(twin.maze)
+        bodies = {id(agent): agent.clone() for agent in self.agents}
+        twin.seekers = [bodies[id(a)] for a in self.seekers]
+        twin.hiders = [bodies[id(a)] for a in self.hiders]
+        twin.agents = [bodies[id(a)] for a in self.agents]
+        twin.store = self.store.clone(twin.agents)
+        for agent in twin.agents:
+            if agent._vision_grid is self.maze:
+                agent._vision_grid = twin.maze  # Same contents, so the vision arrays still apply
+        return twin
+
+    def snapshot(self):
+        """Captures everything step() can change; restore() puts it back in this env.
+
+        Covers door states, the agent store columns (poses, destroyed flags,
+        rewards), per-agent counters and vision, the RNG state and the step
+        count. Learner Q-tables are not part of the env; see save_state().
+        """
+        cols = self.line_of_sight.cols
+        return {
+            "maze_file": self.maze_file,
+            "ids": [agent.id for agent in self.agents],
+            "doors": [self.maze[door // cols][door % cols] for door in self.line_of_sight.doors],
+            "columns": {name: self.store.column(name).copy() for name in self.store.columns},
+            "bodies": [
+                (
+                    agent.total_distance,
+                    agent.catches,
+                    agent.door_toggles,
+                    dict(agent.reward_breakdown),
+                    agent.vision_hits.copy(),
+                    agent.vision_depths.copy(),
+                    agent.vision_agent_types.copy(),
+                    agent._vision_key,
+                )
+                for agent in self.agents
+            ],
+            "rng": self.rng.getstate(),
+            "step_count": self.step_count,
+        }
+
+    def restore(self, state):
+        """Returns this env to a snapshot() of the same maze, reusing its objects."""
+        if state["maze_file"] != self.maze_file or state["ids"] != [a.id for a in self.agents]:
+            raise ValueError("Snapshot was taken from a different maze or agent set; reset() first")
+        cols = self.line_of_sight.cols
+        doors_changed = False
+        for door, cell in zip(self.line_of_sight.doors, state["doors"]):
+            row = self.maze[door // cols]
+            if row[door % cols] != cell:
+                row[door % cols] = cell
+                doors_changed = True
+        if doors_changed:
+            vision.note_door_toggle()
+        for name, column in state["columns"].items():
+            self.store.column(name)[:] = column
+        for agent, body in zip(self.agents, state["bodies"]):
+            (
+                agent.total_distance,
+                agent.catches,
+                agent.door_toggles,
+                breakdown,
+                hits,
+                depths,
+                agent_types,
+                agent._vision_key,
+            ) = body
+            agent.reward_breakdown = dict(breakdown)
+            agent.vision_hits[:] = hits
+            agent.vision_depths[:] = depths
+            agent.vision_agent_types[:] = agent_types
+            agent._vision_grid = self.maze
+        self.rng.setstate(state["rng"])
+        self.step_count = state["step_count"]
+        return self.get_observations()
+
+    def save_state(self, path, learners=()):
+        """Writes a snapshot to path (atomically) and each learner's Q-table checkpoint.
+
+        To resume, reset() the same maze, load_state(path), and recreate the
+        learners, which read their tables back from their qtable_path files.
+        """
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(self.snapshot(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        for learner in learners:
+            learner.checkpoint()()
+
+    def load_state(self, path):
+        """Restores a snapshot written by save_state(); returns the observations."""
+        with open(path, "rb") as f:
+            return self.restore(pickle.load(f))
+
+
+def resolve_simultaneous(maze, agents, actions, opponents_of):
+    """Resolve phase of a two-phase tick; returns (maze, rewards aligned with agents).
+
+    Every action is judged against the world as it was when the actions were
+    chosen, so the order of `agents` does not change what happens:
+    - Door targets and move checks (walls, closed doors, opponents' current
+      positions) all use the start-of-tick grid and positions.
+    - Each door is toggled at most once: the first agent in `agents` to
+      request it wins, and later requests on the same door fail, as if the
+      door were already toggled (they are not counted in door_toggles).
+      Since targets use the start-of-tick grid, every request on one door
+      asks for the same new state.
+    - Movers whose new positions would overlap an opponent's new (or, for
+      non-movers, unchanged) position stay put; this is repeated until no
+      overlaps remain, reverting every overlapping mover together.
+    - All agents observe the resolved world before any reward is computed.
+      Rewards are then computed in the order given, so when two seekers can
+      catch the same hider the first one in `agents` gets it.
+    """
+    # Door toggles and moves, decided on the start-of-tick snapshot
+    toggles = {}  # (row, col) -> (new state, agent that toggles it)
+    moves = {}
+    for agent, action in zip(agents, actions):
+        if action in ("open", "close"):
+            wanted = "o" if action == "open" else "d"
+            cell = agent.door_target(maze, "d" if action == "open" else "o")
+            if cell is None or cell in toggles:
+                continue
+            toggles[cell] = (wanted, agent)
+        elif action == "move":
+            step = agent.propose_move(maze, opponents_of(agent))
+            if step is not None:
+                moves[agent] = (agent.x + step[0], agent.y + step[1])
+        elif action == "left":
+            agent.rotate_left()
+        elif action == "right":
+            agent.rotate_right()
+
+    while moves:
+        blocked = [
+            agent
+            for agent, (x, y) in moves.items()
+            if any(
+                math.hypot(ox - x, oy - y) < agent.radius + other.radius
+                for other in opponents_of(agent)
+                if not other.destroyed
+                for ox, oy in [moves.get(other, (other.x, other.y))]
+            )
+        ]
+        if not blocked:
+            break
+        for agent in blocked:
+            del moves[agent]
+
+    for cell, (state, agent) in toggles.items():
+        maze[cell[0]][cell[1]] = state
+        agent.door_toggles += 1
+        if agent.tracer.active:
+            agent.tracer.emit(INFO, agent.id, "door_toggle", cell=cell, state=state)
+        vision.note_door_toggle()
+    for agent, (x, y) in moves.items():
+        agent.total_distance += math.hypot(x - agent.x, y - agent.y)
+        agent.x, agent.y = x, y
+
+    active = [agent.observe(maze, opponents_of(agent)) for agent in agents]
+    rewards = [
+        agent.compute_reward(action, maze, active_others)
+        for agent, action, active_others in zip(agents, actions, active)
+    ]
+    return maze, rewards
+
+
+def learner_states(learners, obs, bodies=None):
+    """Each learner's state for its row of `obs`, see QLearningAgent.state_from().
+
+    Observations are the env's rounded (x, y, angle) rows. Learners map them
+    to their own state keys (coarsened poses, tile-coded features, ...);
+    `bodies`, the env agents, give them access to vision as well.
+    """
+    return [
+        learner.state_from(obs[i], bodies[i] if bodies is not None else None)
+        for i, learner in enumerate(learners)
+    ]
+
+
+def decide(learners, obs, alive, executor=None, states=None):
+    """Decide phase: every live learner picks an action index from the same observations.
+
+    states are the learners' states for obs (learner_states() by default).
+    Learners only read them, so with an executor (e.g. a ThreadPoolExecutor)
+    the choices run concurrently. Give each learner its own RNG
+    (make_learners(..., own_rng=True)) so concurrent choices stay reproducible.
+    """
+    if states is None:
+        states = learner_states(learners, obs)
+
+    def choose(i):
+        if not alive[i]:
+            return 0
+        return ACTIONS.index(learners[i].choose_action(states[i]))
+
+    indices = range(len(learners))
+    chosen = executor.map(choose, indices) if executor is not None else map(choose, indices)
+    return np.fromiter(chosen, dtype=np.int64, count=len(learners))
+
+
+def make_learners(env, agent_class=QLearningAgent, qtable_dir=".", own_rng=False):
+    """Creates one learner per env agent, loading its Q-table like Maze.draw_agents.
+
+    With own_rng each learner gets a random.Random seeded from the env RNG
+    instead of sharing it, as concurrent decide() calls need.
+    """
+    learners = []
+    for agent in env.agents:
+        learners.append(
+            agent_class(
+                agent.grid_x,
+                agent.grid_y,
+                env.cell_size,
+                id=agent.id,
+                type=agent.type,
+                qtable_path=f"{qtable_dir}/qtable_agent_{agent.type}_{agent.id}.txt",
+                rng=random.Random(env.rng.random()) if own_rng else env.rng,
+            )
+        )
+    return learners
+
+
+def collect_rollout(env, learners, n_steps, obs=None, executor=None):
+    """Runs up to n_steps ticks with the learners' current policies, without learning.
+
+    Pass obs to continue from the env's current state instead of resetting.
+    An executor is passed on to decide().
+    Stops early when every agent is terminated or the episode is truncated.
+    Returns a dict of stacked arrays: obs and next_obs (T, n, 3), actions,
+    rewards, alive, terminated and truncated (T, n), and greedy (T, n),
+    whether each action was greedy for learners that record it (Q(lambda));
+    plus states and next_states, (T, n) nested lists of the learners' own states.
+    """
+    if obs is None:
+        obs, _ = env.reset()
+    batch = {
+        "obs": [],
+        "actions": [],
+        "rewards": [],
+        "next_obs": [],
+        "alive": [],
+        "terminated": [],
+        "truncated": [],
+        "greedy": [],
+    }
+    states, next_states = [], []
+    current = learner_states(learners, obs, env.agents)
+
+    for _ in range(n_steps):
+        alive = env.store.alive().copy()
+        actions = decide(learners, obs, alive, executor, states=current)
+        greedy = [getattr(learner, "greedy", True) for learner in learners]
+
+        next_obs, rewards, terminated, truncated, _ = env.step(actions)
+        states.append(current)
+        current = learner_states(learners, next_obs, env.agents)
+        next_states.append(current)
+        batch["obs"].append(obs)
+        batch["actions"].append(actions)
+        batch["rewards"].append(rewards)
+        batch["next_obs"].append(next_obs)
+        batch["alive"].append(alive)
+        batch["terminated"].append(terminated)
+        batch["truncated"].append(truncated)
+        batch["greedy"].append(greedy)
+        obs = next_obs
+        if terminated.all() or truncated.any():
+            break
+
+    rollout = {key: np.array(value) for key, value in batch.items()}
+    rollout["states"], rollout["next_states"] = states, next_states
+    return rollout
+
+
+def update_from_rollout(learners, rollout):
+    """Applies the learners' update rule to every live transition of a rollout.
+
+    Uses the rollout's states/next_states when present (collect_rollout()
+    records them); rollouts without them, e.g. received over the network,
+    are mapped with each learner's state_from() and no vision.
+    Learners with eligibility traces get each transition's greedy flag, and
+    their traces are cleared when their episode ends and after the rollout.
+    """
+    steps, n = rollout["actions"].shape
+    states, next_states = rollout.get("states"), rollout.get("next_states")
+    greedy = rollout.get("greedy")
+    ended = np.zeros((steps, n), dtype=bool)
+    for key in ("terminated", "truncated"):
+        if key in rollout:
+            ended |= rollout[key]
+    for t in range(steps):
+        for i in range(n):
+            if not rollout["alive"][t, i] or learners[i].frozen:
+                continue
+            if hasattr(learners[i], "greedy"):
+                learners[i].greedy = True if greedy is None else bool(greedy[t, i])
+            if states is not None:
+                state, next_state = states[t][i], next_states[t][i]
+            else:
+                state = learners[i].state_from(rollout["obs"][t, i])
+                next_state = learners[i].state_from(rollout["next_obs"][t, i])
+            learners[i].learn(
+                state,
+                ACTIONS[rollout["actions"][t, i]],
+                rollout["rewards"][t, i],
+                next_state,
+            )
+            learners[i].total_reward += float(rollout["rewards"][t, i])
+            if ended[t, i]:
+                end_traces(learners[i])
+    for learner in learners:
+        end_traces(learner)
+
+
+def end_traces(learner):
+    """Clears a learner's eligibility traces, if it keeps any."""
+    if hasattr(learner, "reset_traces"):
+        learner.reset_traces()
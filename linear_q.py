@@ -0,0 +1,240 @@
+# linear_q.py
+
+import os
+import numpy as np
+import vision
+from agent import ACTIONS, HEADING_STEP, NUM_HEADINGS
+from q_learning import QLearningAgent
+from tracing import DEBUG
+
+# Integer tags keep feature tuples hashable without string-hash randomization,
+# so the same state maps to the same weight slots in every process.
+POSITION_FEATURE = 0
+VISION_FEATURE = 1
+BIAS_FEATURE = 2
+
+
+class TileCoder:
+    """Hashes (x, y, angle, vision) into a fixed number of active feature indices.
+
+    Position is covered by `num_tilings` offset grids of `tile_cells` x
+    `tile_cells` maze cells, each crossed with the 12 discrete headings. The
+    20 vision rays are compressed into `vision_sectors` sectors, each
+    reporting the nearest hit kind and a coarse depth bin.
+    """
+
+    def __init__(
+        self,
+        cell_size,
+        max_depth,
+        memory_size=2**16,
+        num_tilings=8,
+        tile_cells=2,
+        vision_sectors=4,
+        depth_bins=3,
+    ):
+        self.memory_size = memory_size
+        self.num_tilings = num_tilings
+        self.tile_width = cell_size * tile_cells
+        self.max_depth = max_depth
+        self.vision_sectors = vision_sectors
+        self.depth_bins = depth_bins
+        # Asymmetric offsets (1, 3) spread the tilings better than a diagonal
+        self.offsets = [
+            (
+                t * self.tile_width / num_tilings,
+                (3 * t % num_tilings) * self.tile_width / num_tilings,
+            )
+            for t in range(num_tilings)
+        ]
+
+    @property
+    def num_active(self):
+        return self.num_tilings + self.vision_sectors + 1
+
+    def encode(self, x, y, angle, hits=None, depths=None, agent_types=None, own_type=None):
+        """Returns the tuple of active feature indices for one agent state.
+
+        hits, depths and agent_types are an agent's per-ray vision arrays.
+        """
+        heading = round(angle / HEADING_STEP) % NUM_HEADINGS
+        features = []
+        for tiling, (off_x, off_y) in enumerate(self.offsets):
+            tile_x = int((x + off_x) // self.tile_width)
+            tile_y = int((y + off_y) // self.tile_width)
+            features.append(
+                hash((POSITION_FEATURE, tiling, tile_x, tile_y, heading))
+                % self.memory_size
+            )
+
+        if hits is not None and len(hits):
+            own_code = vision.AGENT_TYPE_CODES.get(own_type)
+            rays_per_sector = max(1, len(hits) // self.vision_sectors)
+            for sector in range(self.vision_sectors):
+                nearest_kind, nearest_depth = 0, self.max_depth
+                rays = slice(sector * rays_per_sector, (sector + 1) * rays_per_sector)
+                sector_depths = depths[rays]
+                if len(sector_depths):
+                    ray = int(sector_depths.argmin())
+                    if sector_depths[ray] < self.max_depth:
+                        nearest_depth = int(sector_depths[ray])
+                        nearest_kind = self._hit_kind(
+                            hits[rays][ray], agent_types[rays][ray], own_code
+                        )
+                depth_bin = min(
+                    self.depth_bins - 1,
+                    int(nearest_depth * self.depth_bins / self.max_depth),
+                )
+                features.append(
+                    hash((VISION_FEATURE, sector, nearest_kind, depth_bin))
+                    % self.memory_size
+                )
+
+        features.append(hash((BIAS_FEATURE,)) % self.memory_size)
+        return tuple(features)
+
+    @staticmethod
+    def _hit_kind(hit, agent_type, own_code):
+        if hit == vision.HIT_AGENT:
+            return 3 if agent_type == own_code else 2
+        if hit == vision.HIT_EMPTY:
+            return 0
+        return 1  # Wall, closed door or maze edge
+
+
+def write_weights(weights_path, weights):
+    """Saves a weight array, renaming a temporary file over weights_path when done."""
+    tmp_path = weights_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, weights)
+    os.replace(tmp_path, weights_path)
+
+
+class LinearQAgent(QLearningAgent):
+    """QLearningAgent with a linear Q-function over tile-coded features.
+
+    All weights live in one (len(ACTIONS), memory_size) array, so memory is
+    fixed however long training runs, and each state generalizes to its
+    neighbours through the shared tiles. States are tuples of active feature
+    indices; weights are saved next to the Q-table path as a .npy file.
+    """
+
+    def __init__(self, x, y, cell_size, *args, memory_size=2**16, **kwargs):
+        self.coder = TileCoder(cell_size, cell_size * 8, memory_size=memory_size)
+        super().__init__(x, y, cell_size, *args, **kwargs)
+        self.weights_path = os.path.splitext(self.qtable_path)[0] + ".npy"
+        self.weights = self.load_weights()
+
+    def load_q_table(self):
+        """The tabular Q-table is unused; weights are loaded by load_weights()."""
+        return {}
+
+    def load_weights(self):
+        weights = np.zeros((len(ACTIONS), self.coder.memory_size), dtype=np.float64)
+        if not os.path.exists(self.weights_path):
+            print(
+                f"Weights file not found for agent {self.id}: {self.weights_path}. Starting fresh."
+            )
+            return weights
+        try:
+            loaded = np.load(self.weights_path)
+            if loaded.shape == weights.shape:
+                weights = loaded.astype(np.float64)
+            else:
+                print(
+                    f"Ignoring weights for agent {self.id} in {self.weights_path}: shape {loaded.shape} != {weights.shape}"
+                )
+        except Exception as e:
+            print(f"Error loading weights for agent {self.id} from {self.weights_path}: {e}")
+        return weights
+
+    def save_q_table(self):
+        """Saves the weight array to the agent's .npy file."""
+        try:
+            write_weights(self.weights_path, self.weights)
+        except Exception as e:
+            print(f"Error saving weights for agent {self.id} to {self.weights_path}: {e}")
+
+    def checkpoint(self):
+        """Copies the weights now and returns a function that saves the copy."""
+        weights, weights_path = self.weights.copy(), self.weights_path
+
+        def write():
+            try:
+                write_weights(weights_path, weights)
+            except Exception as e:
+                print(f"Error saving weights for agent {self.id} to {weights_path}: {e}")
+                return False
+            return True
+
+        return write
+
+    def get_state(self):
+        """Active tile-coded features for the current pose and vision arc."""
+        return self.coder.encode(
+            self.x,
+            self.y,
+            self.angle,
+            self.vision_hits,
+            self.vision_depths,
+            self.vision_agent_types,
+            own_type=self.type,
+        )
+
+    def state_from(self, observation, body=None):
+        """Active features for an env observation row, with body's vision arcs if given."""
+        x, y, angle = observation[:3]
+        if body is None:
+            return self.coder.encode(x, y, angle)
+        return self.coder.encode(
+            x,
+            y,
+            angle,
+            body.vision_hits,
+            body.vision_depths,
+            body.vision_agent_types,
+            own_type=self.type,
+        )
+
+    def q_values(self, state):
+        """Q(s, a) for every action, as one sparse dot product per action."""
+        return self.weights[:, state].sum(axis=1)
+
+    def freeze(self):
+        """Greedy evaluation mode: no exploration and no weight updates."""
+        self.frozen = True
+        self.epsilon = 0.0
+
+    def choose_action(self, state):
+        """Chooses an action using epsilon-greedy strategy over the linear Q-values."""
+        if self.rng.random() < self.epsilon:
+            return self.rng.choice(ACTIONS)  # Explore
+        q_values = self.q_values(state)
+        best = np.flatnonzero(q_values >= q_values.max() - 1e-6)
+        action = ACTIONS[self.rng.choice(best.tolist())]
+        if self.tracer.active:
+            self.tracer.emit(
+                DEBUG, self.id, "exploit", action=action, q_values=q_values.round(1).tolist()
+            )
+        return action
+
+    def learn(self, state, action, reward, next_state):
+        """Semi-gradient Q-learning update of the active weights."""
+        action_index = ACTIONS.index(action)
+        old_q = self.weights[action_index, state].sum()
+        next_max_q = self.q_values(next_state).max()
+        td_error = reward + self.gamma * next_max_q - old_q
+        # Step size is shared between the active features; np.add.at so that
+        # two features hashed to the same index both count
+        np.add.at(self.weights[action_index], list(state), self.alpha / len(state) * td_error)
+
+        if self.tracer.active:
+            self.tracer.emit(
+                DEBUG,
+                self.id,
+                "linear_update",
+                action=action,
+                reward=float(reward),
+                old_q=float(old_q),
+                td_error=float(td_error),
+            )
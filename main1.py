@@ -3,9 +3,26 @@ import sys
 import math
 import random
 import os
+import argparse
+import functools
+import time
 from maze import Maze
 from agent import Agent
+from environment import resolve_simultaneous
 from test_agent import RandomAgent
+from q_learning import QLearningAgent, Schedule
+from q_lambda import QLambdaAgent
+from linear_q import LinearQAgent
+from planning import PrioritizedSweepingPlanner
+from mcts import MCTSSeeker
+from options import OPTIONS, OptionAgent
+from checkpoint import CheckpointWriter
+from metrics import MetricsWriter
+from metrics_server import LiveMetrics, MetricsServer
+from tracing import Tracer, DEBUG, INFO, WARNING
+
+# Update engines selectable with --learner (linear stores weights as .npy)
+LEARNERS = {"q": QLearningAgent, "qlambda": QLambdaAgent, "linear": LinearQAgent}
 
 seeker = []
 
@@ -13,15 +30,166 @@ hider = []
 
 hider_rank = []
 
-reward_log_path = "agent_rewards.txt"
-with open(reward_log_path, "w") as f:
-    f.write("agent_id,type,total_reward,rank_point_hider,hider_rank\n")
+reward_log_path = "agent_rewards.jsonl"
 
 
-def get_maze_file():
-    # Check if a file name is passed via command-line
-    maze_file_name = sys.argv[1] if len(sys.argv) > 1 else "maze3.txt"
-
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hide and Seek Q-learning simulation")
+    parser.add_argument("maze_file", nargs="?", default="maze3.txt")
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed the environment RNG; rounds then end on a step count, not wall-clock time",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        help="End each round after this many ticks (defaults to 60s worth of ticks when --seed is set)",
+    )
+    parser.add_argument(
+        "--learner",
+        choices=sorted(LEARNERS),
+        default="q",
+        help="Q-update engine: one-step Q-learning, Watkins Q(lambda) or linear tile-coded",
+    )
+    parser.add_argument(
+        "--qtable-dir",
+        default=".",
+        help="Directory holding the qtable_agent_<type>_<id> files",
+    )
+    parser.add_argument(
+        "--eval",
+        action="store_true",
+        help="Greedy evaluation: frozen policies, no learning and no Q-table writes",
+    )
+    parser.add_argument(
+        "--epsilon-decay",
+        type=float,
+        default=1.0,
+        help="Per-round decay of epsilon from 0.2 towards 0.01 (1.0 keeps it fixed)",
+    )
+    parser.add_argument(
+        "--alpha-decay",
+        type=float,
+        default=1.0,
+        help="Per-round decay of alpha from 0.1 towards 0.01 (1.0 keeps it fixed)",
+    )
+    parser.add_argument(
+        "--position-step",
+        type=int,
+        default=1,
+        help="Snap agent positions to this many pixels in Q-table states",
+    )
+    parser.add_argument(
+        "--max-states",
+        type=int,
+        default=None,
+        help="Cap each Q-table, evicting least-recently-updated states",
+    )
+    parser.add_argument(
+        "--simultaneous",
+        action="store_true",
+        help="Two-phase ticks: all agents decide on the same world, then moves and doors resolve together",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=10,
+        help="Save Q-tables every N rounds (they are also saved on exit)",
+    )
+    parser.add_argument(
+        "--metrics-every",
+        type=int,
+        default=1000,
+        help="Write a step metrics record every N ticks (0 disables them)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve live JSON metrics on http://127.0.0.1:<port>/metrics",
+    )
+    parser.add_argument(
+        "--trace-agent",
+        type=int,
+        action="append",
+        default=[],
+        help="Trace debug events of this agent id (repeatable) to --trace-file",
+    )
+    parser.add_argument("--trace-file", default="agent_trace.log")
+    parser.add_argument(
+        "--trace-level",
+        choices=["debug", "info", "warning"],
+        default="debug",
+        help="info: catches and door toggles; warning: skipped updates and dropped events",
+    )
+    parser.add_argument(
+        "--trace-sample",
+        type=int,
+        default=1,
+        help="Keep only every Nth trace event",
+    )
+    parser.add_argument(
+        "--planning-steps",
+        type=int,
+        default=0,
+        help="Prioritized-sweeping planning updates after every real step (tabular learners)",
+    )
+    parser.add_argument(
+        "--background-planning",
+        action="store_true",
+        help="Run prioritized-sweeping planning in a background thread per agent",
+    )
+    parser.add_argument(
+        "--mcts",
+        action="store_true",
+        help="Seekers plan every action with Monte-Carlo tree search, using their Q-table as the rollout prior",
+    )
+    parser.add_argument(
+        "--mcts-budget-ms",
+        type=float,
+        default=20,
+        help="Search time per seeker action in milliseconds",
+    )
+    parser.add_argument(
+        "--mcts-iterations",
+        type=int,
+        default=None,
+        help="Fixed search iterations per action instead of a time budget (reproducible with --seed)",
+    )
+    parser.add_argument(
+        "--mcts-depth",
+        type=int,
+        default=30,
+        help="Actions per rollout",
+    )
+    parser.add_argument(
+        "--options",
+        action="store_true",
+        help="Add the temporally extended actions " + ", ".join(OPTIONS) + " (tables in qtable_agent_<type>_<id>_options.txt)",
+    )
+    parser.add_argument(
+        "--action-repeat",
+        type=int,
+        default=1,
+        help="Hold each primitive action for N ticks; vision and learning run only when a choice ends",
+    )
+    args = parser.parse_args()
+    if args.options or args.action_repeat > 1:
+        # Choices span several ticks, which only the tabular learner's SMDP update accounts for
+        if args.learner != "q":
+            parser.error("--options and --action-repeat need --learner q")
+        if args.simultaneous or args.planning_steps or args.background_planning:
+            parser.error("--options and --action-repeat do not combine with --simultaneous or planning")
+        if args.mcts:
+            # MCTSSeeker plans one primitive action per tick and would replace the seekers' OptionAgent
+            parser.error("--options and --action-repeat do not combine with --mcts")
+    return args
+
+
+def get_maze_file(maze_file_name):
     # Check if file exists
     if not os.path.exists(maze_file_name):
         print(f"File '{maze_file_name}' not found in the repo.")
@@ -65,9 +233,21 @@ def create_distance_window():
     return distance_window
 
 
-def game_loop():
-    maze_file = get_maze_file()
+def save_q_tables(seeker, hider, checkpoints):
+    """Snapshots every table and hands the writing to the background checkpoint writer."""
+    # Destroyed hiders are saved too, with their last learned state
+    count = checkpoints.submit(seeker + hider)
+    print(f"💾 Checkpointing {count} Q-tables in the background.")
+
+
+def game_loop(args):
+    maze_file = get_maze_file(args.maze_file)
     ROUND_DURATION_SEC = 60
+    TICKS_PER_SEC = 240
+    # Deterministic mode: round length is measured in ticks, not seconds
+    max_steps = args.max_steps
+    if max_steps is None and args.seed is not None:
+        max_steps = ROUND_DURATION_SEC * TICKS_PER_SEC
     pygame.init()
 
     font = pygame.font.SysFont(None, 36)
@@ -81,27 +261,109 @@ def game_loop():
     combined_window = pygame.display.set_mode((width + 300, height))
     pygame.display.set_caption("Hide and Seek with Distance Monitor")
 
+    epsilon_schedule = Schedule(0.2, 0.01, args.epsilon_decay)
+    alpha_schedule = Schedule(0.1, 0.01, args.alpha_decay)
+    round_index = 0
+    metrics = MetricsWriter(reward_log_path)
+    checkpoints = CheckpointWriter()
+    tracer = None
+    if args.trace_agent:
+        levels = {"debug": DEBUG, "info": INFO, "warning": WARNING}
+        tracer = Tracer(
+            args.trace_file,
+            level=levels[args.trace_level],
+            sample_every=args.trace_sample,
+        )
+
+    live = None
+    if args.metrics_port is not None:
+        live = LiveMetrics()
+        server = MetricsServer(live, args.metrics_port).start()
+        print(f"📡 Live metrics on http://127.0.0.1:{server.port}/metrics")
+
+    # Agents live for the whole run; each round only resets their position and
+    # counters, so Q-tables stay in memory instead of being re-read every round
+    agent_class = LEARNERS[args.learner]
+    if args.options or args.action_repeat > 1:
+        agent_class = functools.partial(
+            OptionAgent, options=OPTIONS if args.options else (), repeat=args.action_repeat
+        )
+    seeker, hider = maze_object.draw_agents(
+        maze,
+        cell_size,
+        agent_class=agent_class,
+        qtable_dir=args.qtable_dir,
+        seeker_class=MCTSSeeker if args.mcts else None,
+    )
+    # Fixed update order (seekers then hiders, each by id) so seeded runs replay identically
+    seeker.sort(key=lambda a: a.id)
+    hider.sort(key=lambda a: a.id)
+    for agent in seeker + hider:
+        # Frozen tables are looked up with the same state keys they were trained with
+        agent.position_step = args.position_step
+        agent.max_states = args.max_states
+        if args.eval:
+            agent.freeze()
+        else:
+            agent.epsilon_schedule = epsilon_schedule
+            agent.alpha_schedule = alpha_schedule
+            if args.learner != "linear" and (
+                args.planning_steps or args.background_planning
+            ):
+                agent.planner = PrioritizedSweepingPlanner(agent)
+                agent.planning_steps = args.planning_steps
+        if tracer is not None and agent.id in args.trace_agent:
+            agent.tracer = tracer
+    for agent in seeker:
+        if args.mcts:
+            agent.search.budget_ms = args.mcts_budget_ms
+            agent.search.iterations = args.mcts_iterations
+            agent.search.rollout_depth = args.mcts_depth
+    if live is not None:
+        live.set_agents(seeker + hider)
+
     while True:  # Infinite round loop
-        # Create agents
-        seeker, hider = maze_object.draw_agents(maze, cell_size)
+        for agent in seeker + hider:
+            agent.reset()
+            if not args.eval:
+                agent.begin_round(round_index)
+            if agent.planner is not None and args.background_planning:
+                agent.planner.start()
         clock = pygame.time.Clock()
 
-        # testing
-        hider[0].view_comments = True
-
         start_ticks = pygame.time.get_ticks()
+        round_start = time.perf_counter()
+        window_start = round_start
+        step_count = 0
         running = True
 
         while running:
+            tick_start = time.perf_counter()
             # Handle events first for better responsiveness
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    for agent in seeker + hider:
+                        if agent.planner is not None:
+                            agent.planner.stop()
+                    # Keep the learning since the last checkpoint
+                    if not args.eval:
+                        save_q_tables(seeker, hider, checkpoints)
+                    checkpoints.close()
+                    print(f"💾 {checkpoints.written} Q-table files written, {checkpoints.failed} failed.")
+                    metrics.close()
+                    if tracer is not None:
+                        tracer.close()
                     pygame.quit()
                     sys.exit()
 
             # Calculate time
-            seconds_passed = (pygame.time.get_ticks() - start_ticks) // 1000
-            seconds_left = max(0, ROUND_DURATION_SEC - seconds_passed)
+            if max_steps is not None:
+                steps_left = max(0, max_steps - step_count)
+                seconds_left = steps_left // TICKS_PER_SEC
+            else:
+                seconds_passed = (pygame.time.get_ticks() - start_ticks) // 1000
+                seconds_left = max(0, ROUND_DURATION_SEC - seconds_passed)
+                round_over = seconds_left <= 0
 
             # Clear and draw everything
             combined_window.fill((0, 0, 0))
@@ -179,62 +441,79 @@ def game_loop():
             pygame.display.flip()
 
             # Step agents
-            for agent in seeker:
-                maze = agent.step(maze, combined_window, hider, door_positions)
-            for random_agent in hider:
-                maze = random_agent.step(maze, combined_window, seeker, door_positions)
+            step_start = time.perf_counter()
+            if args.simultaneous:
+                agents = seeker + hider
+                actions = [agent.get_action() for agent in agents]
+                maze, rewards = resolve_simultaneous(
+                    maze,
+                    agents,
+                    actions,
+                    lambda agent: hider if agent.type == "seeker" else seeker,
+                )
+                for agent, reward in zip(agents, rewards):
+                    agent.update_q_value(reward, agent.get_state())
+            else:
+                for agent in seeker:
+                    maze = agent.step(maze, combined_window, hider, door_positions)
+                for random_agent in hider:
+                    maze = random_agent.step(maze, combined_window, seeker, door_positions)
+            step_count += 1
+            if max_steps is not None:
+                round_over = step_count >= max_steps
+            if live is not None:
+                step_end = time.perf_counter()
+                live.record_tick(
+                    render=step_start - tick_start, step=step_end - step_start
+                )
+
+            if args.metrics_every and step_count % args.metrics_every == 0:
+                now = time.perf_counter()
+                metrics.record(
+                    "step",
+                    round=round_index,
+                    step=step_count,
+                    steps_per_sec=args.metrics_every / max(now - window_start, 1e-9),
+                    alive_hiders=sum(not h.destroyed for h in hider),
+                    seeker_reward=sum(a.total_reward for a in seeker),
+                    hider_reward=sum(a.total_reward for a in hider),
+                )
+                window_start = now
 
             # Control frame rate
             # clock.tick(60)
-            clock.tick(240)
+            clock.tick(TICKS_PER_SEC)
 
-            if seconds_left <= 0 or all(h.destroyed for h in hider):
+            if round_over or all(h.destroyed for h in hider):
                 print("⏰ Round ended.")
-
-                # --- BEGIN ADDED CODE ---
-                # Save Q-tables for all agents
-                print("💾 Saving Q-tables...")
-                save_count = 0
-                for agent in seeker:
-                    try:
-                        agent.save_q_table()
-                        save_count += 1
-                    except Exception as e:
-                        print(f"Error saving Q-table for seeker {agent.id}: {e}")
-
-                for agent in hider:
-                    # Even if destroyed, save its last learned state
-                    try:
-                        agent.save_q_table()
-                        save_count += 1
-                    except Exception as e:
-                        print(f"Error saving Q-table for hider {agent.id}: {e}")
-                print(f"💾 Q-tables saved for {save_count} agents.")
-                # --- END ADDED CODE ---
-
-                # Save rewards (existing code)
-                print("📊 Logging rewards...")
-                with open(reward_log_path, "a") as f:
-                    for a in seeker:
-                        f.write(f"{a.id},{a.type},{a.total_reward}, - , - \n")
-                    sorted_hiders = sorted(
-                        hider, key=lambda x: x.rank_point, reverse=True
-                    )
-
-                    # Assign rank and write
-                    for i, a in enumerate(sorted_hiders):
-                        rank = i + 1  # since highest points gets rank 1
-                        f.write(
-                            f"{a.id},{a.type},{a.total_reward},{a.rank_point},{rank}\n"
-                        )
-                    f.write(
-                        "--------------------------------------------------------------------\n"
-                    )
+                round_end_start = time.perf_counter()
+                for agent in seeker + hider:
+                    if agent.planner is not None:
+                        agent.planner.stop()
+
+                # Periodic checkpoint (evaluation runs never touch the tables)
+                if not args.eval and (round_index + 1) % args.checkpoint_every == 0:
+                    save_q_tables(seeker, hider, checkpoints)
+
+                # Log per-agent round metrics (buffered, written in batches)
+                elapsed = time.perf_counter() - round_start
+                metrics.record_round(
+                    round_index,
+                    seeker,
+                    hider,
+                    steps=step_count,
+                    steps_per_sec=step_count / max(elapsed, 1e-9),
+                )
                 print("📊 Rewards logged.")
+                if live is not None:
+                    live.record_round(seeker + hider)
+                    live.record_phase("round_end", time.perf_counter() - round_end_start)
+                round_index += 1
 
                 break  # End this round and restart loop
 
 
 if __name__ == "__main__":
-    maze_object = Maze()
-    game_loop()
+    args = parse_args()
+    maze_object = Maze(seed=args.seed)
+    game_loop(args)
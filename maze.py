@@ -2,7 +2,11 @@ import pygame
 import sys
 import math
 import random
+import os
 from q_learning import QLearningAgent
+from vision import LineOfSight
+
+MAX_ROOMS = 4  # generate_maze() puts one room in each corner
 
 #def read_maze(filename):
 #     try:
@@ -11,6 +15,27 @@ from q_learning import QLearningAgent
 #     except FileNotFoundError:
 #         return [list("w" * 20)] + [list("w" + " " * 18 + "w") for _ in range(18)] + [list("w" * 20)]
 class Maze:
+    # Shared by every Maze, so envs built per episode (tournament, rollouts) reuse
+    # the wall geometry: (wall/door layout, cell_size) -> LineOfSight
+    _line_of_sight = {}
+    MAX_LINE_OF_SIGHT = 16  # Layouts kept; the oldest is dropped past this
+
+    def __init__(self, seed=None):
+        # Per-environment RNG so seeded runs are reproducible independently of
+        # anything else that touches the global `random` module.
+        self.rng = random.Random(seed)
+
+    def line_of_sight(self, maze, cell_size):
+        """Cell-to-cell visibility for maze; the wall geometry is only computed once per layout."""
+        layout = tuple(''.join('w' if cell == 'w' else 'o' if cell in ('o', 'd') else ' ' for cell in row) for row in maze)
+        table = self._line_of_sight.get((layout, cell_size))
+        if table is None:
+            table = LineOfSight(maze, cell_size)
+            if len(self._line_of_sight) >= self.MAX_LINE_OF_SIGHT:
+                del self._line_of_sight[next(iter(self._line_of_sight))]
+            self._line_of_sight[(layout, cell_size)] = table
+        return table.attach(maze)
+
     def read_maze(self,filename):
         try:
             door_positions = []
@@ -37,6 +62,55 @@ class Maze:
             return [["w"] * 40] + [["w"] + ["1"] * 38 + ["w"] for _ in range(38)] + [["w"] * 40], [] # Default fallback
 
 
+    def generate_maze(self, rooms=2, rows=20, cols=20, seekers=1, hiders=2):
+        """Random maze in the maze-file format: an open '1' region with up to four walled corner rooms.
+
+        Each room gets one open door on an inner wall and is filled with region
+        '2' or '3' (alternating), like the hand-made mazes. Hiders spawn in the
+        rooms (round-robin) and seekers in the open region, so more rooms make a
+        harder maze for the seekers.
+        """
+        if not 0 <= rooms <= MAX_ROOMS:
+            raise ValueError(f"rooms must be between 0 and {MAX_ROOMS}, got {rooms}")
+        maze = [['w'] * cols] + [['w'] + ['1'] * (cols - 2) + ['w'] for _ in range(rows - 2)] + [['w'] * cols]
+        corners = [(False, False), (False, True), (True, True), (True, False)][:rooms]
+        room_cells = []
+        for index, (bottom, right) in enumerate(corners):
+            # Interior sizes leave a gap of open cells between neighbouring rooms
+            height = self.rng.randint(3, (rows - 2) // 2 - 3)
+            width = self.rng.randint(3, (cols - 2) // 2 - 3)
+            place = lambda r, c: (rows - 1 - r if bottom else r, cols - 1 - c if right else c)
+            cells = []
+            for r in range(1, height + 2):
+                for c in range(1, width + 2):
+                    y, x = place(r, c)
+                    if r == height + 1 or c == width + 1:
+                        maze[y][x] = 'w'
+                    else:
+                        maze[y][x] = '2' if index % 2 == 0 else '3'
+                        cells.append((y, x))
+            if self.rng.random() < 0.5:
+                door = place(height + 1, self.rng.randint(1, width))
+            else:
+                door = place(self.rng.randint(1, height), width + 1)
+            maze[door[0]][door[1]] = 'o'
+            room_cells.append(cells)
+
+        open_cells = [(y, x) for y in range(rows) for x in range(cols) if maze[y][x] == '1']
+        for y, x in self.rng.sample(open_cells, seekers):
+            maze[y][x] = 's'
+        for i in range(hiders):
+            cells = room_cells[i % len(room_cells)] if room_cells else open_cells
+            free = [(y, x) for y, x in cells if maze[y][x] not in ('s', 'h')]
+            y, x = self.rng.choice(free)
+            maze[y][x] = 'h'
+        return maze
+
+    def write_maze(self, filename, maze):
+        """Writes a grid in the format read by read_maze()."""
+        with open(filename, 'w') as f:
+            f.write('\n'.join(''.join(row) for row in maze) + '\n')
+
     def draw_maze(self,screen, maze, cell_size):
         for y, row in enumerate(maze):
             for x, cell in enumerate(row):
@@ -47,33 +121,38 @@ class Maze:
 
     def get_free_position(self,maze):
         free_positions = [(x, y) for y in range(len(maze)) for x in range(len(maze[0])) if maze[y][x] != 'w']
-        return random.choice(free_positions)
+        return self.rng.choice(free_positions)
 
-    def draw_agents(self,maze, cell_size):
-        seeker = []
-        hider = []
+    def find_spawns(self, maze):
+        """Returns (id, type, x, y) for every 's'/'h' cell, ids assigned in scan order."""
+        spawns = []
         unique_id = 0
-
         for y, row in enumerate(maze):
             for x, cell in enumerate(row):
                 if cell == 's':
                     unique_id += 1
-                    agent = QLearningAgent(
-                        x, y, cell_size,
-                        id=unique_id,
-                        type='seeker',
-                        qtable_path=f"qtable_agent_seeker_{unique_id}.txt"
-                    )
-                    seeker.append(agent)
-
+                    spawns.append((unique_id, 'seeker', x, y))
                 elif cell == 'h':
                     unique_id += 1
-                    agent = QLearningAgent(
-                        x, y, cell_size,
-                        id=unique_id,
-                        type='hider',
-                        qtable_path=f"qtable_agent_hider_{unique_id}.txt"
-                    )
-                    hider.append(agent)
-
-        return seeker, hider
\ No newline at end of file
+                    spawns.append((unique_id, 'hider', x, y))
+        return spawns
+
+    def draw_agents(self,maze, cell_size, agent_class=QLearningAgent, qtable_dir=".", seeker_class=None):
+        seeker = []
+        hider = []
+
+        for unique_id, agent_type, x, y in self.find_spawns(maze):
+            cls = seeker_class if agent_type == 'seeker' and seeker_class is not None else agent_class
+            agent = cls(
+                x, y, cell_size,
+                id=unique_id,
+                type=agent_type,
+                qtable_path=os.path.join(qtable_dir, f"qtable_agent_{agent_type}_{unique_id}.txt"),
+                rng=self.rng
+            )
+            if agent_type == 'seeker':
+                seeker.append(agent)
+            else:
+                hider.append(agent)
+
+        return seeker, hider
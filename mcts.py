@@ -0,0 +1,305 @@
+# mcts.py
+
+import math
+import random
+import time
+from agent import ACTIONS, Agent, direction
+from maze import Maze
+from q_learning import QLearningAgent, coarsen_state
+
+DOOR_OPEN_BONUS = 500  # Seeker reward for opening a door, as in Agent.compute_reward
+
+
+class Target:
+    """A hider as the forward model sees it: a circle that does not move."""
+
+    __slots__ = ("x", "y", "radius")
+
+    def __init__(self, x, y, radius):
+        self.x = x
+        self.y = y
+        self.radius = radius
+
+
+class ForwardModel:
+    """Render-free simulation of one seeker, for planning.
+
+    Moves and doors go through the seeker's own propose_move() and
+    door_target() on a private copy of the grid, so they behave exactly as
+    in the game. Everything else is approximated to stay cheap:
+
+    - hiders stay where they are when the search starts;
+    - a hider is seen when its cell is in line of sight (LineOfSight, not
+      ray casting) and its center is within the field of view and range;
+    - the reward keeps the seeker's terms that depend on the action: the
+      proximity bonus for a hider in view, the catch bonus (which removes
+      the hider), the room interaction bonus, DOOR_OPEN_BONUS when a door
+      actually opens and the wall penalty when a move is blocked. The
+      exploration term is left out, it barely changes over a search horizon.
+
+    state() and restore() save and reset the whole simulated world, which
+    is a small tuple.
+    """
+
+    def __init__(self, seeker, grid, hiders, sight):
+        self.body = Agent(0, 0, seeker.type, seeker.cell_size, id=seeker.id)
+        self.grid = [row[:] for row in grid]
+        self.sight = sight.copy(self.grid)
+        self.doors = [divmod(cell, sight.cols) for cell in sight.doors]
+        self.door_cells = tuple(self.grid[row][col] for row, col in self.doors)
+        self.targets = [Target(h.x, h.y, h.radius) for h in hiders if not getattr(h, "destroyed", False)]
+        self.target_cells = [self.sight.cell(t.x, t.y) for t in self.targets]
+        self.caught = 0  # Bitmask over targets
+        body = self.body
+        self.cos_half_fov = math.cos(body.half_fov)
+        self.catch_distance = body.VISION_CATCH_THRESHOLD
+        self.root = (seeker.x, seeker.y, seeker.angle, self.door_cells, 0)
+        self.restore(self.root)
+
+    def state(self):
+        body = self.body
+        return (body.x, body.y, body.angle, self.door_cells, self.caught)
+
+    def restore(self, state):
+        body = self.body
+        body.x, body.y, body.angle, door_cells, self.caught = state
+        if door_cells != self.door_cells:
+            for (row, col), cell in zip(self.doors, door_cells):
+                self.grid[row][col] = cell
+            self.door_cells = door_cells
+            self.sight.door_version = None  # Re-read the doors on the next lookup
+
+    @property
+    def done(self):
+        return self.caught == (1 << len(self.targets)) - 1
+
+    def live_targets(self):
+        return [t for i, t in enumerate(self.targets) if not self.caught >> i & 1]
+
+    def step(self, action):
+        """Applies one action and returns the seeker's (approximate) reward."""
+        body, reward = self.body, 0.0
+        if action == "move":
+            step = body.propose_move(self.grid, self.live_targets())
+            if step is None:
+                reward -= body.WALL_PENALTY
+            else:
+                body.x += step[0]
+                body.y += step[1]
+        elif action == "left":
+            body.rotate_left()
+        elif action == "right":
+            body.rotate_right()
+        else:
+            target = body.door_target(self.grid, "d" if action == "open" else "o")
+            if target is not None:
+                self.toggle(target)
+                if action == "open":
+                    reward += DOOR_OPEN_BONUS
+        return reward + self.contact()
+
+    def toggle(self, target):
+        row, col = target
+        self.grid[row][col] = "o" if self.grid[row][col] == "d" else "d"
+        self.door_cells = tuple(self.grid[r][c] for r, c in self.doors)
+        self.sight.door_version = None
+
+    def contact(self):
+        """Sighting, catch and interaction rewards against the live targets."""
+        body, sight = self.body, self.sight
+        cos_a, sin_a = direction(body.angle)
+        visible = sight.visible_from(sight.cell(body.x, body.y))
+        my_region = body.get_current_region(self.grid)
+        in_room = my_region not in (None, "w", "o", "d", "h", "s")
+        reward, nearest, nearest_depth = 0.0, None, body.max_depth
+        for i, t in enumerate(self.targets):
+            if self.caught >> i & 1:
+                continue
+            rel_x, rel_y = t.x - body.x, t.y - body.y
+            dist = math.hypot(rel_x, rel_y)
+            if in_room and body.get_agent_region(self.grid, t) == my_region:
+                reward += 50 if dist < 200 else 10 if dist < 500 else 0
+            depth = dist - t.radius  # Where a ray would first touch the hider
+            if depth >= nearest_depth:
+                continue
+            if rel_x * cos_a + rel_y * sin_a < dist * self.cos_half_fov:
+                continue  # Outside the field of view
+            if visible >> self.target_cells[i] & 1:
+                nearest, nearest_depth = i, depth
+        if nearest is None:
+            return reward
+        reward += body.VISION_PROXIMITY_MAX_BONUS * math.exp(
+            -max(nearest_depth, 0) / body.VISION_PROXIMITY_DECAY_RATE
+        )
+        if nearest_depth < self.catch_distance and nearest_depth + self.targets[nearest].radius < self.catch_distance * 1.1:
+            self.caught |= 1 << nearest
+            reward += body.CATCH_BONUS
+        return reward
+
+
+class Node:
+    __slots__ = ("state", "action", "reward", "children", "visits", "total")
+
+    def __init__(self, state, action=None, reward=0.0):
+        self.state = state
+        self.action = action
+        self.reward = reward  # Reward of the action leading here
+        self.children = []
+        self.visits = 0
+        self.total = 0.0  # Sum of the returns from taking `action`, this reward included
+
+
+class MCTS:
+    """UCT search over ACTIONS on a ForwardModel.
+
+    Each iteration descends the tree by UCB1 on min/max-normalized values,
+    expands one untried action, then plays a rollout of rollout_depth
+    actions chosen epsilon-greedily from a Q-table (the prior) and random
+    in states it does not know. Search stops after `iterations` iterations
+    if given, else when `budget_ms` is used up, and returns the most
+    visited root action, or None when the root is terminal (nothing to catch).
+    """
+
+    def __init__(
+        self, budget_ms=20, iterations=None, tree_depth=20, rollout_depth=30,
+        exploration=1.0, rollout_epsilon=0.25, gamma=0.9, seed=None,
+    ):
+        self.budget_ms = budget_ms
+        self.iterations = iterations
+        self.tree_depth = tree_depth
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+        self.rollout_epsilon = rollout_epsilon
+        self.gamma = gamma
+        self.rng = random.Random(seed)
+        self.last_iterations = 0  # Iterations run by the last search()
+
+    def search(self, model, prior=None, state_key=None):
+        """Best root action for the model's current state.
+
+        prior maps state_key((x, y, angle)) to {action: Q}; the key
+        defaults to the rounded pose, as in Agent.get_state().
+        """
+        root = Node(model.state())
+        bounds = [math.inf, -math.inf]
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        iteration = 0
+        while True:
+            if self.iterations is not None:
+                if iteration >= self.iterations:
+                    break
+            elif iteration and time.perf_counter() >= deadline:
+                break
+            iteration += 1
+            self._iterate(root, model, prior, state_key, bounds)
+        model.restore(root.state)
+        self.last_iterations = iteration
+        if not root.children:
+            return None
+        best = max(root.children, key=lambda child: child.visits)
+        return best.action
+
+    def _iterate(self, root, model, prior, state_key, bounds):
+        node, path = root, []
+        while len(node.children) == len(ACTIONS) and len(path) < self.tree_depth:
+            node = self._select(node, bounds)
+            path.append(node)
+        model.restore(node.state)
+        if len(path) < self.tree_depth and not model.done:
+            action = ACTIONS[len(node.children)]
+            reward = model.step(action)
+            child = Node(model.state(), action, reward)
+            node.children.append(child)
+            path.append(child)
+        value = self._rollout(model, prior, state_key)
+        root.visits += 1
+        for node in reversed(path):
+            value = node.reward + self.gamma * value
+            node.visits += 1
+            node.total += value
+            mean = node.total / node.visits
+            bounds[0] = min(bounds[0], mean)
+            bounds[1] = max(bounds[1], mean)
+
+    def _select(self, node, bounds):
+        low, high = bounds
+        scale = high - low if high > low else 1.0
+        log_visits = math.log(node.visits)
+        best, best_score = None, -math.inf
+        for child in node.children:
+            score = (child.total / child.visits - low) / scale + self.exploration * math.sqrt(
+                log_visits / child.visits
+            )
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def _rollout(self, model, prior, state_key):
+        body, rng = model.body, self.rng
+        value, discount = 0.0, 1.0
+        for _ in range(self.rollout_depth):
+            if model.done:
+                break
+            action = None
+            if prior and rng.random() >= self.rollout_epsilon:
+                state = (round(body.x), round(body.y), round(body.angle))
+                q_values = prior.get(state_key(state) if state_key else state)
+                if q_values:
+                    max_q = max(q_values.values())
+                    action = rng.choice([a for a, q in q_values.items() if q >= max_q - 1e-6])
+            if action is None:
+                action = rng.choice(ACTIONS)
+            value += discount * model.step(action)
+            discount *= self.gamma
+        return value
+
+
+class MCTSSeeker(QLearningAgent):
+    """QLearningAgent that picks each action by MCTS on a ForwardModel.
+
+    The Q-table keeps learning from the real transitions (Q-learning is
+    off-policy), and it is the rollout prior, so planning gets better as
+    the table does. Search settings live in self.search (an MCTS). Before
+    the agent has observed the world, and when no hider is left to find, it
+    falls back to the Q-table policy.
+    """
+
+    def __init__(self, x, y, cell_size, *args, **kwargs):
+        super().__init__(x, y, cell_size, *args, **kwargs)
+        self.search = MCTS(gamma=self.gamma, seed=self.rng.random())
+        self.world = None  # (grid, other agents) seen by the last observe()
+        self.maze_object = Maze()  # Only for its shared line-of-sight tables
+        self.sight = None
+
+    def observe(self, maze, other_agents):
+        self.world = (maze, other_agents)
+        return super().observe(maze, other_agents)
+
+    def plan_state(self, state):
+        """Q-table key of a rounded (x, y, angle) pose, as get_state() builds it."""
+        if self.position_step != 1 or self.angle_step != 1:
+            return coarsen_state(state, self.position_step, self.angle_step)
+        return state
+
+    def choose_action(self, state):
+        """Searches from the last observed world; the Q-table policy until there is one."""
+        if self.world is None:
+            return super().choose_action(state)
+        maze, other_agents = self.world
+        hiders = [a for a in other_agents if a.type == "hider" and not getattr(a, "destroyed", False)]
+        if not hiders:
+            return super().choose_action(state)
+        if self.sight is None or self.sight.grid is not maze:
+            self.sight = self.maze_object.line_of_sight(maze, self.cell_size)
+        self.sight.sync()  # The model copies the door state, so bring it up to date first
+        model = ForwardModel(self, maze, hiders, self.sight)
+        action = self.search.search(model, self.q_table, self.plan_state)
+        if action is None:
+            return super().choose_action(state)
+        if not self.frozen and state not in self.q_table:
+            self.add_state(state)
+        return action
+
+    def reset(self):
+        super().reset()
+        self.world = None
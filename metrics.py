@@ -0,0 +1,191 @@
+# metrics.py
+
+import json
+import math
+import sys
+from agent import REWARD_COMPONENTS
+
+# Every record has "kind" plus the fields listed here, always in this order,
+# so the log can be loaded straight into a columnar frame.
+ROUND_FIELDS = (
+    ["round", "agent_id", "type", "total_reward"]
+    + [f"reward_{c}" for c in REWARD_COMPONENTS]
+    + [
+        "catches",
+        "door_toggles",
+        "states_created",
+        "rank_point",
+        "hider_rank",
+        "caught",
+        "steps",
+        "steps_per_sec",
+    ]
+)
+STEP_FIELDS = [
+    "round",
+    "step",
+    "steps_per_sec",
+    "alive_hiders",
+    "seeker_reward",
+    "hider_reward",
+]
+MATCH_FIELDS = [
+    "maze",
+    "seeker",
+    "hider",
+    "seed",
+    "steps",
+    "catch_rate",
+    "survival_steps",
+    "hider_rank_point",
+    "seeker_reward",
+    "hider_reward",
+]
+
+
+def round_records(round_index, seekers, hiders, steps, steps_per_sec):
+    """Builds one "round" record per agent from the agents' per-round counters."""
+    ranks = {
+        a.id: i + 1
+        for i, a in enumerate(sorted(hiders, key=lambda x: x.rank_point, reverse=True))
+    }
+    records = []
+    for agent in seekers + hiders:
+        record = {
+            "round": round_index,
+            "agent_id": agent.id,
+            "type": agent.type,
+            "total_reward": float(agent.total_reward),
+        }
+        for component in REWARD_COMPONENTS:
+            record[f"reward_{component}"] = float(agent.reward_breakdown[component])
+        record.update(
+            catches=agent.catches,
+            door_toggles=agent.door_toggles,
+            states_created=getattr(agent, "states_created", 0),
+            rank_point=agent.rank_point if agent.type == "hider" else None,
+            hider_rank=ranks.get(agent.id),
+            caught=bool(agent.destroyed),
+            steps=steps,
+            steps_per_sec=steps_per_sec,
+        )
+        records.append(record)
+    return records
+
+
+class MetricsWriter:
+    """Buffered writer of typed metric records as line-delimited JSON.
+
+    Records are collected in memory and written `batch_size` at a time, so a
+    long run costs one write per batch instead of one file open per round.
+    """
+
+    FIELDS = {"round": ROUND_FIELDS, "step": STEP_FIELDS, "match": MATCH_FIELDS}
+
+    def __init__(self, path, batch_size=256, append=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.buffer = []
+        self.file = open(path, "a" if append else "w")
+
+    def record(self, kind, **fields):
+        """Queues one record; fields must match the schema for kind."""
+        schema = self.FIELDS[kind]
+        if fields.keys() != set(schema):
+            raise ValueError(
+                f"{kind} record fields {sorted(fields)} do not match schema {schema}"
+            )
+        row = {"kind": kind}
+        for name in schema:
+            row[name] = fields[name]
+        self.buffer.append(json.dumps(row))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def record_round(self, round_index, seekers, hiders, steps, steps_per_sec):
+        for fields in round_records(round_index, seekers, hiders, steps, steps_per_sec):
+            self.record("round", **fields)
+
+    def flush(self):
+        if self.buffer:
+            self.file.write("\n".join(self.buffer) + "\n")
+            self.file.flush()
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class RunningStat:
+    """Count, mean, variance (Welford), min and max of a stream of numbers."""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def ci95(self):
+        """Half-width of a normal-approximation 95% confidence interval of the mean."""
+        return 1.96 * self.std / math.sqrt(self.count) if self.count > 1 else 0.0
+
+
+def summarize(path):
+    """Streams a metrics log and returns {(kind, group, field): RunningStat}.
+
+    Round records are grouped by agent type, step records under "all". Only
+    one line is held in memory at a time, so the log can be arbitrarily long.
+    """
+    stats = {}
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            kind = row.pop("kind")
+            group = row.get("type", "all")
+            for field, value in row.items():
+                if field in ("round", "agent_id", "step", "type", "seed"):
+                    continue
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    key = (kind, group, field)
+                    if key not in stats:
+                        stats[key] = RunningStat()
+                    stats[key].add(value)
+    return stats
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python metrics.py <metrics.jsonl>")
+        sys.exit(1)
+    stats = summarize(sys.argv[1])
+    print(f"{'kind':<6} {'group':<7} {'field':<20} {'count':>9} {'mean':>12} {'std':>12} {'min':>12} {'max':>12}")
+    for (kind, group, field), stat in sorted(stats.items()):
+        print(
+            f"{kind:<6} {group:<7} {field:<20} {stat.count:>9} {stat.mean:>12.2f} {stat.std:>12.2f} {stat.min:>12.2f} {stat.max:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
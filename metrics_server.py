@@ -0,0 +1,127 @@
+# metrics_server.py
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LiveMetrics:
+    """Thread-safe snapshot of a running training job, served by MetricsServer.
+
+    The game loop pushes tick and round updates; HTTP requests read a JSON
+    snapshot. Phase timings and the step rate are exponential moving averages,
+    so they follow the current speed rather than the whole-run average. The
+    step rate is measured from one record_tick() call to the next, so it
+    includes the frame-rate wait and everything else the loop does per tick.
+    """
+
+    def __init__(self, smoothing=0.05):
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.total_steps = 0
+        self.rounds_completed = 0
+        self.tick_seconds = None  # EWMA of wall time from one tick to the next
+        self.last_tick = None  # perf_counter() of the last record_tick(), None at round starts
+        self.phase_seconds = {}  # phase -> EWMA seconds
+        self.reward_sums = {}  # agent type -> sum of per-round total rewards
+        self.reward_counts = {}
+        self.agents = []
+
+    def _ewma(self, old, new):
+        return new if old is None else old + self.smoothing * (new - old)
+
+    def set_agents(self, agents):
+        with self.lock:
+            self.agents = list(agents)
+
+    def record_tick(self, **phases):
+        """Records the duration in seconds of each named phase of one tick."""
+        now = time.perf_counter()
+        with self.lock:
+            self.total_steps += 1
+            for phase, seconds in phases.items():
+                self.phase_seconds[phase] = self._ewma(
+                    self.phase_seconds.get(phase), seconds
+                )
+            if self.last_tick is not None:
+                self.tick_seconds = self._ewma(self.tick_seconds, now - self.last_tick)
+            self.last_tick = now
+
+    def record_phase(self, phase, seconds):
+        """Records a phase that does not run every tick (e.g. round-end saving)."""
+        with self.lock:
+            self.phase_seconds[phase] = self._ewma(self.phase_seconds.get(phase), seconds)
+
+    def record_round(self, agents):
+        with self.lock:
+            self.rounds_completed += 1
+            self.last_tick = None  # Round-end work is not a tick
+            for agent in agents:
+                self.reward_sums[agent.type] = (
+                    self.reward_sums.get(agent.type, 0.0) + agent.total_reward
+                )
+                self.reward_counts[agent.type] = self.reward_counts.get(agent.type, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "uptime_sec": time.time() - self.started,
+                "total_steps": self.total_steps,
+                "steps_per_sec": 1.0 / self.tick_seconds if self.tick_seconds else 0.0,
+                "rounds_completed": self.rounds_completed,
+                "avg_round_reward": {
+                    t: self.reward_sums[t] / self.reward_counts[t]
+                    for t in self.reward_sums
+                },
+                "qtable_sizes": {
+                    f"{a.type}_{a.id}": len(getattr(a, "q_table", {}))
+                    for a in self.agents
+                },
+                "phase_ms": {p: s * 1000.0 for p, s in self.phase_seconds.items()},
+            }
+
+
+class MetricsServer:
+    """Serves LiveMetrics.snapshot() as JSON on GET /metrics from a daemon thread.
+
+    Binds to localhost by default so several headless jobs on one box can be
+    polled (one port each) without exposing them to the network.
+    """
+
+    def __init__(self, live, port, host="127.0.0.1"):
+        self.live = live
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.rstrip("/") not in ("", "/metrics"):
+                    handler.send_error(404)
+                    return
+                body = json.dumps(live.snapshot()).encode()
+                handler.send_response(200)
+                handler.send_header("Content-Type", "application/json")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass  # Keep request logs out of the training output
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, name="metrics-server", daemon=True
+        )
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
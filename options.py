@@ -0,0 +1,220 @@
+# options.py
+
+import math
+import os
+from agent import ACTIONS, HEADING_STEP, NUM_HEADINGS
+from q_learning import QLearningAgent, read_q_table
+from tracing import DEBUG
+
+# Temporally extended actions, chosen and learned alongside ACTIONS
+OPTIONS = ["cell", "face_door", "through_door"]
+MAX_OPTION_TICKS = 60  # Any option is cut off after this many ticks
+
+
+# Each option is a generator of primitive actions. It is resumed after its
+# last action was applied, so it can look at the result before yielding the
+# next one; returning ends the option.
+
+def repeat_action(agent, action, times):
+    """One primitive action for `times` ticks; a blocked move ends it early."""
+    for _ in range(times):
+        before = (agent.x, agent.y)
+        yield action
+        if action == "move" and (agent.x, agent.y) == before:
+            return
+
+
+def advance_cell(agent):
+    """Moves forward one cell length."""
+    yield from repeat_action(agent, "move", max(1, round(agent.cell_size / agent.move_step)))
+
+
+def nearest_door(agent, maze):
+    """(row, col) of the door cell, open or closed, closest to the agent, or None."""
+    best, best_dist_sq = None, math.inf
+    for row, cells in enumerate(maze):
+        for col, cell in enumerate(cells):
+            if cell == "o" or cell == "d":
+                dist_sq = ((col + 0.5) * agent.cell_size - agent.x) ** 2 + ((row + 0.5) * agent.cell_size - agent.y) ** 2
+                if dist_sq < best_dist_sq:
+                    best, best_dist_sq = (row, col), dist_sq
+    return best
+
+
+def turn_towards(agent, row, col):
+    """Turns, the short way round, to the heading closest to the direction of a cell's center."""
+    angle = math.degrees(math.atan2((row + 0.5) * agent.cell_size - agent.y, (col + 0.5) * agent.cell_size - agent.x))
+    target = round(angle / HEADING_STEP) % NUM_HEADINGS
+    while agent.heading != target:
+        yield "right" if (target - agent.heading) % NUM_HEADINGS <= NUM_HEADINGS // 2 else "left"
+
+
+def face_door(agent, maze):
+    """Turns to face the nearest door; if it already does, steps towards it once."""
+    door = nearest_door(agent, maze)
+    turned = False
+    if door is not None:
+        for action in turn_towards(agent, *door):
+            turned = True
+            yield action
+    if not turned:
+        yield "move"
+
+
+def through_door(agent, maze):
+    """Faces the nearest door, opens it if closed and walks until out the other side."""
+    door = nearest_door(agent, maze)
+    if door is None:
+        yield "move"
+        return
+    yield from turn_towards(agent, *door)
+    entered = False
+    while True:
+        if agent.door_target(maze, "d") is not None:
+            yield "open"
+        before = (agent.x, agent.y)
+        yield "move"
+        if (agent.x, agent.y) == before:
+            return
+        inside = (int(agent.y // agent.cell_size), int(agent.x // agent.cell_size)) == door
+        if entered and not inside:
+            return
+        entered = entered or inside
+
+
+class OptionAgent(QLearningAgent):
+    """QLearningAgent that only decides at the start of options and repeated actions.
+
+    Its choices are ACTIONS, each held for `repeat` ticks (frame skip), plus
+    `options` (see OPTIONS). A choice runs one primitive action per tick
+    until it ends, after MAX_OPTION_TICKS at most, or as soon as an opponent
+    comes within catch range. In between, ticks skip the vision update and
+    the Q-update: their rewards are computed against the vision of the last
+    decision point and summed with discounting. Only at the end does the
+    agent observe and learn, with the SMDP Q-learning update for a choice
+    that took k ticks:
+
+        Q(s, o) += alpha * (r_1 + gamma r_2 + ... + gamma^(k-1) r_k + gamma^k max Q(s', .) - Q(s, o))
+
+    Tables with options are kept in <qtable>_options.txt. The first run
+    starts from the primitive table, whose values are on the same scale.
+    """
+
+    def __init__(self, x, y, cell_size, *args, options=OPTIONS, repeat=1, **kwargs):
+        self.actions = ACTIONS + list(options)
+        self.repeat = repeat
+        super().__init__(x, y, cell_size, *args, **kwargs)
+        self.option = None  # Generator of the current choice's primitive actions
+        self.next_primitive = None
+        self.option_ticks = 0
+        self.option_return = 0.0
+        self.decisions = 0
+
+    def load_q_table(self):
+        """Loads the table and adds the option columns to rows that lack them."""
+        primitive_path = self.qtable_path
+        if self.actions != ACTIONS:
+            self.qtable_path = os.path.splitext(primitive_path)[0] + "_options.txt"
+        path = self.qtable_path if os.path.exists(self.qtable_path) else primitive_path
+        if not os.path.exists(path):
+            print(f"Q-table file not found for agent {self.id}: {self.qtable_path}. Starting fresh.")
+            return {}
+        q_table = {}
+        try:
+            q_table, self.visits = read_q_table(path)
+        except Exception as e:
+            print(f"Error loading Q-table for agent {self.id} from {path}: {e}")
+        for row in q_table.values():
+            for action in self.actions:
+                row.setdefault(action, 0.0)
+        print(f"Loaded Q-table for agent {self.id} from {path} with {len(q_table)} states.")
+        return q_table
+
+    def reset(self):
+        super().reset()
+        self.option = None
+        self.next_primitive = None
+
+    def start_option(self, choice, maze):
+        """Generator of the primitive actions that carry out a choice."""
+        if choice == "cell":
+            return advance_cell(self)
+        if choice == "face_door":
+            return face_door(self, maze)
+        if choice == "through_door":
+            return through_door(self, maze)
+        return repeat_action(self, choice, self.repeat)
+
+    def opponent_in_reach(self, other_agents):
+        """True if a live opponent is close enough for a catch to be decided."""
+        reach_sq = (self.VISION_CATCH_THRESHOLD * 1.1) ** 2
+        return any(
+            other.type != self.type
+            and not getattr(other, "destroyed", False)
+            and (other.x - self.x) ** 2 + (other.y - self.y) ** 2 < reach_sq
+            for other in other_agents
+        )
+
+    def step(self, maze, screen, other_agents, door_positions):
+        """One tick: a new choice at decision points, otherwise the current one's next action."""
+        if self.option is None:
+            choice = self.get_action()
+            self.option = self.start_option(choice, maze)
+            self.option_ticks, self.option_return = 0, 0.0
+            self.decisions += 1
+            primitive = next(self.option)
+        else:
+            primitive = self.next_primitive
+
+        maze = self.apply_action(primitive, maze, screen, other_agents)
+        discount = self.gamma**self.option_ticks
+        self.option_ticks += 1
+        self.next_primitive = next(self.option, None)
+        done = (
+            self.next_primitive is None
+            or self.option_ticks >= MAX_OPTION_TICKS
+            or self.opponent_in_reach(other_agents)
+        )
+
+        if done:
+            active_others = self.observe(maze, other_agents)
+        else:
+            active_others = [
+                a for a in other_agents if a is not self and not getattr(a, "destroyed", False)
+            ]
+        reward = self.compute_reward(primitive, maze, active_others)
+        self.option_return += discount * reward
+        self.total_reward += reward
+
+        if done:
+            # update_q_value() counts its reward into total_reward; the ticks already were
+            self.total_reward -= self.option_return
+            self.update_q_value(self.option_return, self.get_state())
+            self.option = None
+            self.next_primitive = None
+        return maze
+
+    def learn(self, state, action, reward, next_state):
+        """SMDP Q-learning update: reward is the choice's discounted return over option_ticks ticks."""
+        if state not in self.q_table:
+            self.add_state(state)
+        if next_state not in self.q_table:
+            self.add_state(next_state)
+        old_q = self.q_table[state].get(action, 0.0)
+        next_max_q = max(self.q_table[next_state].values(), default=0.0)
+        new_q = old_q + self.alpha * (reward + self.gamma**self.option_ticks * next_max_q - old_q)
+        self.q_table[state][action] = new_q
+
+        if self.tracer.active:
+            self.tracer.emit(
+                DEBUG,
+                self.id,
+                "smdp_update",
+                state=state,
+                action=action,
+                ticks=self.option_ticks,
+                reward=reward,
+                next_state=next_state,
+                old_q=old_q,
+                new_q=new_q,
+            )
@@ -0,0 +1,120 @@
+# planning.py
+
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+
+
+class PrioritizedSweepingPlanner:
+    """Dyna-Q planner with prioritized sweeping over a QLearningAgent's Q-table.
+
+    Every real transition is stored in a learned model ((state, action) ->
+    (reward, next_state), last observation wins) and queued by the size of its
+    TD error. Planning pops the most urgent pair, replays it against the model
+    and queues its predecessors, so one expensive real step (vision + collision)
+    is followed by many cheap simulated updates. Planning can run inline via
+    plan(n) or in a background thread via start()/stop().
+
+    Only tabular agents are supported; the model keys are Q-table states.
+    """
+
+    def __init__(self, agent, theta=1.0, max_model_size=200000, batch_size=50):
+        self.agent = agent
+        self.theta = theta  # Minimum |TD error| worth queueing
+        self.max_model_size = max_model_size
+        self.batch_size = batch_size  # Updates per lock hold in the background thread
+        self.model = {}  # (state, action) -> (reward, next_state)
+        self.predecessors = defaultdict(set)  # next_state -> {(state, action)}
+        self.queue = []  # Heap of (-priority, tie_breaker, state, action)
+        self.counter = itertools.count()
+        # Guards the Q-table as well as the model, shared with the agent's real updates
+        self.lock = threading.Lock()
+        self.planning_updates = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _td_error(self, state, action, reward, next_state):
+        q_table = self.agent.q_table
+        next_max_q = max(q_table[next_state].values(), default=0.0)
+        return reward + self.agent.gamma * next_max_q - q_table[state].get(action, 0.0)
+
+    def _push(self, state, action, priority):
+        if priority > self.theta:
+            heapq.heappush(self.queue, (-priority, next(self.counter), state, action))
+
+    def observe(self, state, action, reward, next_state):
+        """Records a real transition in the model and queues it by TD error."""
+        with self.lock:
+            key = (state, action)
+            old = self.model.get(key)
+            if old is not None and old[1] != next_state:
+                self.predecessors[old[1]].discard(key)
+            elif old is None and len(self.model) >= self.max_model_size:
+                self._evict_oldest()
+            self.model[key] = (reward, next_state)
+            self.predecessors[next_state].add(key)
+            if state in self.agent.q_table and next_state in self.agent.q_table:
+                self._push(state, action, abs(self._td_error(state, action, reward, next_state)))
+
+    def _evict_oldest(self):
+        key = next(iter(self.model))
+        _, next_state = self.model.pop(key)
+        self.predecessors[next_state].discard(key)
+        if not self.predecessors[next_state]:
+            del self.predecessors[next_state]
+
+    def plan(self, n):
+        """Performs up to n prioritized planning updates; returns how many ran."""
+        done = 0
+        with self.lock:
+            q_table = self.agent.q_table
+            while done < n and self.queue:
+                _, _, state, action = heapq.heappop(self.queue)
+                transition = self.model.get((state, action))
+                if transition is None:
+                    continue
+                reward, next_state = transition
+                if state not in q_table or next_state not in q_table:
+                    continue  # Evicted by QLearningAgent.compact()
+                q_table[state][action] = q_table[state].get(action, 0.0) + (
+                    self.agent.alpha * self._td_error(state, action, reward, next_state)
+                )
+                done += 1
+
+                # The value of `state` changed, so pairs leading into it may need work
+                for prev_state, prev_action in self.predecessors.get(state, ()):
+                    if prev_state not in q_table:
+                        continue
+                    prev_reward, _ = self.model[(prev_state, prev_action)]
+                    self._push(
+                        prev_state,
+                        prev_action,
+                        abs(self._td_error(prev_state, prev_action, prev_reward, state)),
+                    )
+        self.planning_updates += done
+        return done
+
+    def start(self, idle_sleep=0.001):
+        """Runs planning in a daemon thread until stop() is called."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.is_set():
+                if not self.plan(self.batch_size):
+                    time.sleep(idle_sleep)  # Nothing queued; let the simulation run
+
+        self._thread = threading.Thread(
+            target=run, name=f"planner-{self.agent.id}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
@@ -0,0 +1,273 @@
+# population.py
+
+import argparse
+import json
+import os
+import random
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from environment import HideAndSeekEnv, collect_rollout, update_from_rollout
+from maze import MAX_ROOMS, Maze
+from q_learning import QLearningAgent
+from tournament import discover_policies, playable_mazes
+
+ROUND_STEPS = 60 * 240
+
+
+def policy_path(directory, agent_type, index):
+    """Population tables use the qtable_agent_<type>_<id> names tournament.py reads."""
+    return os.path.join(directory, f"qtable_agent_{agent_type}_{index}.txt")
+
+
+def train_pair(task):
+    """Trains one seeker and one hider table against each other and saves both.
+
+    Every seeker slot of the maze learns into the seeker table and every
+    hider slot into the hider table. Episodes are collected with
+    environment.collect_rollout and learned from with update_from_rollout.
+    Returns the mean catch rate and mean per-side returns.
+    """
+    maze_file, seeker_path, hider_path, episodes, max_steps, seed = task
+    env = HideAndSeekEnv(maze_file, seed=seed, max_steps=max_steps)
+    env.reset()
+    policies = {
+        agent_type: QLearningAgent(0, 0, env.cell_size, type=agent_type, qtable_path=path, rng=env.rng)
+        for agent_type, path in (("seeker", seeker_path), ("hider", hider_path))
+    }
+    learners = [policies[a.type] for a in env.agents]
+
+    catch_rate = seeker_return = hider_return = 0.0
+    for _ in range(episodes):
+        rollout = collect_rollout(env, learners, max_steps)
+        update_from_rollout(learners, rollout)
+        catch_rate += sum(h.destroyed for h in env.hiders) / len(env.hiders)
+        seeker_return += float(sum(a.total_reward for a in env.seekers))
+        hider_return += float(sum(a.total_reward for a in env.hiders))
+
+    for policy in policies.values():
+        policy.save_q_table()
+    return {
+        "catch_rate": catch_rate / episodes,
+        "seeker_return": seeker_return / episodes,
+        "hider_return": hider_return / episodes,
+        "states": {t: len(p.q_table) for t, p in policies.items()},
+    }
+
+
+class PopulationScheduler:
+    """Chooses which seeker/hider pairs to train next, and on which maze.
+
+    Every (seeker, hider) pair of the population sits on a rung of `levels`,
+    a list of maze files ordered from easy to hard for the seekers. After
+    each job the pair is promoted when its recent catch rate reaches
+    `promote_at` and demoted when it falls to `demote_at`.
+
+    Compute goes to the pairs that are learning fastest: a pair's priority
+    is the relative change of its summed return between the last two windows
+    of `window` jobs. Pairs without enough history, including those that
+    just changed level, are tried first. Each batch is a matching, so no
+    table is trained by two jobs at once.
+    """
+
+    STATE_FILE = "scheduler.json"
+
+    def __init__(
+        self, directory, levels, population_size, window=3, promote_at=0.7, demote_at=0.2
+    ):
+        self.directory = directory
+        self.levels = levels
+        self.population_size = population_size
+        self.window = window
+        self.promote_at = promote_at
+        self.demote_at = demote_at
+        self.generation = 0
+        self.pairs = {
+            (s, h): {"level": 0, "jobs": 0, "returns": [], "catch_rates": []}
+            for s in range(population_size)
+            for h in range(population_size)
+        }
+
+    def priority(self, pair):
+        returns = self.pairs[pair]["returns"]
+        if len(returns) < 2 * self.window:
+            return float("inf")
+        recent = sum(returns[-self.window :]) / self.window
+        previous = sum(returns[-2 * self.window : -self.window]) / self.window
+        return abs(recent - previous) / (abs(previous) + 1.0)
+
+    def select(self, batch_size, rng):
+        """Highest-priority pairs with no seeker or hider table used twice."""
+        # Random tie-breaking so untried pairs are not always taken in index order
+        ranked = sorted(self.pairs, key=lambda p: (-self.priority(p), rng.random()))
+        batch, used_seekers, used_hiders = [], set(), set()
+        for seeker, hider in ranked:
+            if seeker in used_seekers or hider in used_hiders:
+                continue
+            batch.append((seeker, hider))
+            used_seekers.add(seeker)
+            used_hiders.add(hider)
+            if len(batch) == batch_size:
+                break
+        return batch
+
+    def record(self, pair, result):
+        """Adds a job result and moves the pair up or down the maze ladder."""
+        state = self.pairs[pair]
+        state["jobs"] += 1
+        state["returns"].append(result["seeker_return"] + result["hider_return"])
+        state["catch_rates"].append(result["catch_rate"])
+        recent = state["catch_rates"][-self.window :]
+        if len(recent) < self.window:
+            return
+        catch_rate = sum(recent) / len(recent)
+        level = state["level"]
+        if catch_rate >= self.promote_at and level < len(self.levels) - 1:
+            level += 1
+        elif catch_rate <= self.demote_at and level > 0:
+            level -= 1
+        if level != state["level"]:
+            print(f"🪜 Pair s{pair[0]}/h{pair[1]}: {self.levels[state['level']]} -> {self.levels[level]} (catch rate {catch_rate:.2f})")
+            state["level"] = level
+            state["returns"], state["catch_rates"] = [], []
+
+    def save(self):
+        """Checkpoints the scheduler state next to the population tables, atomically."""
+        path = os.path.join(self.directory, self.STATE_FILE)
+        data = {
+            "generation": self.generation,
+            "levels": self.levels,
+            "population_size": self.population_size,
+            "pairs": {f"{s},{h}": state for (s, h), state in self.pairs.items()},
+        }
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+    def load(self):
+        """Resumes from a saved checkpoint; returns False if there is none."""
+        path = os.path.join(self.directory, self.STATE_FILE)
+        if not os.path.exists(path):
+            return False
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data["population_size"] != self.population_size or data["levels"] != self.levels:
+            print(f"Ignoring {path}: it was written for a different population or maze ladder.")
+            return False
+        self.generation = data["generation"]
+        for key, state in data["pairs"].items():
+            s, h = map(int, key.split(","))
+            self.pairs[(s, h)] = state
+        return True
+
+
+def build_levels(maze_files, generated, directory, seed):
+    """Hand-made mazes in the given order, then generated mazes with 1..N rooms."""
+    levels = list(playable_mazes(maze_files))
+    maze_object = Maze(seed=seed)
+    for rooms in range(1, generated + 1):
+        path = os.path.join(directory, f"generated_maze_{rooms}.txt")
+        if not os.path.exists(path):
+            maze_object.write_maze(path, maze_object.generate_maze(rooms=rooms))
+        levels.append(path)
+    return levels
+
+
+def seed_population(directory, population_size, seed_dirs):
+    """Copies saved tables from seed_dirs into empty population slots, cycling if needed."""
+    pool = discover_policies(seed_dirs)
+    for agent_type in ("seeker", "hider"):
+        for index in range(population_size):
+            target = policy_path(directory, agent_type, index)
+            if pool[agent_type] and not os.path.exists(target):
+                _, source = pool[agent_type][index % len(pool[agent_type])]
+                shutil.copyfile(source, target)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Curriculum / population-based training of seeker and hider Q-tables"
+    )
+    parser.add_argument("--population-dir", default="population")
+    parser.add_argument("--population-size", type=int, default=2)
+    parser.add_argument(
+        "--mazes",
+        nargs="+",
+        default=["maze.txt", "maze3.txt", "maze4.txt", "maze5.txt"],
+        help="Maze ladder from easiest to hardest for the seekers",
+    )
+    parser.add_argument(
+        "--generated",
+        type=int,
+        default=4,
+        help=f"Append generated mazes with 1..N hider rooms to the ladder (N <= {MAX_ROOMS})",
+    )
+    parser.add_argument(
+        "--seed-tables",
+        nargs="*",
+        default=[],
+        help="Directories of saved tables (e.g. texts texts2) to start the population from",
+    )
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--episodes", type=int, default=2, help="Episodes per training job")
+    parser.add_argument("--max-steps", type=int, default=ROUND_STEPS)
+    parser.add_argument("--window", type=int, default=3, help="Jobs per progress window")
+    parser.add_argument("--promote-at", type=float, default=0.7)
+    parser.add_argument("--demote-at", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Parallel jobs (default: all cores)"
+    )
+    args = parser.parse_args()
+    if not 0 <= args.generated <= MAX_ROOMS:
+        parser.error(f"--generated must be between 0 and {MAX_ROOMS}")
+    return args
+
+
+def main():
+    args = parse_args()
+    os.makedirs(args.population_dir, exist_ok=True)
+    levels = build_levels(args.mazes, args.generated, args.population_dir, args.seed)
+    if not levels:
+        print("No playable mazes.")
+        return
+    seed_population(args.population_dir, args.population_size, args.seed_tables)
+
+    scheduler = PopulationScheduler(
+        args.population_dir,
+        levels,
+        args.population_size,
+        window=args.window,
+        promote_at=args.promote_at,
+        demote_at=args.demote_at,
+    )
+    if scheduler.load():
+        print(f"Resuming population at generation {scheduler.generation}.")
+    rng = random.Random(args.seed + scheduler.generation)
+    workers = args.workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for _ in range(args.generations):
+            batch = scheduler.select(min(workers, args.population_size), rng)
+            tasks = [
+                (
+                    levels[scheduler.pairs[pair]["level"]],
+                    policy_path(args.population_dir, "seeker", pair[0]),
+                    policy_path(args.population_dir, "hider", pair[1]),
+                    args.episodes,
+                    args.max_steps,
+                    args.seed + scheduler.generation * 1000 + i,
+                )
+                for i, pair in enumerate(batch)
+            ]
+            for pair, task, result in zip(batch, tasks, executor.map(train_pair, tasks)):
+                print(
+                    f"🧬 gen {scheduler.generation} s{pair[0]}/h{pair[1]} on {os.path.basename(task[0])}: "
+                    f"catch {result['catch_rate']:.2f}, returns {result['seeker_return']:.0f}/{result['hider_return']:.0f}"
+                )
+                scheduler.record(pair, result)
+            scheduler.generation += 1
+            scheduler.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# q_lambda.py
+
+import numpy as np
+from q_learning import QLearningAgent
+from tracing import DEBUG
+
+
+class EligibilityTraces:
+    """Sparse replacing traces over (state, action) keys, backed by a NumPy array.
+
+    Only pairs with a trace above `threshold` are kept, so the active set stays
+    small (about log(threshold) / log(gamma * lambda) entries) and decaying
+    every trace is a single in-place array multiply.
+    """
+
+    def __init__(self, threshold=0.01, capacity=64):
+        self.threshold = threshold
+        self.keys = []
+        self.index = {}
+        self.values = np.zeros(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def visit(self, key):
+        """Sets the trace of key to 1 (replacing traces)."""
+        slot = self.index.get(key)
+        if slot is None:
+            slot = len(self.keys)
+            if slot == len(self.values):
+                self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+            self.keys.append(key)
+            self.index[key] = slot
+        self.values[slot] = 1.0
+
+    def decay(self, factor):
+        """Multiplies every trace by factor and drops the ones below threshold."""
+        size = len(self.keys)
+        live = self.values[:size]
+        live *= factor
+        keep = live >= self.threshold
+        if not keep.all():
+            kept = np.flatnonzero(keep)
+            self.keys = [self.keys[i] for i in kept]
+            self.index = {key: slot for slot, key in enumerate(self.keys)}
+            self.values[: len(kept)] = live[kept]
+            self.values[len(kept) : size] = 0.0
+
+    def clear(self):
+        self.values[: len(self.keys)] = 0.0
+        self.keys = []
+        self.index = {}
+
+    def items(self):
+        return zip(self.keys, self.values[: len(self.keys)].tolist())
+
+
+class QLambdaAgent(QLearningAgent):
+    """QLearningAgent using Watkins Q(lambda) instead of one-step Q-learning.
+
+    Each TD error is applied to every recently visited (state, action) pair in
+    proportion to its eligibility trace, so catch and region rewards reach the
+    states that led to them in one update instead of one state per visit.
+    Traces are cut at exploratory actions, as Watkins' method requires:
+    choose_action() records whether its action was greedy in `greedy`, and
+    learn() drops the earlier traces when the action it learns was not.
+    Uses the same q_table dict and file format as QLearningAgent.
+    """
+
+    def __init__(self, *args, lam=0.8, trace_threshold=0.01, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lam = lam  # Trace decay (lambda)
+        self.traces = EligibilityTraces(threshold=trace_threshold)
+        self.greedy = True  # Whether the last chosen action was greedy
+
+    def choose_action(self, state):
+        action = super().choose_action(state)
+        if self.frozen:
+            return action
+        q_values = self.q_table[state]
+        self.greedy = q_values[action] >= max(q_values.values()) - 1e-6
+        return action
+
+    def learn(self, state, action, reward, next_state):
+        """Watkins Q(lambda) update for a single (s, a, r, s') transition.
+
+        Uses `greedy` for the action being learned; update_from_rollout()
+        sets it from the rollout, since there every action is chosen first.
+        """
+        if not self.greedy:
+            # Non-greedy action: earlier pairs no longer follow the greedy policy
+            self.traces.clear()
+        # Ensure Q-table entries exist for calculation
+        if state not in self.q_table:
+            self.add_state(state)
+        if action not in self.q_table[state]:
+            self.q_table[state][action] = 0.0
+        if next_state not in self.q_table:
+            self.add_state(next_state)
+
+        old_q = self.q_table[state][action]
+        next_max_q = max(self.q_table[next_state].values(), default=0.0)
+        td_error = reward + self.gamma * next_max_q - old_q
+
+        self.traces.visit((state, action))
+        step = self.alpha * td_error
+        for (s, a), trace in self.traces.items():
+            self.q_table[s][a] += step * trace
+        self.traces.decay(self.gamma * self.lam)
+
+        if self.tracer.active:
+            self.tracer.emit(
+                DEBUG,
+                self.id,
+                "q_lambda_update",
+                state=state,
+                action=action,
+                reward=reward,
+                td_error=td_error,
+                traces=len(self.traces),
+            )
+
+    def compact(self, *args, **kwargs):
+        # Traced pairs may be evicted, so start the traces afresh
+        self.traces.clear()
+        super().compact(*args, **kwargs)
+
+    def reset_traces(self):
+        """Clears all eligibility traces, e.g. at the end of a round."""
+        self.traces.clear()
+
+    def reset(self):
+        """Traces do not carry over from one round to the next."""
+        super().reset()
+        self.reset_traces()
@@ -1,102 +1,239 @@
 # q_learning.py
 
-import math
 import random
 import pygame
 import os
-from agent import Agent  # Make sure agent.py is accessible
-from collections import defaultdict  # Ensure defaultdict is imported
+import numpy as np
+from agent import Agent, ACTIONS  # Make sure agent.py is accessible
+from tracing import DEBUG, WARNING
+
+# Action taken by a frozen (evaluation) agent in a state missing from its Q-table
+UNSEEN_STATE_ACTION = 0  # "move"
+
+
+class Schedule:
+    """Per-round parameter schedule decaying exponentially from start towards end."""
+
+    def __init__(self, start, end, decay):
+        self.start = start
+        self.end = end
+        self.decay = decay  # Fraction of the remaining gap kept each round
+
+    def value(self, round_index):
+        return self.end + (self.start - self.end) * self.decay**round_index
+
+
+def read_q_table(qtable_path):
+    """Parses a Q-table file into (q_table, visits).
+
+    Lines are `state|action:q,...` with an optional `|visits` field; files
+    written before visit counts were tracked load with no visits.
+    """
+    q_table = {}
+    visits = {}
+    with open(qtable_path, "r") as f:
+        for line_num, line in enumerate(f):
+            line = line.strip()
+            if "|" not in line:
+                continue
+            try:
+                fields = line.split("|")
+                state_str, actions_str = fields[0], fields[1]
+                # Convert state components back to floats/numbers
+                state_components = list(map(float, state_str.split(",")))
+                state = tuple(state_components)
+
+                action_pairs = actions_str.split(",")
+                actions = {}
+                for pair in action_pairs:
+                    if ":" in pair:
+                        a, q_str = pair.split(":")
+                        try:
+                            actions[a] = float(q_str)
+                        except ValueError:
+                            print(
+                                f"Warning: L{line_num+1} Could not parse Q-value '{q_str}' for state {state}, action {a} in {qtable_path}. Setting to 0.0"
+                            )
+                            actions[a] = 0.0
+                q_table[state] = actions
+                if len(fields) > 2 and fields[2]:
+                    visits[state] = int(fields[2])
+            except Exception as parse_e:
+                print(
+                    f"Error parsing line {line_num+1} in {qtable_path}: '{line}'. Error: {parse_e}"
+                )
+    return q_table, visits
+
+
+def write_q_table(qtable_path, q_table, visits=None):
+    """Writes a Q-table in the format read by read_q_table().
+
+    The table goes to a temporary file that is then renamed over qtable_path,
+    so readers and crashes never see a half-written table.
+    """
+    visits = visits or {}
+    tmp_path = qtable_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for state, actions in q_table.items():
+            # Ensure state components are strings for joining
+            state_str = ",".join(map(str, state))
+            actions_str = ",".join(f"{a}:{q:.4f}" for a, q in actions.items())
+            count = visits.get(state, 0)
+            if count:
+                f.write(f"{state_str}|{actions_str}|{count}\n")
+            else:
+                f.write(f"{state_str}|{actions_str}\n")
+    os.replace(tmp_path, qtable_path)
+
+
+def coarsen_state(state, position_step=1, angle_step=1):
+    """Snaps an (x, y, angle) state onto a coarser grid."""
+    x, y, angle = state[:3]
+    return (
+        round(x / position_step) * position_step,
+        round(y / position_step) * position_step,
+        round(angle / angle_step) * angle_step % 360,
+    )
+
+
+def compact_q_table(
+    q_table, visits=None, position_step=1, angle_step=1, max_states=None, evict="visits"
+):
+    """Returns a compacted copy of (q_table, visits).
+
+    1. Rows that were never updated (all Q-values zero, no visits) are dropped.
+    2. With position_step/angle_step > 1, states that fall into the same
+       coarse state are merged, averaging Q-values weighted by visits.
+    3. With max_states, only that many rows are kept: the most visited
+       (evict="visits") or the most recently updated (evict="lru", using the
+       insertion order of `visits`, which QLearningAgent keeps in LRU order).
+    """
+    visits = visits or {}
+    rows = [
+        (state, q_values)
+        for state, q_values in q_table.items()
+        if visits.get(state, 0) > 0 or any(q != 0.0 for q in q_values.values())
+    ]
+
+    if position_step != 1 or angle_step != 1:
+        sums, weights, merged_visits = {}, {}, {}
+        for state, q_values in rows:
+            key = coarsen_state(state, position_step, angle_step)
+            weight = max(visits.get(state, 0), 1)
+            acc = sums.setdefault(key, {})
+            for a, q in q_values.items():
+                acc[a] = acc.get(a, 0.0) + weight * q
+            weights[key] = weights.get(key, 0) + weight
+            merged_visits[key] = merged_visits.get(key, 0) + visits.get(state, 0)
+        rows = [
+            (key, {a: q / weights[key] for a, q in acc.items()})
+            for key, acc in sums.items()
+        ]
+        visits = merged_visits
+
+    if max_states is not None and len(rows) > max_states:
+        if evict == "lru":
+            recency = {state: i for i, state in enumerate(visits)}
+            rank = lambda row: recency.get(row[0], -1)
+        else:
+            rank = lambda row: visits.get(row[0], 0)
+        keep = set(
+            state for state, _ in sorted(rows, key=rank, reverse=True)[:max_states]
+        )
+        rows = [row for row in rows if row[0] in keep]
+
+    compacted = dict(rows)
+    return compacted, {s: n for s, n in visits.items() if s in compacted and n}
 
 
 class QLearningAgent(Agent):
-    def __init__(self, x, y, cell_size, id=0, type="none", qtable_path=None):
-        # Initialize base Agent class
-        super().__init__(x, y, type, cell_size)
+    actions = ACTIONS  # Choices the Q-table is kept over; subclasses may extend it
+
+    def __init__(
+        self, x, y, cell_size, id=0, type="none", qtable_path=None, rng=None
+    ):
+        # Initialize base Agent class (movement, vision, reward constants)
+        super().__init__(x, y, type, cell_size, id=id)
 
         # QLearning specific attributes
-        self.initial_pos = (self.x, self.y)
-        self.id = id
         # Use .txt extension based on previous implementation
         self.qtable_path = qtable_path or f"qtable_agent_{self.id}.txt"
+        self.visits = {}  # state -> number of updates, kept in least-recently-updated order
+        self.states_created = 0  # Rows added this round, see add_state()
         self.q_table = self.load_q_table()
         self.epsilon = 0.2  # Exploration rate
         self.alpha = 0.1  # Learning rate
         self.gamma = 0.9  # Discount factor
-        self.total_reward = 0  # Accumulated reward over an episode for logging
+        # RNG used for exploration; pass a seeded random.Random for deterministic runs
+        self.rng = rng if rng is not None else random
         self.prev_state = None
         self.prev_action = None
         # self.type is inherited from Agent init
-        self.destroyed = False
-        self.view_comments = False  # Set to True for debug prints
-        self.rank_point = 0  # For hider ranking
 
-        # Constants for vision-based rewards/actions
-        self.VISION_PROXIMITY_MAX_BONUS = (
-            200  # Max reward/penalty magnitude for seeing opponent
-        )
-        self.VISION_PROXIMITY_DECAY_RATE = (
-            self.cell_size * 2.5
-        )  # Controls how fast effect drops with distance
-        self.VISION_CATCH_THRESHOLD = (
-            self.cell_size * 1.5
-        )  # Distance within which a seeker catches (based on vision)
-        self.CATCH_BONUS = 1000  # Reward for seeker catching hider
-        self.SEEN_PENALTY_MULTIPLIER = (
-            1.5  # How much stronger penalty is for hider being seen vs seeker reward
-        )
-        self.WALL_PENALTY = 10  # Penalty for trying to move into wall/door
+        # Optional per-round schedules, applied by begin_round()
+        self.epsilon_schedule = None
+        self.alpha_schedule = None
+
+        # State discretization and table size cap (None = unbounded)
+        self.position_step = 1
+        self.angle_step = 1
+        self.max_states = None
+
+        # Optional Dyna-style planner (planning.PrioritizedSweepingPlanner)
+        self.planner = None
+        self.planning_steps = 0  # Inline planning updates after each real step
+
+        # Greedy evaluation mode, see freeze()
+        self.frozen = False
+        self.state_index = {}
+        self.greedy_actions = np.zeros(0, dtype=np.uint8)
 
     def save_q_table(self):
         """Saves the Q-table to a file."""
         qtable_path = self.qtable_path  # Use path defined in init
         try:
-            with open(qtable_path, "w") as f:
-                for state, actions in self.q_table.items():
-                    # Ensure state components are strings for joining
-                    state_str = ",".join(map(str, state))
-                    actions_str = ",".join(f"{a}:{q:.4f}" for a, q in actions.items())
-                    f.write(f"{state_str}|{actions_str}\n")
+            write_q_table(qtable_path, self.q_table, self.visits)
         except Exception as e:
             print(f"Error saving Q-table for agent {self.id} to {qtable_path}: {e}")
 
+    def checkpoint(self):
+        """Copies the Q-table now and returns a function that writes the copy.
+
+        Only the copy is made on the calling thread; the returned function
+        can run on another thread (see checkpoint.CheckpointWriter) while
+        this agent keeps learning. It reports errors itself and returns
+        whether the file was written.
+        """
+        if self.planner is not None:
+            with self.planner.lock:
+                q_table = {state: dict(row) for state, row in self.q_table.items()}
+                visits = dict(self.visits)
+        else:
+            q_table = {state: dict(row) for state, row in self.q_table.items()}
+            visits = dict(self.visits)
+        qtable_path = self.qtable_path
+
+        def write():
+            try:
+                write_q_table(qtable_path, q_table, visits)
+            except Exception as e:
+                print(f"Error saving Q-table for agent {self.id} to {qtable_path}: {e}")
+                return False
+            return True
+
+        return write
+
     def load_q_table(self):
-        """Loads the Q-table from a file."""
-        q_table = {}
+        """Loads the Q-table (and visit counts, into self.visits) from a file."""
         qtable_path = self.qtable_path  # Use path defined in init
         if not os.path.exists(qtable_path):
             print(
                 f"Q-table file not found for agent {self.id}: {qtable_path}. Starting fresh."
             )
-            return q_table
+            return {}
+        q_table = {}
         try:
-            with open(qtable_path, "r") as f:
-                for line_num, line in enumerate(f):
-                    line = line.strip()
-                    if "|" not in line:
-                        continue
-                    try:
-                        state_str, actions_str = line.split("|")
-                        # Convert state components back to floats/numbers
-                        state_components = list(map(float, state_str.split(",")))
-                        state = tuple(state_components)
-
-                        action_pairs = actions_str.split(",")
-                        actions = {}
-                        for pair in action_pairs:
-                            if ":" in pair:
-                                a, q_str = pair.split(":")
-                                try:
-                                    actions[a] = float(q_str)
-                                except ValueError:
-                                    print(
-                                        f"Warning: L{line_num+1} Could not parse Q-value '{q_str}' for state {state}, action {a} in {qtable_path}. Setting to 0.0"
-                                    )
-                                    actions[a] = 0.0
-                        q_table[state] = actions
-                    except Exception as parse_e:
-                        print(
-                            f"Error parsing line {line_num+1} in {qtable_path}: '{line}'. Error: {parse_e}"
-                        )
+            q_table, self.visits = read_q_table(qtable_path)
         except Exception as e:
             print(f"Error loading Q-table for agent {self.id} from {qtable_path}: {e}")
         print(
@@ -104,28 +241,98 @@ class QLearningAgent(Agent):
         )
         return q_table
 
+    def compact(self, max_states=None, evict="lru"):
+        """Compacts the in-memory Q-table in place, see compact_q_table()."""
+        if self.planner is not None:
+            with self.planner.lock:
+                self.q_table, self.visits = compact_q_table(
+                    self.q_table, self.visits, max_states=max_states, evict=evict
+                )
+        else:
+            self.q_table, self.visits = compact_q_table(
+                self.q_table, self.visits, max_states=max_states, evict=evict
+            )
+
+    def reset(self):
+        """New round on the same agent: the in-memory Q-table is kept, nothing is re-read."""
+        super().reset()
+        self.prev_state = None
+        self.prev_action = None
+        self.states_created = 0
+
+    def add_state(self, state):
+        """Adds an all-zero row for a new state and counts it in states_created."""
+        self.q_table[state] = {a: 0.0 for a in self.actions}
+        self.states_created += 1
+
+    def begin_round(self, round_index):
+        """Applies the epsilon/alpha schedules for the given round."""
+        if self.epsilon_schedule is not None:
+            self.epsilon = self.epsilon_schedule.value(round_index)
+        if self.alpha_schedule is not None:
+            self.alpha = self.alpha_schedule.value(round_index)
+
+    def freeze(self):
+        """Switches to greedy evaluation: no exploration, no learning, no table writes.
+
+        The argmax action of every state is cached in a uint8 array aligned
+        with state_index, so choosing an action is one dict lookup and one
+        array index.
+        """
+        self.frozen = True
+        self.epsilon = 0.0
+        self.state_index = {}
+        self.greedy_actions = np.empty(len(self.q_table), dtype=np.uint8)
+        for i, (state, q_values) in enumerate(self.q_table.items()):
+            self.state_index[state] = i
+            row = [q_values.get(a, 0.0) for a in self.actions]
+            self.greedy_actions[i] = row.index(max(row))
+
     def get_state(self):
-        """Gets the current state representation (rounded position and angle)."""
-        # Consider rounding to larger increments (e.g., // 5 * 5) or using grid coords
-        # to reduce state space size if performance is an issue.
-        return (round(self.x), round(self.y), round(self.angle))
+        """Agent state, snapped to position_step/angle_step when those are coarser than 1."""
+        state = super().get_state()
+        if self.position_step != 1 or self.angle_step != 1:
+            state = coarsen_state(state, self.position_step, self.angle_step)
+        return state
+
+    def state_from(self, observation, body=None):
+        """Q-table key for a HideAndSeekEnv observation row of `body`, built like get_state()."""
+        state = tuple(observation)
+        if self.position_step != 1 or self.angle_step != 1:
+            state = coarsen_state(state, self.position_step, self.angle_step)
+        return state
 
     def get_action(self):
-        """Chooses an action using epsilon-greedy strategy."""
+        """Chooses an action for the current state and remembers it for the Q-update."""
         state = self.get_state()
-        actions = ["move", "left", "right", "open", "close"]
+        action = self.choose_action(state)
+
+        # Store state and action for Q-update later
+        self.prev_state = state
+        self.prev_action = action
+        return action
+
+    def choose_action(self, state):
+        """Chooses an action using epsilon-greedy strategy."""
+        if self.frozen:
+            index = self.state_index.get(state)
+            if index is None:
+                return self.actions[UNSEEN_STATE_ACTION]
+            return self.actions[self.greedy_actions[index]]
+
+        actions = self.actions
 
         # Initialize Q-values for new state if not seen before
         if state not in self.q_table:
-            self.q_table[state] = {a: 0.0 for a in actions}
-            if self.view_comments:
-                print(f"[{self.id}] New state encountered: {state}")
+            self.add_state(state)
+            if self.tracer.active:
+                self.tracer.emit(DEBUG, self.id, "new_state", state=state)
 
         # Epsilon-greedy selection
-        if random.random() < self.epsilon:
-            action = random.choice(actions)  # Explore
-            if self.view_comments:
-                print(f"[{self.id}] Exploring: chose {action}")
+        if self.rng.random() < self.epsilon:
+            action = self.rng.choice(actions)  # Explore
+            if self.tracer.active:
+                self.tracer.emit(DEBUG, self.id, "explore", action=action)
         else:
             # Exploit: Choose best known action
             q_values = self.q_table[state]
@@ -137,41 +344,62 @@ class QLearningAgent(Agent):
                 # Handle potential floating point inaccuracies when finding best actions
                 best_actions = [a for a, q in q_values.items() if abs(q - max_q) < 1e-6]
 
-            action = random.choice(best_actions)  # Choose randomly among best actions
-            if self.view_comments:
-                # Format the dictionary items into a string first
-                q_str = ", ".join(f"{a}:{q:.1f}" for a, q in q_values.items())
-                print(
-                    f"[{self.id}] Exploiting: Qs={{{q_str}}}, chose {action} (maxQ {max_q:.1f})"
+            action = self.rng.choice(best_actions)  # Choose randomly among best actions
+            if self.tracer.active:
+                # Copy the row; it is formatted later on the tracer thread
+                self.tracer.emit(
+                    DEBUG,
+                    self.id,
+                    "exploit",
+                    action=action,
+                    max_q=max_q,
+                    q_values=dict(q_values),
                 )
-
-        # Store state and action for Q-update later
-        self.prev_state = state
-        self.prev_action = action
         return action
 
     def update_q_value(self, reward, next_state):
         """Updates the Q-value for the previous state-action pair."""
         # Ensure we have a previous state/action to update
         if self.prev_state is None or self.prev_action is None:
-            if self.view_comments:
-                print(f"[{self.id}] Skipping Q-update: No previous state/action.")
+            if self.tracer.active:
+                self.tracer.emit(WARNING, self.id, "skip_update")
             return
 
+        if not self.frozen:
+            if self.planner is None:
+                self.learn(self.prev_state, self.prev_action, reward, next_state)
+            else:
+                # The planner may be updating the same table from its own thread
+                with self.planner.lock:
+                    self.learn(self.prev_state, self.prev_action, reward, next_state)
+                self.planner.observe(
+                    self.prev_state, self.prev_action, reward, next_state
+                )
+                if self.planning_steps:
+                    self.planner.plan(self.planning_steps)
+
+            # Move the state to the most-recent end of the visit order
+            if self.prev_state in self.q_table:
+                self.visits[self.prev_state] = self.visits.pop(self.prev_state, 0) + 1
+            # Let the table overshoot the cap a little so compaction stays rare
+            if self.max_states is not None and len(self.q_table) > self.max_states * 1.25:
+                self.compact(max_states=self.max_states)
+
+        # Accumulate reward for episode logging
+        self.total_reward += reward
+
+    def learn(self, state, action, reward, next_state):
+        """One-step Q-learning update for a single (s, a, r, s') transition."""
         # Ensure Q-table entries exist for calculation
-        if self.prev_state not in self.q_table:
-            self.q_table[self.prev_state] = {
-                a: 0.0 for a in ["move", "left", "right", "open", "close"]
-            }
-        if self.prev_action not in self.q_table[self.prev_state]:
-            self.q_table[self.prev_state][self.prev_action] = 0.0
+        if state not in self.q_table:
+            self.add_state(state)
+        if action not in self.q_table[state]:
+            self.q_table[state][action] = 0.0
         if next_state not in self.q_table:
-            self.q_table[next_state] = {
-                a: 0.0 for a in ["move", "left", "right", "open", "close"]
-            }
+            self.add_state(next_state)
 
         # Q-learning formula: Q(s,a) = Q(s,a) + alpha * (reward + gamma * max_q(s') - Q(s,a))
-        old_q = self.q_table[self.prev_state][self.prev_action]
+        old_q = self.q_table[state][action]
 
         # Find max Q-value for the next state
         next_q_values = self.q_table[next_state]
@@ -181,14 +409,19 @@ class QLearningAgent(Agent):
 
         # Calculate new Q-value
         new_q = old_q + self.alpha * (reward + self.gamma * next_max_q - old_q)
-        self.q_table[self.prev_state][self.prev_action] = new_q
-
-        # Accumulate reward for episode logging
-        self.total_reward += reward
-
-        if self.view_comments:
-            print(
-                f"[{self.id}] QUpdate: State={self.prev_state}, Action={self.prev_action}, Reward={reward:.1f}, NextState={next_state}, OldQ={old_q:.2f}, NewQ={new_q:.2f}"
+        self.q_table[state][action] = new_q
+
+        if self.tracer.active:
+            self.tracer.emit(
+                DEBUG,
+                self.id,
+                "q_update",
+                state=state,
+                action=action,
+                reward=reward,
+                next_state=next_state,
+                old_q=old_q,
+                new_q=new_q,
             )
 
     # --- Main Step Function ---
@@ -196,205 +429,15 @@ class QLearningAgent(Agent):
         """Performs one step of action, reward calculation, and learning."""
         # 1. Choose action based on current state
         action = self.get_action()
-        current_reward = 0.0  # Accumulate rewards for this step
 
         # 2. Perform Action in environment
-        if action == "move":
-            self.move_forward(maze, screen, other_agents)
-        elif action == "left":
-            self.rotate_left()
-        elif action == "right":
-            self.rotate_right()
-        elif action == "open":
-            maze = self.open_door(maze)  # Returns updated maze
-        elif action == "close":
-            maze = self.close_door(maze)  # Returns updated maze
+        maze = self.apply_action(action, maze, screen, other_agents)
 
         # 3. Update Vision Arc based on NEW state
-        # Assumes Agent.py has the updated method that detects agents
-        try:
-            active_others = [
-                a
-                for a in other_agents
-                if not getattr(a, "destroyed", False) and a is not self
-            ]
-            self.update_vision_arc(maze, active_others)
-        except (AttributeError, TypeError) as e:
-            print(
-                f"CRITICAL WARNING: Agent {self.id} 'update_vision_arc' failed or missing/wrong arguments! Vision rewards will not work. Error: {e}"
-            )
-            # Ensure vision_arc exists even if update fails, to prevent later errors
-            if not hasattr(self, "vision_arc"):
-                self.vision_arc = defaultdict(list)
+        active_others = self.observe(maze, other_agents)
 
         # 4. Calculate Reward based on outcome of action and new state/vision
-
-        # --- Exploration Reward ---
-        distance_from_start = math.hypot(
-            self.x - self.initial_pos[0], self.y - self.initial_pos[1]
-        )
-        explore_reward = 0
-        if distance_from_start > 2000:
-            explore_reward = 60
-        elif distance_from_start > 1000:
-            explore_reward = 50
-        elif distance_from_start > 500:
-            explore_reward = 25
-        elif distance_from_start < self.cell_size * 10:
-            explore_reward = -5  # Penalize staying too close?
-        # You had a large penalty (-150) for dist < 500, keeping it similar:
-        if distance_from_start < 500:
-            explore_reward = -150
-        current_reward += explore_reward
-        # Add view_comments logic if needed
-
-        # --- Region/Door Interaction Rewards ---
-        my_region = self.get_current_region(maze)
-        region_reward = 0
-        if self.type == "hider":
-            base_region_reward = 300
-            if my_region == "2":
-                region_reward += base_region_reward + 300
-                if action == "close":
-                    region_reward += 500
-                elif action == "open":
-                    region_reward -= 500
-                self.rank_point += 3
-            elif my_region == "3":
-                region_reward += base_region_reward
-                if action == "close":
-                    region_reward += 300
-                elif action == "open":
-                    region_reward -= 300
-                self.rank_point += 2
-            elif my_region == "1":  # Add reward for region 1
-                if action == "open":
-                    region_reward += 200  # Reward for opening doors in region 1
-                self.rank_point += 1
-            else:
-                self.rank_point += 1
-        elif self.type == "seeker":
-            if (
-                action == "open" and my_region != "w"
-            ):  # Reward opening doors (except walls)
-                region_reward += 500
-        current_reward += region_reward
-        # Add view_comments logic if needed
-
-        # --- Same Room Interaction Rewards ---
-        interaction_reward = 0
-        # Note: This iterates through ALL agents, use active_others?
-        for other in active_others:  # Use active agents only
-            other_region = self.get_agent_region(maze, other)  # Need another helper
-            if (
-                my_region is not None
-                and my_region == other_region
-                and my_region not in ["w", "o", "d", "h", "s"]
-            ):  # Check grid cells, not start/door cells
-                dist_to_other = math.hypot(self.x - other.x, self.y - other.y)
-                if self.type == "hider" and other.type == "hider":
-                    # Reward hiders sticking together in safe rooms?
-                    if my_region in ["2", "3"]:
-                        interaction_reward += 500  # Make sure this aligns with goals
-                elif self.type == "hider" and other.type == "seeker":
-                    if dist_to_other < 200:
-                        interaction_reward -= 100  # Penalty increases closer
-                    elif dist_to_other < 500:
-                        interaction_reward -= 20  # Smaller penalty further away
-                elif self.type == "seeker" and other.type == "hider":
-                    if dist_to_other < 200:
-                        interaction_reward += 50  # Reward increases closer
-                    elif dist_to_other < 500:
-                        interaction_reward += 10  # Smaller reward further away
-        current_reward += interaction_reward
-        # Add view_comments logic if needed
-
-        # --- Vision Arc Based Opponent Detection Reward/Penalty/Catch ---
-        opponent_type = "hider" if self.type == "seeker" else "seeker"
-        opponent_detected_in_fov = False
-        min_opponent_dist_in_fov = float("inf")
-        vision_reward = 0
-
-        for ray_idx, items in self.vision_arc.items():
-            for item_tuple in items:
-                if len(item_tuple) >= 3 and item_tuple[0] == "agent":
-                    item_depth = item_tuple[1]
-                    detected_agent_type = item_tuple[2]
-                    if detected_agent_type == opponent_type:
-                        opponent_detected_in_fov = True
-                        min_opponent_dist_in_fov = min(
-                            min_opponent_dist_in_fov, item_depth
-                        )
-
-        if opponent_detected_in_fov:
-            proximity_effect = self.VISION_PROXIMITY_MAX_BONUS * math.exp(
-                -min_opponent_dist_in_fov / self.VISION_PROXIMITY_DECAY_RATE
-            )
-
-            if self.type == "seeker":
-                vision_reward += proximity_effect
-                if self.view_comments:
-                    print(
-                        f"[{self.id} Saw Hider]: VisRew= +{proximity_effect:.1f} (dist {min_opponent_dist_in_fov:.1f})"
-                    )
-
-                # Catching Logic
-                if min_opponent_dist_in_fov < self.VISION_CATCH_THRESHOLD:
-                    closest_hider_obj, min_actual_dist_sq = self.find_closest_opponent(
-                        active_others, "hider"
-                    )
-                    if (
-                        closest_hider_obj
-                        and min_actual_dist_sq
-                        < (self.VISION_CATCH_THRESHOLD * 1.1) ** 2
-                    ):
-                        if not closest_hider_obj.destroyed:
-                            closest_hider_obj.destroyed = True
-                            vision_reward += self.CATCH_BONUS  # Add catch bonus
-                            if self.view_comments:
-                                print(
-                                    f"💥 [{self.id}] Caught hider {closest_hider_obj.id}! (Actual dist {math.sqrt(min_actual_dist_sq):.1f}) Bonus= +{self.CATCH_BONUS}"
-                                )
-
-            elif self.type == "hider":
-                penalty = proximity_effect * self.SEEN_PENALTY_MULTIPLIER
-                vision_reward -= penalty
-                if self.view_comments:
-                    print(
-                        f"[{self.id} Saw Seeker]: VisPen= -{penalty:.1f} (dist {min_opponent_dist_in_fov:.1f})"
-                    )
-
-        current_reward += vision_reward
-
-        # --- Vision Arc Based Wall Collision Penalty ---
-        wall_penalty = 0
-        hit_wall_close = False
-        min_wall_dist = float("inf")
-        for ray_idx, items in self.vision_arc.items():
-            for item_tuple in items:
-                # Check structure before unpacking
-                if len(item_tuple) >= 2:
-                    item_type = item_tuple[0]
-                    item_depth = item_tuple[1]
-                    if item_type in ["wall", "closed_door"]:
-                        min_wall_dist = min(min_wall_dist, item_depth)
-                        # Check if obstacle is very close
-                        if item_depth < self.move_step * 1.5:
-                            hit_wall_close = True
-                            # No need to check further items on this ray if close wall found
-                            break
-            # No need to check further rays if close wall found on any ray
-            if hit_wall_close:
-                break
-
-        # Apply penalty only if the action was 'move' and hit obstacle
-        if hit_wall_close and action == "move":
-            wall_penalty = -self.WALL_PENALTY  # Use the defined constant
-            if self.view_comments:
-                print(
-                    f"[{self.id}] Penalty: Tried moving into close obstacle (dist {min_wall_dist:.1f}). Pen= {wall_penalty}"
-                )
-        current_reward += wall_penalty
+        current_reward = self.compute_reward(action, maze, active_others)
 
         # 5. Learn from Experience (Update Q-value)
         next_state = self.get_state()
@@ -403,33 +446,33 @@ class QLearningAgent(Agent):
         # 6. Return updated maze state
         return maze
 
-    # --- Helper Functions ---
-    def get_current_region(self, maze):
-        """Determines the maze grid cell type at the agent's current location."""
-        grid_x = int(self.x / self.cell_size)
-        grid_y = int(self.y / self.cell_size)
-        if 0 <= grid_y < len(maze) and 0 <= grid_x < len(maze[0]):
-            return maze[grid_y][grid_x]
-        return None  # Indicate agent is outside maze bounds
-
-    def get_agent_region(self, maze, agent):
-        """Determines the maze grid cell type for a given agent object."""
-        grid_x = int(agent.x / self.cell_size)
-        grid_y = int(agent.y / self.cell_size)
-        if 0 <= grid_y < len(maze) and 0 <= grid_x < len(maze[0]):
-            return maze[grid_y][grid_x]
-        return None
-
-    def find_closest_opponent(self, opponent_list, opponent_type_target):
-        """Finds the closest non-destroyed opponent of a specific type."""
-        closest_opponent_obj = None
-        min_dist_sq = float("inf")
-        for other in opponent_list:
-            if other.type == opponent_type_target and not getattr(
-                other, "destroyed", False
-            ):
-                dist_sq = (self.x - other.x) ** 2 + (self.y - other.y) ** 2
-                if dist_sq < min_dist_sq:
-                    min_dist_sq = dist_sq
-                    closest_opponent_obj = other
-        return closest_opponent_obj, min_dist_sq
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Compact a saved Q-table: drop untouched rows, merge states, cap size"
+    )
+    parser.add_argument("input", help="Q-table file to read")
+    parser.add_argument("output", help="Where to write the compacted table")
+    parser.add_argument("--position-step", type=int, default=1)
+    parser.add_argument("--angle-step", type=int, default=1)
+    parser.add_argument("--max-states", type=int, default=None)
+    parser.add_argument("--evict", choices=["visits", "lru"], default="visits")
+    args = parser.parse_args()
+
+    q_table, visits = read_q_table(args.input)
+    compacted, compacted_visits = compact_q_table(
+        q_table,
+        visits,
+        position_step=args.position_step,
+        angle_step=args.angle_step,
+        max_states=args.max_states,
+        evict=args.evict,
+    )
+    write_q_table(args.output, compacted, compacted_visits)
+    print(f"Compacted {args.input}: {len(q_table)} -> {len(compacted)} states.")
+
+
+if __name__ == "__main__":
+    main()
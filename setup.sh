@@ -8,7 +8,7 @@ source venv/bin/activate
 pip install -r requirements.txt
 
 # Create necessary directories and files if they don't exist
-touch agent_rewards.txt
+touch agent_rewards.jsonl
 
 # Make main script executable
 chmod +x main1.py
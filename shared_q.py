@@ -0,0 +1,347 @@
+# shared_q.py
+
+import argparse
+import contextlib
+import multiprocessing
+import os
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from agent import ACTIONS
+from environment import HideAndSeekEnv, collect_rollout, update_from_rollout
+from q_learning import UNSEEN_STATE_ACTION, QLearningAgent, read_q_table, write_q_table
+from tracing import DEBUG
+
+ROUND_STEPS = 60 * 240
+
+
+def rows_to_dict(keys, q_values, visit_counts):
+    """(q_table, visits) dicts from row arrays, in the read_q_table format."""
+    q_table, visits = {}, {}
+    for key, row, count in zip(keys.tolist(), q_values.tolist(), visit_counts.tolist()):
+        state = tuple(key)
+        q_table[state] = dict(zip(ACTIONS, row))
+        if count:
+            visits[state] = count
+    return q_table, visits
+
+
+class SharedQTable:
+    """Open-addressing Q-table in one shared memory block, usable from many processes.
+
+    Rows are indexed by a shared hash index over fixed-width float64 state
+    keys, so every process that attaches finds the same state in the same
+    slot. A slot is claimed once, always under the lock of its stripe, and
+    never moves, so each process memoizes state -> slot locally. Reads are
+    lock-free (Hogwild). TD updates take the stripe lock of the updated row
+    so concurrent read-modify-writes are not lost; with lock_free=True only
+    they skip it, trading rare lost updates for less contention.
+
+    Pickling sends only the block name and the locks, so a table can be
+    passed to worker processes when they are started.
+    """
+
+    def __init__(
+        self, capacity=2**18, state_size=3, n_actions=len(ACTIONS),
+        stripes=64, lock_free=False, name=None, locks=None,
+    ):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.n_actions = n_actions
+        self.lock_free = lock_free
+        # Forked workers inherit the owner's object; only the creating process frees the block
+        self.owner_pid = os.getpid() if name is None else None
+        sizes = self._sizes()
+        if name is None:
+            # New blocks are zero-filled, i.e. every slot starts unused
+            self.shm = shared_memory.SharedMemory(create=True, size=sum(sizes))
+            self.locks = [multiprocessing.Lock() for _ in range(stripes)]
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.locks = locks
+        self._map_arrays(sizes)
+        self.slots = {}  # Process-local memo: state -> slot
+        self.full_warned = False
+
+    def _sizes(self):
+        return (
+            self.capacity,  # used flags (int8)
+            8 * self.capacity,  # state hashes (int64)
+            8 * self.capacity,  # visits (int64)
+            8 * self.capacity * self.state_size,  # keys (float64)
+            8 * self.capacity * self.n_actions,  # Q-values (float64)
+        )
+
+    def _map_arrays(self, sizes):
+        buf, offset = self.shm.buf, 0
+        arrays = []
+        for size, dtype in zip(sizes, (np.int8, np.int64, np.int64, np.float64, np.float64)):
+            arrays.append(np.frombuffer(buf, dtype=dtype, count=size // np.dtype(dtype).itemsize, offset=offset))
+            offset += size
+        self.used, self.hashes, self.visits, keys, q_values = arrays
+        self.keys = keys.reshape(self.capacity, self.state_size)
+        self.q = q_values.reshape(self.capacity, self.n_actions)
+
+    def __getstate__(self):
+        return {
+            "name": self.shm.name,
+            "capacity": self.capacity,
+            "state_size": self.state_size,
+            "n_actions": self.n_actions,
+            "lock_free": self.lock_free,
+            "locks": self.locks,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(
+            state["capacity"], state["state_size"], state["n_actions"],
+            lock_free=state["lock_free"], name=state["name"], locks=state["locks"],
+        )
+
+    def __len__(self):
+        return int(np.count_nonzero(self.used))
+
+    def __contains__(self, state):
+        return self.slot(state, insert=False) is not None
+
+    def lock(self, slot):
+        """Stripe lock guarding TD updates of a row (a no-op when lock_free)."""
+        if self.lock_free:
+            return contextlib.nullcontext()
+        return self.locks[slot % len(self.locks)]
+
+    def slot(self, state, insert=True):
+        """Row of state, claiming a free one if insert; None if absent or the table is full."""
+        slot = self.slots.get(state)
+        if slot is not None:
+            return slot
+        # Tuples of numbers hash the same in every process (no hash randomization)
+        state_hash = hash(state)
+        home = state_hash % self.capacity
+        for probe in range(self.capacity):
+            slot = (home + probe) % self.capacity
+            if not self.used[slot]:
+                if not insert:
+                    return None
+                # Claims are always locked, or two processes could take one slot
+                with self.locks[slot % len(self.locks)]:
+                    if not self.used[slot]:
+                        # Publish the key before the used flag so readers never see half a row
+                        self.keys[slot] = state
+                        self.hashes[slot] = state_hash
+                        self.used[slot] = 1
+                        self.slots[state] = slot
+                        return slot
+            if self.hashes[slot] == state_hash and tuple(self.keys[slot]) == state:
+                self.slots[state] = slot
+                return slot
+        if not self.full_warned:
+            print(f"Shared Q-table is full ({self.capacity} states); new states are not learned.")
+            self.full_warned = True
+        return None
+
+    def load(self, q_table, visits=None):
+        """Copies a dict Q-table (as read by read_q_table) into the shared rows."""
+        visits = visits or {}
+        for state, actions in q_table.items():
+            slot = self.slot(state)
+            if slot is None:
+                break
+            self.q[slot] = [actions.get(a, 0.0) for a in ACTIONS]
+            self.visits[slot] = visits.get(state, 0)
+
+    def snapshot(self):
+        """Copies of the used rows' (keys, Q-values, visits) arrays."""
+        slots = np.flatnonzero(self.used)
+        return self.keys[slots], self.q[slots], self.visits[slots]
+
+    def to_dict(self):
+        """(q_table, visits) dicts of the current rows, in the read_q_table format."""
+        return rows_to_dict(*self.snapshot())
+
+    def close(self):
+        """Detaches this process; the owner also frees the block."""
+        self.keys = self.q = self.used = self.hashes = self.visits = None
+        self.shm.close()
+        if self.owner_pid == os.getpid():
+            self.shm.unlink()
+
+
+class SharedQAgent(QLearningAgent):
+    """QLearningAgent whose Q-values live in a SharedQTable.
+
+    Action choice and the one-step update match QLearningAgent, so one
+    process alone learns exactly what a dict-backed agent would. Loading
+    and saving the file is left to whoever owns the table (see main()),
+    so several processes never overwrite each other's tables.
+    """
+
+    def __init__(self, x, y, cell_size, *args, table=None, **kwargs):
+        self.table = table if table is not None else SharedQTable()
+        super().__init__(x, y, cell_size, *args, **kwargs)
+
+    def load_q_table(self):
+        """The shared table stands in for the dict; file loading is done by its owner."""
+        return self.table
+
+    def save_q_table(self):
+        try:
+            write_q_table(self.qtable_path, *self.table.to_dict())
+        except Exception as e:
+            print(f"Error saving Q-table for agent {self.id} to {self.qtable_path}: {e}")
+
+    def checkpoint(self):
+        """Copies the used rows now; the returned function formats and writes them."""
+        rows, qtable_path = self.table.snapshot(), self.qtable_path
+
+        def write():
+            try:
+                write_q_table(qtable_path, *rows_to_dict(*rows))
+            except Exception as e:
+                print(f"Error saving Q-table for agent {self.id} to {qtable_path}: {e}")
+                return False
+            return True
+
+        return write
+
+    def freeze(self):
+        """Greedy evaluation mode: no exploration and no table updates."""
+        self.frozen = True
+        self.epsilon = 0.0
+
+    def choose_action(self, state):
+        """Chooses an action using epsilon-greedy strategy over the shared row."""
+        if self.frozen:
+            slot = self.table.slot(state, insert=False)
+            if slot is None:
+                return ACTIONS[UNSEEN_STATE_ACTION]
+            return ACTIONS[int(self.table.q[slot].argmax())]
+
+        slot = self.table.slot(state)
+        if self.rng.random() < self.epsilon:
+            return self.rng.choice(ACTIONS)  # Explore
+        if slot is None:
+            return self.rng.choice(ACTIONS)  # Table full: nothing to exploit
+        q_values = self.table.q[slot].tolist()
+        max_q = max(q_values)
+        best_actions = [a for a, q in zip(ACTIONS, q_values) if abs(q - max_q) < 1e-6]
+        action = self.rng.choice(best_actions)
+        if self.tracer.active:
+            self.tracer.emit(DEBUG, self.id, "exploit", action=action, max_q=max_q)
+        return action
+
+    def update_q_value(self, reward, next_state):
+        """Updates the previous state-action pair; visits are counted in the shared table."""
+        if self.prev_state is not None and self.prev_action is not None and not self.frozen:
+            self.learn(self.prev_state, self.prev_action, reward, next_state)
+        self.total_reward += reward
+
+    def learn(self, state, action, reward, next_state):
+        """One-step Q-learning update under the stripe lock of the updated row."""
+        table = self.table
+        slot = table.slot(state)
+        next_slot = table.slot(next_state)
+        if slot is None or next_slot is None:
+            return
+        action_index = ACTIONS.index(action)
+        with table.lock(slot):
+            old_q = table.q[slot, action_index]
+            next_max_q = table.q[next_slot].max()
+            new_q = old_q + self.alpha * (reward + self.gamma * next_max_q - old_q)
+            table.q[slot, action_index] = new_q
+            table.visits[slot] += 1
+
+        if self.tracer.active:
+            self.tracer.emit(
+                DEBUG,
+                self.id,
+                "q_update",
+                state=state,
+                action=action,
+                reward=reward,
+                next_state=next_state,
+                old_q=float(old_q),
+                new_q=float(new_q),
+            )
+
+
+def train_worker(tables, maze_file, episodes, max_steps, seed):
+    """Runs headless episodes, learning into the shared tables (one per Q-table path)."""
+    env = HideAndSeekEnv(maze_file, seed=seed, max_steps=max_steps)
+    env.reset()
+    learners = []
+    for agent in env.agents:
+        path = f"qtable_agent_{agent.type}_{agent.id}.txt"
+        learners.append(
+            SharedQAgent(
+                agent.x, agent.y, env.cell_size, id=agent.id, type=agent.type,
+                qtable_path=path, rng=env.rng, table=tables[path],
+            )
+        )
+    for episode in range(episodes):
+        rollout = collect_rollout(env, learners, max_steps)
+        update_from_rollout(learners, rollout)
+        caught = sum(h.destroyed for h in env.hiders)
+        print(f"🧵 worker {seed}: episode {episode}, {caught}/{len(env.hiders)} hiders caught")
+    for table in tables.values():
+        table.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Train the maze's Q-tables from several processes sharing them in memory"
+    )
+    parser.add_argument("maze_file", nargs="?", default="maze3.txt")
+    parser.add_argument("--qtable-dir", default=".")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--episodes", type=int, default=5, help="Episodes per worker")
+    parser.add_argument("--max-steps", type=int, default=ROUND_STEPS)
+    parser.add_argument("--capacity", type=int, default=2**20, help="States per shared table")
+    parser.add_argument(
+        "--lock-free",
+        action="store_true",
+        help="Hogwild updates without stripe locks (a few concurrent updates may be lost)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    env = HideAndSeekEnv(args.maze_file)
+    env.reset()
+    paths = sorted({f"qtable_agent_{a.type}_{a.id}.txt" for a in env.agents})
+    tables = {}
+    for path in paths:
+        table = SharedQTable(capacity=args.capacity, lock_free=args.lock_free)
+        file_path = os.path.join(args.qtable_dir, path)
+        if os.path.exists(file_path):
+            table.load(*read_q_table(file_path))
+        tables[path] = table
+
+    workers = args.workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    processes = [
+        multiprocessing.Process(
+            target=train_worker,
+            args=(tables, args.maze_file, args.episodes, args.max_steps, args.seed + i),
+        )
+        for i in range(workers)
+    ]
+    try:
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        # Only this process writes the files, once, so no worker's learning is overwritten
+        for path, table in tables.items():
+            write_q_table(os.path.join(args.qtable_dir, path), *table.to_dict())
+            print(f"💾 {path}: {len(table)} states, {int(table.visits.sum())} updates")
+        print(f"⏱️ {workers} workers in {time.perf_counter() - start:.1f}s")
+    finally:
+        for table in tables.values():
+            table.close()
+
+
+if __name__ == "__main__":
+    main()
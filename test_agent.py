@@ -1,12 +1,12 @@
 import pygame
 import sys
-import math
 import random
-from agent import Agent
+from agent import Agent, direction
 
 class RandomAgent(Agent):
-    def __init__(self, x, y, cell_size):
-        super().__init__(x, y, cell_size)
+    def __init__(self, x, y, cell_size, rng=None):
+        super().__init__(x, y, "hider", cell_size)
+        self.rng = rng if rng is not None else random
         self.move_timer = 0
         self.state = "move"  # "move" or "rotate"
         self.rotation_pending = 0  # Degrees left to rotate
@@ -23,7 +23,7 @@ class RandomAgent(Agent):
                 else:
                     self.state = "rotate"
                     self.rotation_pending = 10
-                    self.rotation_dir = random.choice([-1, 1])  # Left or right
+                    self.rotation_dir = self.rng.choice([-1, 1])  # Left or right
             elif self.state == "rotate":
                 self.angle = (self.angle + self.rotation_dir) % 360
                 self.rotation_pending -= 1
@@ -31,8 +31,9 @@ class RandomAgent(Agent):
                     self.state = "move"
 
     def _can_move_forward(self, maze, other_agents=[]):
-        look_x = self.x + math.cos(math.radians(self.angle)) * self.lookahead_distance
-        look_y = self.y + math.sin(math.radians(self.angle)) * self.lookahead_distance
+        cos_a, sin_a = direction(self.angle)
+        look_x = self.x + cos_a * self.lookahead_distance
+        look_y = self.y + sin_a * self.lookahead_distance
 
         # Check wall
         for y, row in enumerate(maze):
@@ -43,8 +44,8 @@ class RandomAgent(Agent):
                         return False
 
         # Check agent collision
-        dx = math.cos(math.radians(self.angle)) * self.move_step
-        dy = math.sin(math.radians(self.angle)) * self.move_step
+        dx = cos_a * self.move_step
+        dy = sin_a * self.move_step
         for other in other_agents:
             if self.will_collide_with(other, dx, dy):
                 return False
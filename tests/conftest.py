@@ -0,0 +1,28 @@
+# conftest.py
+
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def maze_path(name="maze3.txt"):
+    return os.path.join(ROOT, name)
+
+
+def row(**q):
+    """A Q-table row with every action at 0.0 except the given ones."""
+    values = dict.fromkeys(["move", "left", "right", "open", "close"], 0.0)
+    values.update(q)
+    return values
+
+
+@pytest.fixture(autouse=True)
+def qtable_dir(tmp_path, monkeypatch):
+    """Runs every test in a scratch directory, so no Q-table is read from or written to the repo."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
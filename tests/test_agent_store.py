@@ -0,0 +1,66 @@
+# test_agent_store.py
+
+import copy
+import pickle
+import numpy as np
+from agent import Agent
+from agent_store import AgentStore, AgentView
+from environment import HideAndSeekEnv
+from conftest import maze_path
+
+
+def test_attributes_move_into_the_columns():
+    seeker, hider = Agent(1, 1, "seeker", 20), Agent(2, 3, "hider", 20)
+    assert "x" in seeker.__dict__
+    store = AgentStore(capacity=1)
+    store.attach(seeker)
+    store.attach(hider)  # Grows the columns
+    assert "x" not in seeker.__dict__ and isinstance(seeker, Agent)
+    assert list(store.column("x")) == [30.0, 50.0]
+    assert list(store.column("type")) == [0, 1]
+    hider.destroyed = True
+    hider.total_reward += 5
+    assert list(store.alive()) == [True, False]
+    assert store.column("total_reward")[1] == 5.0
+    store.column("angle")[0] = 90
+    assert seeker.angle == 90 and seeker.type == "seeker"
+    assert store.states().tolist() == [[30.0, 30.0, 90.0], [50.0, 70.0, 0.0]]
+    assert "x" not in vars(Agent) and "x" in Agent(1, 1, "hider", 20).__dict__
+
+
+def test_views_read_and_write_the_columns():
+    store = AgentStore()
+    store.attach(Agent(1, 1, "seeker", 20))
+    store.attach(Agent(2, 3, "hider", 20))
+    view = store.view(1)
+    assert not hasattr(view, "__dict__") and AgentView.__slots__ == ("_store", "_slot")
+    assert (view.x, view.type, view.destroyed) == (50.0, "hider", False)
+    view.destroyed = True
+    view.angle = 30
+    assert store.agents[1].destroyed and store.agents[1].angle == 30
+    assert [v.type for v in store.views()] == ["seeker", "hider"]
+
+
+def test_store_backed_agents_pickle():
+    env = HideAndSeekEnv(maze_path(), seed=0)
+    env.reset()
+    env.agents[0].x += 3
+    loaded = pickle.loads(pickle.dumps(env.agents[0]))
+    assert type(loaded) is type(env.agents[0]) and isinstance(loaded, Agent)
+    assert (loaded.x, loaded.y, loaded.type) == (env.agents[0].x, env.agents[0].y, env.agents[0].type)
+    assert loaded._store.agents[0] is loaded
+    copied = copy.deepcopy(env.agents[1])
+    copied.x += 1
+    assert copied.x == env.agents[1].x + 1
+    assert pickle.loads(pickle.dumps(Agent(1, 1, "hider", 20))).type == "hider"
+
+
+def test_store_clone_is_independent():
+    env = HideAndSeekEnv(maze_path(), seed=0)
+    env.reset()
+    twin = env.clone()
+    twin.agents[0].x += 10
+    twin.agents[1].destroyed = True
+    assert env.agents[0].x + 10 == twin.agents[0].x
+    assert not env.agents[1].destroyed
+    assert np.array_equal(env.get_observations()[1:], twin.get_observations()[1:])
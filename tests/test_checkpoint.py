@@ -0,0 +1,44 @@
+# test_checkpoint.py
+
+import random
+from checkpoint import CheckpointWriter
+from q_learning import QLearningAgent, read_q_table
+
+
+def agent(path):
+    return QLearningAgent(1, 1, 20, qtable_path=path, rng=random.Random(0))
+
+
+def test_checkpoints_are_copies_taken_at_submit():
+    learner = agent("q.txt")
+    learner.q_table[(1, 2, 3)] = dict.fromkeys(learner.actions, 0.0)
+    learner.q_table[(1, 2, 3)]["move"] = 1.0
+    writer = CheckpointWriter()
+    writer.submit([learner])
+    learner.q_table[(1, 2, 3)]["move"] = 2.0  # Later learning is not in this checkpoint
+    writer.close()
+    assert read_q_table("q.txt")[0][(1, 2, 3)]["move"] == 1.0
+    assert (writer.written, writer.failed) == (1, 0)
+
+
+def test_failed_write_keeps_the_previous_file_and_is_counted():
+    learner = agent("q.txt")
+    learner.q_table[(1, 2, 3)] = dict.fromkeys(learner.actions, 1.0)
+    writer = CheckpointWriter()
+    writer.submit([learner])
+    writer.wait()
+    learner.q_table[(4, 5, 6)] = {"move": "not a number"}  # Formatting fails half way through the file
+    writer.submit([learner, agent("missing_dir/q.txt")])
+    writer.close()
+    assert list(read_q_table("q.txt")[0]) == [(1, 2, 3)]
+    assert (writer.written, writer.failed) == (1, 2)
+
+
+def test_resubmitted_tables_are_written_once():
+    learner = agent("q.txt")
+    writer = CheckpointWriter()
+    with writer._condition:  # Holds the writer thread back so both submissions queue up
+        writer.submit([learner])
+        writer.submit([learner])
+    writer.close()
+    assert (writer.superseded, writer.written) == (1, 1)
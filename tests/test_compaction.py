@@ -0,0 +1,49 @@
+# test_compaction.py
+
+import random
+from q_learning import QLearningAgent, compact_q_table
+from conftest import row
+
+
+def test_compaction_drops_unused_rows_and_merges_by_visits():
+    q_table = {
+        (10, 10, 0): row(move=1.0),
+        (11, 9, 0): row(move=4.0),
+        (50, 50, 90): row(),
+    }
+    visits = {(10, 10, 0): 3, (11, 9, 0): 1}
+    compacted, compacted_visits = compact_q_table(q_table, visits, position_step=10)
+    assert list(compacted) == [(10, 10, 0)]
+    assert compacted[(10, 10, 0)]["move"] == (3 * 1.0 + 1 * 4.0) / 4
+    assert compacted_visits == {(10, 10, 0): 4}
+
+
+def test_compaction_evicts_least_recent():
+    q_table = {(i, 0, 0): row(move=1.0) for i in range(4)}
+    visits = {(2, 0, 0): 5, (0, 0, 0): 1, (3, 0, 0): 1, (1, 0, 0): 9}
+    compacted, _ = compact_q_table(q_table, visits, max_states=2, evict="lru")
+    assert set(compacted) == {(3, 0, 0), (1, 0, 0)}
+    compacted, _ = compact_q_table(q_table, visits, max_states=2, evict="visits")
+    assert set(compacted) == {(2, 0, 0), (1, 0, 0)}
+
+
+def test_states_created_survives_compaction():
+    agent = QLearningAgent(1, 1, 20, qtable_path="q.txt", rng=random.Random(0))
+    agent.max_states = 2
+    for i in range(6):
+        agent.prev_state, agent.prev_action = (i, 0, 0), "move"
+        agent.update_q_value(1.0, (i + 1, 0, 0))
+    assert len(agent.q_table) <= 3
+    assert agent.states_created >= 7  # Evicted rows that come back are counted again
+    agent.reset()
+    assert agent.states_created == 0
+
+
+def test_frozen_agent_looks_up_coarse_states():
+    agent = QLearningAgent(1, 1, 20, qtable_path="q.txt", rng=random.Random(0))
+    agent.x, agent.y, agent.angle = 31, 29, 0
+    agent.q_table = {(30, 30, 0): row(right=1.0)}
+    agent.position_step = 10
+    agent.freeze()
+    assert agent.get_state() == (30, 30, 0)
+    assert agent.choose_action(agent.get_state()) == "right"
@@ -0,0 +1,32 @@
+# test_determinism.py
+
+from conftest import maze_path
+from maze import Maze
+
+
+def run(seed, ticks=150):
+    maze_object = Maze(seed=seed)
+    maze, doors = maze_object.read_maze(maze_path())
+    seekers, hiders = maze_object.draw_agents(maze, 20)
+    for _ in range(ticks):
+        for agent in seekers:
+            maze = agent.step(maze, None, hiders, doors)
+        for agent in hiders:
+            maze = agent.step(maze, None, seekers, doors)
+    return [(a.x, a.y, a.angle, a.total_reward, a.destroyed) for a in seekers + hiders], maze
+
+
+def test_same_seed_replays_identically():
+    assert run(7) == run(7)
+
+
+def test_different_seeds_diverge():
+    assert run(7)[0] != run(8)[0]
+
+
+def test_free_position_uses_the_maze_rng():
+    maze_object = Maze(seed=3)
+    maze, _ = maze_object.read_maze(maze_path())
+    first = [maze_object.get_free_position(maze) for _ in range(5)]
+    maze_object.rng.seed(3)
+    assert [maze_object.get_free_position(maze) for _ in range(5)] == first
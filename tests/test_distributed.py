@@ -0,0 +1,47 @@
+# test_distributed.py
+
+import socket
+import threading
+import numpy as np
+import pytest
+from distributed import ActorPolicy, encode_rows, recv_message, send_message
+
+
+def test_frames_carry_header_and_arrays():
+    left, right = socket.socketpair()
+    states = np.arange(12, dtype=np.float32).reshape(4, 3)
+    actions = np.array([0, 4, 2, 1], dtype=np.uint8)
+    send_message(left, "batch", {"states": states, "actions": actions, "empty": np.zeros((0, 3))}, agent="seeker_0")
+    send_message(left, "done")
+    header, arrays = recv_message(right)
+    assert header == {"kind": "batch", "agent": "seeker_0"}
+    assert np.array_equal(arrays["states"], states) and arrays["states"].dtype == np.float32
+    assert np.array_equal(arrays["actions"], actions)
+    assert arrays["empty"].shape == (0, 3)
+    assert recv_message(right) == ({"kind": "done"}, {})
+    left.close()
+    with pytest.raises(ConnectionError):
+        recv_message(right)
+    right.close()
+
+
+def test_frames_survive_split_reads():
+    left, right = socket.socketpair()
+    big = np.random.default_rng(0).random((50000, 3))
+    sender = threading.Thread(target=send_message, args=(left, "batch", {"states": big}))
+    sender.start()
+    header, arrays = recv_message(right)
+    sender.join()
+    assert header["kind"] == "batch" and np.array_equal(arrays["states"], big)
+    left.close()
+    right.close()
+
+
+def test_policy_rows_round_trip():
+    q_table = {(30, 50, 90): {"move": 1.5, "left": -2.0}, (10, 10, 0): {"open": 3.0}}
+    keys, q_values = encode_rows(q_table, list(q_table))
+    assert keys.dtype == q_values.dtype == np.float32
+    policy = ActorPolicy(1, 1, 20, qtable_path="unused.txt")
+    policy.apply_rows(keys, q_values)
+    assert policy.q_table[(30.0, 50.0, 90.0)] == {"move": 1.5, "left": -2.0, "right": 0.0, "open": 0.0, "close": 0.0}
+    assert policy.q_table[(10.0, 10.0, 0.0)]["open"] == 3.0
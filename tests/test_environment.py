@@ -0,0 +1,58 @@
+# test_environment.py
+
+import numpy as np
+import pytest
+from conftest import maze_path
+from environment import HideAndSeekEnv, collect_rollout, decide, make_learners, update_from_rollout
+
+
+def make_env(**kwargs):
+    env = HideAndSeekEnv(maze_path(), seed=1, **kwargs)
+    env.reset()
+    return env
+
+
+def test_reset_and_step_shapes():
+    env = make_env(max_steps=3)
+    obs, info = env.reset()
+    assert obs.shape == (env.n_agents, HideAndSeekEnv.OBSERVATION_SIZE)
+    assert info["types"] == sorted(info["types"], key=lambda t: t != "seeker")
+    for step in range(3):
+        obs, rewards, terminated, truncated, info = env.step([0] * env.n_agents)
+    assert rewards.shape == terminated.shape == truncated.shape == (env.n_agents,)
+    assert truncated.all() and info["step"] == 3
+
+
+def test_step_rejects_wrong_action_count():
+    env = make_env()
+    with pytest.raises(ValueError):
+        env.step([0])
+
+
+def test_observations_match_agent_states():
+    env = make_env()
+    obs, *_ = env.step(["move", "left", "right"][: env.n_agents])
+    assert [tuple(row) for row in obs] == [a.get_state() for a in env.agents]
+
+
+def test_rollout_learns_through_learner_states():
+    env = make_env(max_steps=40)
+    learners = make_learners(env)
+    for learner in learners:
+        learner.position_step = 4
+    rollout = collect_rollout(env, learners, 40)
+    steps = len(rollout["actions"])
+    assert len(rollout["states"]) == len(rollout["next_states"]) == steps
+    assert rollout["states"][0][0] == learners[0].state_from(rollout["obs"][0, 0])
+    update_from_rollout(learners, rollout)
+    # Coarsened states only: every key is a multiple of position_step
+    assert learners[0].q_table
+    assert all(state[0] % 4 == 0 and state[1] % 4 == 0 for state in learners[0].q_table)
+
+
+def test_decide_skips_dead_agents():
+    env = make_env()
+    learners = make_learners(env)
+    obs = env.get_observations()
+    alive = np.zeros(env.n_agents, dtype=bool)
+    assert decide(learners, obs, alive).tolist() == [0] * env.n_agents
@@ -0,0 +1,34 @@
+# test_evaluation.py
+
+import random
+import pytest
+from q_learning import QLearningAgent, Schedule, write_q_table
+from conftest import row
+
+
+def test_schedule_decays_towards_end():
+    schedule = Schedule(0.2, 0.01, 0.5)
+    assert schedule.value(0) == pytest.approx(0.2)
+    assert schedule.value(1) == pytest.approx(0.105)
+    assert schedule.value(50) == pytest.approx(0.01)
+    assert Schedule(0.2, 0.01, 1.0).value(100) == pytest.approx(0.2)
+
+
+def test_begin_round_applies_schedules():
+    agent = QLearningAgent(1, 1, 20, qtable_path="q.txt", rng=random.Random(0))
+    agent.epsilon_schedule = Schedule(0.2, 0.0, 0.5)
+    agent.alpha_schedule = Schedule(0.1, 0.0, 0.5)
+    agent.begin_round(2)
+    assert (agent.epsilon, agent.alpha) == pytest.approx((0.05, 0.025))
+
+
+def test_frozen_agent_is_greedy_and_leaves_the_table_alone():
+    write_q_table("q.txt", {(30.0, 30.0, 0.0): row(right=2.0, open=1.0)})
+    agent = QLearningAgent(1, 1, 20, qtable_path="q.txt", rng=random.Random(0))
+    agent.freeze()
+    assert all(agent.choose_action((30.0, 30.0, 0.0)) == "right" for _ in range(20))
+    assert agent.choose_action((1.0, 2.0, 3.0)) == "move"  # UNSEEN_STATE_ACTION
+    agent.prev_state, agent.prev_action = (30.0, 30.0, 0.0), "right"
+    agent.update_q_value(500.0, (1.0, 2.0, 3.0))
+    assert list(agent.q_table) == [(30.0, 30.0, 0.0)]
+    assert agent.q_table[(30.0, 30.0, 0.0)]["right"] == 2.0
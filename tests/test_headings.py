@@ -0,0 +1,43 @@
+# test_headings.py
+
+import math
+import pytest
+from agent import HEADING_VECTORS, NUM_HEADINGS, Agent, direction, ray_fan
+
+
+def test_direction_matches_trig():
+    for angle in (0, 30, 90, 210, 330, 45, -30, 400):
+        radians = math.radians(angle)
+        assert direction(angle) == pytest.approx((math.cos(radians), math.sin(radians)))
+    assert direction(90) is HEADING_VECTORS[3]
+
+
+def test_rotation_walks_the_headings():
+    agent = Agent(1, 1, "seeker", 20)
+    agent.angle = 0
+    agent.rotate_left()
+    assert (agent.angle, agent.heading) == (330, NUM_HEADINGS - 1)
+    for _ in range(NUM_HEADINGS):
+        agent.rotate_right()
+    assert (agent.angle, agent.heading) == (330, NUM_HEADINGS - 1)
+
+
+def test_ray_fan_spans_the_field_of_view_and_is_cached():
+    agent = Agent(1, 1, "seeker", 20)
+    fan = ray_fan(90, agent.half_fov, agent.step_angle, agent.casted_rays)
+    assert len(fan) == agent.casted_rays
+    start = math.radians(90) - agent.half_fov
+    assert fan[0] == pytest.approx((math.cos(start), math.sin(start)))
+    assert fan[-1] == pytest.approx(
+        (math.cos(start + (agent.casted_rays - 1) * agent.step_angle), math.sin(start + (agent.casted_rays - 1) * agent.step_angle))
+    )
+    assert ray_fan(90, agent.half_fov, agent.step_angle, agent.casted_rays) is fan
+
+
+def test_move_follows_heading():
+    maze = [list("wwww"), list("w  w"), list("w  w"), list("wwww")]
+    agent = Agent(1, 1, "seeker", 20)
+    agent.angle = 90
+    x, y = agent.x, agent.y
+    agent.move_forward(maze, None)
+    assert (agent.x, agent.y) == pytest.approx((x, y + agent.move_step))
@@ -0,0 +1,58 @@
+# test_line_of_sight.py
+
+import vision
+from agent import Agent
+from environment import HideAndSeekEnv
+from maze import Maze
+from vision import LineOfSight
+from conftest import maze_path
+
+
+MAZE = ["wwwwwww", "w  w  w", "w  d  w", "w  w  w", "wwwwwww"]
+
+
+def test_walls_and_doors_block_sight():
+    grid = [list(row) for row in MAZE]
+    sight = LineOfSight(grid, 20).attach(grid)
+    left, right, corner = Agent(1, 2, "seeker", 20), Agent(5, 2, "hider", 20), Agent(2, 1, "hider", 20)
+    assert sight.can_see(left, corner) and sight.can_see(corner, left)
+    assert not sight.can_see(left, right)
+    grid[2][3] = "o"
+    vision.note_door_toggle()
+    assert sight.can_see(left, right) and sight.can_see(right, left)
+    assert sight.seen_by_any(right, [left])
+    left.destroyed = True
+    assert not sight.seen_by_any(right, [left])
+
+
+def test_tables_are_shared_per_layout():
+    maze_object = Maze()
+    grid = [list(row) for row in MAZE]
+    first = maze_object.line_of_sight(grid, 20)
+    other = [row[:] for row in grid]
+    other[2][3] = "o"
+    second = maze_object.line_of_sight(other, 20)
+    assert first.static is second.static
+    assert first.visible != second.visible
+
+
+def test_env_reports_hiders_in_sight_on_demand():
+    env = HideAndSeekEnv(maze_path(), seed=0)
+    _, info = env.reset()
+    assert "hiders_in_sight" not in info
+    expected = [
+        h.id for h in env.hiders if any(env.line_of_sight.can_see(s, h) for s in env.seekers)
+    ]
+    assert env.hiders_in_sight() == expected
+
+
+def test_shared_tables_are_capped(monkeypatch):
+    monkeypatch.setattr(Maze, "_line_of_sight", {})
+    monkeypatch.setattr(Maze, "MAX_LINE_OF_SIGHT", 2)
+    maze_object = Maze()
+    grid = [list(row) for row in MAZE]
+    first = maze_object.line_of_sight(grid, 20)
+    maze_object.line_of_sight(grid, 10)
+    maze_object.line_of_sight(grid, 30)
+    assert len(Maze._line_of_sight) == 2
+    assert maze_object.line_of_sight(grid, 20).static is not first.static
@@ -0,0 +1,37 @@
+# test_linear_q.py
+
+import random
+import numpy as np
+import pytest
+from conftest import maze_path
+from environment import HideAndSeekEnv, collect_rollout, make_learners, update_from_rollout
+from linear_q import LinearQAgent, TileCoder
+
+
+def test_encode_is_fixed_size_and_generalizes():
+    coder = TileCoder(20, 160)
+    state = coder.encode(105.0, 203.0, 90)
+    assert len(state) == coder.num_tilings + 1
+    assert all(0 <= f < coder.memory_size for f in state)
+    # A pixel away shares most position tiles
+    nearby = coder.encode(106.0, 203.0, 90)
+    assert len(set(state) & set(nearby)) >= coder.num_tilings // 2
+
+
+def test_colliding_features_each_get_their_update():
+    agent = LinearQAgent(1, 1, 20, id=1, type="seeker", qtable_path="q.txt", rng=random.Random(0))
+    state = (5, 5, 9)  # Two active features hashed to the same index
+    agent.learn(state, "move", 10.0, (1, 2, 3))
+    step = agent.alpha / len(state) * 10.0
+    assert agent.weights[0, 5] == pytest.approx(2 * step)
+    assert agent.weights[0, 9] == pytest.approx(step)
+
+
+def test_learns_from_env_rollouts():
+    env = HideAndSeekEnv(maze_path(), seed=2, max_steps=30)
+    env.reset()
+    learners = make_learners(env, agent_class=LinearQAgent)
+    rollout = collect_rollout(env, learners, 30)
+    update_from_rollout(learners, rollout)
+    assert all(len(state) == learners[0].coder.num_active for state in rollout["states"][-1])
+    assert np.count_nonzero(learners[0].weights)
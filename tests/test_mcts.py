@@ -0,0 +1,56 @@
+# test_mcts.py
+
+import random
+from agent import ACTIONS, Agent
+from maze import Maze
+from mcts import MCTS, ForwardModel, MCTSSeeker
+
+
+def world():
+    grid = [list(row) for row in ["wwwwwwww", "w  d   w", "wwwwwwww"]]
+    seeker = Agent(2, 1, "seeker", 20)
+    hider = Agent(5, 1, "hider", 20)
+    return grid, seeker, hider
+
+
+def model_for(grid, seeker, hiders):
+    return ForwardModel(seeker, grid, hiders, Maze().line_of_sight(grid, 20))
+
+
+def test_model_steps_on_its_own_copy_and_restores():
+    grid, seeker, hider = world()
+    model = model_for(grid, seeker, [hider])
+    root = model.state()
+    assert model.step("open") > 0
+    assert model.grid[1][3] == "o" and grid[1][3] == "d"
+    model.step("right")
+    assert model.state() != root
+    model.restore(root)
+    assert model.state() == root and model.grid[1][3] == "d"
+    assert (model.body.x, model.body.y, model.body.angle) == (seeker.x, seeker.y, seeker.angle)
+
+
+def test_search_is_seeded_and_opens_the_door():
+    grid, seeker, hider = world()
+    picks = {MCTS(iterations=300, seed=0).search(model_for(grid, seeker, [hider])) for _ in range(3)}
+    assert picks == {"open"}
+
+
+def test_search_without_targets_returns_none():
+    grid, seeker, hider = world()
+    hider.destroyed = True
+    model = model_for(grid, seeker, [hider])
+    assert model.done
+    assert MCTS(iterations=10).search(model) is None
+
+
+def test_seeker_falls_back_when_nothing_is_left_to_find():
+    grid, _, hider = world()
+    seeker = MCTSSeeker(2, 1, 20, type="seeker", qtable_path="q.txt", rng=random.Random(0))
+    seeker.search.iterations = 20
+    assert seeker.choose_action(seeker.get_state()) in ACTIONS  # Nothing observed yet
+    seeker.observe(grid, [hider])
+    assert seeker.choose_action(seeker.get_state()) in ACTIONS
+    hider.destroyed = True
+    seeker.observe(grid, [hider])
+    assert seeker.choose_action(seeker.get_state()) in ACTIONS
@@ -0,0 +1,55 @@
+# test_metrics.py
+
+import json
+import random
+import pytest
+from metrics import ROUND_FIELDS, STEP_FIELDS, MetricsWriter, RunningStat, summarize
+from q_learning import QLearningAgent
+
+
+def step_fields(step, seeker_reward):
+    return dict(round=0, step=step, steps_per_sec=60.0, alive_hiders=2, seeker_reward=seeker_reward, hider_reward=0.0)
+
+
+def test_writer_batches_and_keeps_field_order():
+    writer = MetricsWriter("metrics.jsonl", batch_size=2)
+    writer.record("step", **step_fields(0, 1.0))
+    assert open("metrics.jsonl").read() == ""
+    writer.record("step", **step_fields(1, 3.0))
+    writer.record("step", **step_fields(2, 5.0))
+    writer.close()
+    rows = [json.loads(line) for line in open("metrics.jsonl")]
+    assert [list(row) for row in rows] == [["kind"] + STEP_FIELDS] * 3
+    with pytest.raises(ValueError):
+        MetricsWriter("other.jsonl").record("step", round=0)
+
+
+def test_round_records_round_trip_through_summarize():
+    seeker = QLearningAgent(1, 1, 20, type="seeker", qtable_path="s.txt", id=0, rng=random.Random(0))
+    hider = QLearningAgent(2, 2, 20, type="hider", qtable_path="h.txt", id=1, rng=random.Random(0))
+    seeker.add_state((1, 2, 3))
+    seeker.catches = 1
+    hider.destroyed = True
+    writer = MetricsWriter("metrics.jsonl")
+    writer.record_round(0, [seeker], [hider], steps=100, steps_per_sec=50.0)
+    writer.record("step", **step_fields(0, 1.0))
+    writer.record("step", **step_fields(1, 3.0))
+    writer.close()
+
+    rows = [json.loads(line) for line in open("metrics.jsonl")]
+    assert [list(row) for row in rows[:2]] == [["kind"] + ROUND_FIELDS] * 2
+    stats = summarize("metrics.jsonl")
+    assert stats[("round", "seeker", "states_created")].mean == 1
+    assert stats[("round", "seeker", "catches")].mean == 1
+    assert stats[("round", "hider", "caught")].mean == 1
+    assert stats[("step", "all", "seeker_reward")].mean == 2.0
+    assert ("round", "seeker", "agent_id") not in stats
+
+
+def test_running_stat():
+    stat = RunningStat()
+    for value in (2.0, 4.0, 4.0, 4.0, 5.0, 5.0, 7.0, 9.0):
+        stat.add(value)
+    assert (stat.count, stat.mean, stat.min, stat.max) == (8, 5.0, 2.0, 9.0)
+    assert stat.std == pytest.approx((32 / 7) ** 0.5)
+    assert stat.ci95 == pytest.approx(1.96 * stat.std / 8**0.5)
@@ -0,0 +1,38 @@
+# test_metrics_server.py
+
+import json
+import urllib.request
+import pytest
+import metrics_server
+from metrics_server import LiveMetrics, MetricsServer
+
+
+def test_steps_per_sec_counts_the_whole_tick(monkeypatch):
+    clock = iter([0.0, 0.1, 0.2, 10.0, 10.1])
+    monkeypatch.setattr(metrics_server.time, "perf_counter", lambda: next(clock))
+    live = LiveMetrics(smoothing=1.0)
+    live.record_tick(render=0.01, step=0.01)
+    assert live.snapshot()["steps_per_sec"] == 0.0
+    live.record_tick(render=0.01, step=0.01)
+    live.record_tick(render=0.01, step=0.01)
+    snapshot = live.snapshot()
+    assert snapshot["steps_per_sec"] == pytest.approx(10.0)  # Not 1 / 0.02
+    assert snapshot["phase_ms"]["step"] == pytest.approx(10.0)
+
+    live.record_round([])
+    live.record_tick(render=0.01, step=0.01)  # The gap across the round end is not a tick
+    live.record_tick(render=0.01, step=0.01)
+    assert live.snapshot()["steps_per_sec"] == pytest.approx(10.0)
+    assert live.snapshot()["total_steps"] == 5
+
+
+def test_server_serves_snapshot():
+    live = LiveMetrics()
+    live.record_tick(step=0.01)
+    server = MetricsServer(live, port=0).start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            body = json.loads(response.read())
+    finally:
+        server.stop()
+    assert body["total_steps"] == 1
@@ -0,0 +1,49 @@
+# test_options.py
+
+import random
+import sys
+import pytest
+import main1
+from agent import Agent
+from options import OptionAgent, advance_cell, repeat_action
+
+
+def parse(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["main1.py", *argv])
+    return main1.parse_args()
+
+
+def test_options_reject_mcts(monkeypatch):
+    assert parse(monkeypatch, "--options", "--action-repeat", "4").action_repeat == 4
+    assert parse(monkeypatch, "--mcts").mcts
+    for argv in (["--options", "--mcts"], ["--action-repeat", "2", "--mcts"], ["--options", "--learner", "linear"]):
+        with pytest.raises(SystemExit):
+            parse(monkeypatch, *argv)
+
+
+def test_primitive_runs_stop_at_walls():
+    grid = [list(row) for row in ["wwwww", "w   w", "wwwww"]]
+    agent = Agent(1, 1, "seeker", 20)
+    moves = 0
+    for action in repeat_action(agent, "move", 100):
+        agent.move_forward(grid, None)
+        moves += 1
+    assert 1 < moves < 100
+    grid = [list(row) for row in ["wwwwwww", "w     w", "wwwwwww"]]
+    agent = Agent(1, 1, "seeker", 20)
+    for action in advance_cell(agent):
+        agent.move_forward(grid, None)
+    assert agent.x == 30 + 20
+
+
+def test_smdp_update_discounts_by_duration():
+    agent = OptionAgent(1, 1, 20, qtable_path="q.txt", rng=random.Random(0))
+    assert agent.qtable_path == "q_options.txt"
+    agent.alpha, agent.gamma = 0.5, 0.9
+    agent.q_table[(2, 0, 0)] = dict.fromkeys(agent.actions, 0.0)
+    agent.q_table[(2, 0, 0)]["through_door"] = 10.0
+    agent.option_ticks = 3
+    agent.learn((1, 0, 0), "cell", 4.0, (2, 0, 0))
+    assert agent.q_table[(1, 0, 0)]["cell"] == pytest.approx(0.5 * (4.0 + 0.9**3 * 10.0))
+    assert set(agent.q_table[(1, 0, 0)]) == set(agent.actions)
+    assert agent.states_created == 1
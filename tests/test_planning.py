@@ -0,0 +1,54 @@
+# test_planning.py
+
+import random
+import time
+from planning import PrioritizedSweepingPlanner
+from q_learning import QLearningAgent
+
+A, B, C = (0, 0, 0), (2, 0, 0), (4, 0, 0)
+
+
+def make_agent():
+    agent = QLearningAgent(1, 1, 20, qtable_path="q.txt", rng=random.Random(0))
+    agent.planner = PrioritizedSweepingPlanner(agent)
+    return agent
+
+
+def real_step(agent, state, action, reward, next_state):
+    agent.prev_state, agent.prev_action = state, action
+    agent.update_q_value(reward, next_state)
+
+
+def test_planning_propagates_reward_to_predecessors():
+    agent = make_agent()
+    real_step(agent, A, "move", 0.0, B)
+    real_step(agent, B, "move", 100.0, C)
+    assert agent.q_table[A]["move"] == 0.0
+    assert agent.planner.plan(50) > 0
+    assert agent.q_table[A]["move"] > 0.0
+    assert agent.q_table[B]["move"] > 10.0
+
+
+def test_model_keeps_last_transition_and_is_bounded():
+    agent = make_agent()
+    agent.planner.max_model_size = 2
+    real_step(agent, A, "move", 1.0, B)
+    real_step(agent, A, "move", 2.0, C)
+    assert agent.planner.model[(A, "move")] == (2.0, C)
+    assert (A, "move") not in agent.planner.predecessors.get(B, set())
+    real_step(agent, B, "left", 0.0, B)
+    real_step(agent, C, "left", 0.0, C)
+    assert len(agent.planner.model) == 2
+
+
+def test_background_thread_plans_and_stops():
+    agent = make_agent()
+    real_step(agent, A, "move", 0.0, B)
+    agent.planner.start()
+    real_step(agent, B, "move", 100.0, C)
+    deadline = time.time() + 5
+    while agent.q_table[A]["move"] == 0.0 and time.time() < deadline:
+        time.sleep(0.01)
+    agent.planner.stop()
+    assert agent.q_table[A]["move"] > 0.0
+    assert agent.planner._thread is None
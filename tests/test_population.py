@@ -0,0 +1,48 @@
+# test_population.py
+
+import random
+import pytest
+from maze import MAX_ROOMS, Maze
+from population import PopulationScheduler, build_levels
+
+
+def result(catch_rate, seeker_return=0.0):
+    return {"catch_rate": catch_rate, "seeker_return": seeker_return, "hider_return": 0.0}
+
+
+def test_generated_mazes_have_their_rooms():
+    maze_object = Maze(seed=0)
+    for rooms in range(MAX_ROOMS + 1):
+        grid = maze_object.generate_maze(rooms=rooms)
+        regions = {cell for row in grid for cell in row}
+        assert sum(row.count("o") for row in grid) == rooms
+        assert sum(row.count("h") for row in grid) == 2 and sum(row.count("s") for row in grid) == 1
+        assert ("2" in regions) == (rooms >= 1) and ("3" in regions) == (rooms >= 2)
+    with pytest.raises(ValueError):
+        maze_object.generate_maze(rooms=MAX_ROOMS + 1)
+
+
+def test_build_levels_appends_generated_mazes(qtable_dir):
+    levels = build_levels([], 2, str(qtable_dir), seed=0)
+    assert [path.rsplit("/", 1)[1] for path in levels] == ["generated_maze_1.txt", "generated_maze_2.txt"]
+
+
+def test_promotion_demotion_and_resume(qtable_dir):
+    scheduler = PopulationScheduler(str(qtable_dir), ["a.txt", "b.txt"], 2, window=2)
+    for _ in range(2):
+        scheduler.record((0, 1), result(1.0))
+    assert scheduler.pairs[(0, 1)]["level"] == 1
+    assert scheduler.pairs[(0, 1)]["catch_rates"] == []
+    for _ in range(2):
+        scheduler.record((0, 1), result(0.0))
+    assert scheduler.pairs[(0, 1)]["level"] == 0
+
+    batch = scheduler.select(2, random.Random(0))
+    assert len(batch) == 2
+    assert len({s for s, _ in batch}) == len({h for _, h in batch}) == 2
+
+    scheduler.generation = 3
+    scheduler.save()
+    resumed = PopulationScheduler(str(qtable_dir), ["a.txt", "b.txt"], 2, window=2)
+    assert resumed.load() and resumed.generation == 3
+    assert not PopulationScheduler(str(qtable_dir), ["a.txt"], 2).load()
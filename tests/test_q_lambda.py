@@ -0,0 +1,99 @@
+# test_q_lambda.py
+
+import random
+import numpy as np
+import pytest
+from conftest import maze_path
+from environment import HideAndSeekEnv, collect_rollout, learner_states, make_learners, update_from_rollout
+from q_lambda import EligibilityTraces, QLambdaAgent
+
+
+def make_agent(**kwargs):
+    return QLambdaAgent(1, 1, 20, id=1, type="seeker", qtable_path="q.txt", rng=random.Random(0), **kwargs)
+
+
+def test_traces_replace_decay_and_drop():
+    traces = EligibilityTraces(threshold=0.1, capacity=1)
+    traces.visit("a")
+    traces.decay(0.5)
+    traces.visit("b")  # Grows past the initial capacity
+    traces.visit("a")  # Replacing, not accumulating
+    assert dict(traces.items()) == {"a": 1.0, "b": 1.0}
+    traces.decay(0.5)
+    traces.decay(0.5)
+    traces.decay(0.5)
+    assert dict(traces.items()) == {"a": 0.125, "b": 0.125}
+    traces.decay(0.5)
+    assert len(traces) == 0
+
+
+def test_reward_reaches_earlier_states_in_one_update():
+    agent = make_agent(lam=0.9)
+    agent.learn((0, 0, 0), "move", 0.0, (2, 0, 0))
+    agent.learn((2, 0, 0), "move", 100.0, (4, 0, 0))
+    step = agent.alpha * 100.0
+    assert agent.q_table[(2, 0, 0)]["move"] == pytest.approx(step)
+    assert agent.q_table[(0, 0, 0)]["move"] == pytest.approx(step * agent.gamma * agent.lam)
+
+
+def test_exploratory_action_cuts_traces():
+    agent = make_agent()
+    agent.q_table[(0, 0, 0)] = {"move": 1.0, "left": 0.0, "right": 0.0, "open": 0.0, "close": 0.0}
+    agent.q_table[(4, 0, 0)] = dict(agent.q_table[(0, 0, 0)])
+    agent.traces.visit(((4, 0, 0), "move"))
+    agent.epsilon = 0.0
+    assert agent.choose_action((0, 0, 0)) == "move" and agent.greedy
+    agent.learn((0, 0, 0), "move", 0.0, (2, 0, 0))
+    assert ((4, 0, 0), "move") in dict(agent.traces.items())
+    agent.epsilon = 1.0
+    while (action := agent.choose_action((0, 0, 0))) == "move":
+        pass
+    assert not agent.greedy
+    agent.learn((0, 0, 0), action, 0.0, (2, 0, 0))
+    assert dict(agent.traces.items()).keys() == {((0, 0, 0), action)}
+
+
+def rollout_of(greedy, rewards=(0.0, 0.0, 100.0)):
+    states = [(2 * t, 0, 0) for t in range(len(rewards) + 1)]
+    steps = len(rewards)
+    return {
+        "actions": np.zeros((steps, 1), dtype=np.int64),
+        "rewards": np.array(rewards).reshape(steps, 1),
+        "alive": np.ones((steps, 1), dtype=bool),
+        "terminated": np.zeros((steps, 1), dtype=bool),
+        "truncated": np.zeros((steps, 1), dtype=bool),
+        "greedy": np.array(greedy).reshape(steps, 1),
+        "states": [[s] for s in states[:-1]],
+        "next_states": [[s] for s in states[1:]],
+    }
+
+
+def test_rollout_path_cuts_traces_at_exploratory_actions():
+    env = HideAndSeekEnv(maze_path(), seed=0)
+    obs, _ = env.reset()
+    learners = make_learners(env, QLambdaAgent, own_rng=True)
+    for learner, state in zip(learners, learner_states(learners, obs, env.agents)):
+        learner.epsilon = 1.0
+        learner.q_table[state] = {"move": 1.0, "left": 0.0, "right": 0.0, "open": 0.0, "close": 0.0}
+    rollout = collect_rollout(env, learners, 20, obs=obs)
+    assert rollout["greedy"].shape == rollout["actions"].shape
+    assert not rollout["greedy"].all()
+    update_from_rollout(learners, rollout)
+    assert all(len(learner.traces) == 0 for learner in learners)
+
+    greedy, explored = make_agent(lam=0.9), make_agent(lam=0.9)
+    update_from_rollout([greedy], rollout_of([True, True, True]))
+    update_from_rollout([explored], rollout_of([True, False, True]))
+    assert greedy.q_table[(0, 0, 0)]["move"] > 0
+    assert explored.q_table[(0, 0, 0)]["move"] == 0
+    assert explored.q_table[(2, 0, 0)]["move"] > 0
+    assert len(explored.traces) == 0
+
+
+def test_traces_do_not_cross_episodes():
+    agent = make_agent(lam=0.9)
+    rollout = rollout_of([True, True, True])
+    rollout["terminated"][0, 0] = True
+    update_from_rollout([agent], rollout)
+    assert agent.q_table[(0, 0, 0)]["move"] == 0
+    assert agent.q_table[(2, 0, 0)]["move"] > 0
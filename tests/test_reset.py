@@ -0,0 +1,44 @@
+# test_reset.py
+
+import random
+from q_lambda import QLambdaAgent
+from q_learning import QLearningAgent
+
+
+def play(agent):
+    agent.x += 7
+    agent.angle = 120
+    agent.destroyed = True
+    agent.total_reward = 42
+    agent.catches = 2
+    agent.door_toggles = 1
+    agent.reward_breakdown["catch"] = 5.0
+    agent.prev_state, agent.prev_action = (1, 2, 3), "move"
+    agent.update_q_value(10.0, (4, 5, 6))
+
+
+def test_reset_keeps_the_table_and_clears_the_round():
+    agent = QLearningAgent(1, 1, 20, qtable_path="q.txt", rng=random.Random(0))
+    spawn = (agent.x, agent.y)
+    play(agent)
+    table = agent.q_table
+    value = table[(1, 2, 3)]["move"]
+    agent.reset()
+    assert agent.q_table is table and table[(1, 2, 3)]["move"] == value
+    assert agent.visits[(1, 2, 3)] == 1
+    assert (agent.x, agent.y, agent.angle) == (*spawn, 0)
+    assert not agent.destroyed
+    assert (agent.total_reward, agent.catches, agent.door_toggles) == (0, 0, 0)
+    assert agent.reward_breakdown["catch"] == 0.0
+    assert (agent.prev_state, agent.prev_action) == (None, None)
+
+
+def test_reset_clears_traces_and_table_is_only_read_once(qtable_dir):
+    agent = QLambdaAgent(1, 1, 20, qtable_path="q.txt", rng=random.Random(0))
+    play(agent)
+    assert len(agent.traces)
+    agent.save_q_table()
+    (qtable_dir / "q.txt").write_text("")
+    agent.reset()
+    assert len(agent.traces) == 0
+    assert (1, 2, 3) in agent.q_table
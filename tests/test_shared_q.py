@@ -0,0 +1,85 @@
+# test_shared_q.py
+
+import multiprocessing
+import random
+import pytest
+from q_learning import QLearningAgent
+from shared_q import SharedQAgent, SharedQTable
+
+
+@pytest.fixture
+def table():
+    table = SharedQTable(capacity=64, stripes=4)
+    yield table
+    table.close()
+
+
+def hammer(table, state, times):
+    for _ in range(times):
+        slot = table.slot(state)
+        with table.lock(slot):
+            table.q[slot, 0] += 1.0
+            table.visits[slot] += 1
+
+
+def claim(table, states, start):
+    start.wait()
+    for state in states:
+        table.slot(state)
+
+
+def test_lock_free_tables_still_claim_each_slot_once():
+    table = SharedQTable(capacity=256, stripes=4, lock_free=True)
+    try:
+        # States with one home slot, so the workers race for the same free slots
+        candidates = ((float(i), 0.0, 0.0) for i in range(10**6))
+        states = [state for state in candidates if hash(state) % table.capacity == 0][:200]
+        start = multiprocessing.Event()
+        workers = [
+            multiprocessing.Process(target=claim, args=(table, states[k::4], start)) for k in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        start.set()
+        for worker in workers:
+            worker.join()
+        assert len(table) == len(states)
+        assert sorted(table.to_dict()[0]) == sorted(states)
+    finally:
+        table.close()
+
+
+def test_rows_round_trip(table):
+    q_table = {(10.0, 20.0, 30.0): dict(move=1.5, left=0.0, right=-2.0, open=0.0, close=0.25)}
+    table.load(q_table, {(10.0, 20.0, 30.0): 4})
+    assert (10.0, 20.0, 30.0) in table and (1.0, 2.0, 3.0) not in table
+    assert table.to_dict() == (q_table, {(10.0, 20.0, 30.0): 4})
+    assert len(table) == 1
+
+
+def test_workers_see_the_same_rows_and_lose_no_locked_updates(table):
+    workers = [multiprocessing.Process(target=hammer, args=(table, (1.0, 2.0, 3.0), 200)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    slot = table.slot((1.0, 2.0, 3.0), insert=False)
+    assert (table.q[slot, 0], table.visits[slot]) == (600.0, 600)
+
+
+def test_single_process_learns_like_the_dict_agent(table):
+    shared = SharedQAgent(1, 1, 20, table=table, qtable_path="s.txt", rng=random.Random(0))
+    plain = QLearningAgent(1, 1, 20, qtable_path="p.txt", rng=random.Random(0))
+    rng = random.Random(1)
+    for _ in range(50):
+        state = (float(rng.randrange(3)), 0.0, 0.0)
+        action = shared.choose_action(state)
+        assert plain.choose_action(state) == action
+        reward = rng.random()
+        for agent in (shared, plain):
+            agent.prev_state, agent.prev_action = state, action
+            agent.update_q_value(reward, ((state[0] + 1) % 3, 0.0, 0.0))
+    q_table, _ = table.to_dict()
+    assert q_table.keys() == plain.q_table.keys()
+    for state, row in plain.q_table.items():
+        assert q_table[state] == pytest.approx(row)
@@ -0,0 +1,80 @@
+# test_simultaneous.py
+
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from agent import Agent
+from environment import HideAndSeekEnv, decide, make_learners, resolve_simultaneous
+from conftest import maze_path
+
+
+def grid():
+    return [list(row) for row in ["wwwwwww", "w     w", "w  d  w", "w     w", "wwwwwww"]]
+
+
+def opponents_of(agents):
+    return lambda agent: [a for a in agents if a.type != agent.type]
+
+
+def test_order_does_not_matter():
+    results = []
+    for order in ((0, 1), (1, 0)):
+        maze = grid()
+        seeker, hider = Agent(1, 1, "seeker", 20), Agent(3, 1, "hider", 20)
+        hider.angle = 180  # They walk towards each other
+        agents = [(seeker, hider)[i] for i in order]
+        resolve_simultaneous(maze, agents, ["move"] * 2, opponents_of(agents))
+        results.append((seeker.x, hider.x))
+    assert results[0] == results[1] == (32, 68)
+
+
+def test_overlapping_movers_stay_put():
+    maze = grid()
+    seeker, hider = Agent(1, 1, "seeker", 20), Agent(2, 1, "hider", 20)
+    seeker.x, hider.x = 35, 46  # One step each would leave them 7 px apart, closer than two radii
+    hider.angle = 180
+    agents = [seeker, hider]
+    resolve_simultaneous(maze, agents, ["move", "move"], opponents_of(agents))
+    assert (seeker.x, hider.x) == (35, 46)
+
+
+def test_doors_are_targeted_on_the_start_of_tick_grid():
+    maze = grid()
+    maze[2][3] = "o"
+    left, right = Agent(2, 2, "seeker", 20), Agent(4, 2, "hider", 20)
+    right.angle = 180
+    agents = [left, right]
+    resolve_simultaneous(maze, agents, ["close", "close"], opponents_of(agents))
+    assert maze[2][3] == "d" and (left.door_toggles, right.door_toggles) == (1, 0)
+    # The hider's "close" finds no open door: the seeker's toggle is not applied yet
+    resolve_simultaneous(maze, agents, ["open", "close"], opponents_of(agents))
+    assert maze[2][3] == "o" and (left.door_toggles, right.door_toggles) == (2, 0)
+
+
+def test_first_requester_of_a_door_wins():
+    for order in ((0, 1), (1, 0)):
+        maze = grid()
+        left, right = Agent(2, 2, "seeker", 20), Agent(4, 2, "hider", 20)
+        right.angle = 180
+        agents = [(left, right)[i] for i in order]
+        resolve_simultaneous(maze, agents, ["open", "open"], opponents_of(agents))
+        assert maze[2][3] == "o"
+        assert (agents[0].door_toggles, agents[1].door_toggles) == (1, 0)
+
+
+def test_concurrent_decide_matches_serial():
+    choices = []
+    for executor in (None, ThreadPoolExecutor(max_workers=4)):
+        env = HideAndSeekEnv(maze_path(), seed=3, simultaneous=True)
+        obs, _ = env.reset()
+        learners = make_learners(env, own_rng=True)
+        for learner in learners:
+            learner.epsilon = 0.5
+        picked = []
+        for _ in range(20):
+            actions = decide(learners, obs, env.store.alive(), executor)
+            picked.append(actions)
+            obs, *_ = env.step(actions)
+        choices.append(np.array(picked))
+        if executor is not None:
+            executor.shutdown()
+    assert np.array_equal(choices[0], choices[1])
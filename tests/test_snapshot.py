@@ -0,0 +1,73 @@
+# test_snapshot.py
+
+import random
+import numpy as np
+import pytest
+from agent import Agent
+from environment import HideAndSeekEnv
+from vision import StaticVisionCache
+from conftest import maze_path
+
+
+def play(env, seed, steps=60):
+    """Steps env with seeded random actions; returns everything step() returned."""
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(steps):
+        obs, rewards, terminated, _, _ = env.step([rng.randrange(5) for _ in range(env.n_agents)])
+        trace.append((obs.tolist(), rewards.tolist(), terminated.tolist(), [row[:] for row in env.maze]))
+    return trace
+
+
+def test_restore_replays_the_same_future():
+    env = HideAndSeekEnv(maze_path(), seed=1)
+    env.reset()
+    play(env, 0, 30)
+    snapshot = env.snapshot()
+    first = play(env, 1)
+    env.restore(snapshot)
+    assert play(env, 1) == first
+    other = HideAndSeekEnv(maze_path("maze4.txt"))
+    other.reset()
+    with pytest.raises(ValueError):
+        other.restore(snapshot)
+
+
+def test_clone_branches_independently():
+    env = HideAndSeekEnv(maze_path(), seed=1)
+    env.reset()
+    play(env, 0, 30)
+    twin = env.clone()
+    branch = play(twin, 2)
+    original = play(env, 2)
+    assert branch == original
+    play(twin, 3)
+    assert env.get_observations().tolist() == original[-1][0]
+
+
+def test_save_and_load_state(qtable_dir):
+    env = HideAndSeekEnv(maze_path(), seed=1)
+    env.reset()
+    play(env, 0, 30)
+    saved = env.get_observations()
+    env.save_state(str(qtable_dir / "state.pkl"))
+    first = play(env, 1)
+    fresh = HideAndSeekEnv(maze_path(), seed=9)
+    fresh.reset()
+    obs = fresh.load_state(str(qtable_dir / "state.pkl"))
+    assert np.array_equal(obs, saved)
+    assert play(fresh, 1) == first
+
+
+def test_env_and_clone_share_the_vision_cache(monkeypatch):
+    cache = StaticVisionCache()
+    monkeypatch.setattr(Agent, "vision_cache", cache)
+    env = HideAndSeekEnv(maze_path(), seed=1)
+    env.reset()
+    twin = env.clone()
+    for _ in range(20):
+        env.step([1] * env.n_agents)  # Turning only: no door changes
+        twin.step([1] * twin.n_agents)
+    # Twelve headings per agent pose, found again by the twin and on the second lap
+    assert cache.misses <= 12 * env.n_agents
+    assert cache.hits == 40 * env.n_agents - cache.misses
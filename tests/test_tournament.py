@@ -0,0 +1,51 @@
+# test_tournament.py
+
+import os
+from q_learning import write_q_table
+from tournament import discover_policies, load_policy, run_tournament, summarize_matches
+from conftest import maze_path, row
+
+
+def write_tables(directory, action):
+    os.makedirs(directory)
+    for name in ("seeker_0", "hider_1"):
+        write_q_table(os.path.join(directory, f"qtable_agent_{name}.txt"), {(0, 0, 0): row(**{action: 1.0})})
+    write_q_table(os.path.join(directory, "notes.txt"), {})
+
+
+def test_discover_policies():
+    write_tables("a", "move")
+    write_tables("b", "left")
+    pool = discover_policies(["a", "b"])
+    assert [name for name, _ in pool["seeker"]] == ["a/seeker_0", "b/seeker_0"]
+    assert [name for name, _ in pool["hider"]] == ["a/hider_1", "b/hider_1"]
+
+
+def test_round_robin_is_seeded_and_ranked():
+    write_tables("a", "move")
+    write_tables("b", "left")
+    pool = discover_policies(["a", "b"])
+    records = run_tournament(pool, [maze_path()], episodes=2, max_steps=20, epsilon=0.2, workers=1)
+    assert len(records) == 2 * 2 * 2
+    assert [r["seed"] for r in records[:2]] == [0, 1]
+    assert all(r["steps"] <= 20 and 0 <= r["catch_rate"] <= 1 for r in records)
+    again = run_tournament(pool, [maze_path()], episodes=2, max_steps=20, epsilon=0.2, workers=1)
+    assert again == records
+
+    matchups, seekers, hiders, hider_ranks = summarize_matches(records)
+    assert len(matchups) == 4
+    assert all(stats["catch_rate"].count == 2 for stats in matchups.values())
+    assert set(hider_ranks) == {"a/hider_1", "b/hider_1"}
+    # Two hiders per seeker and maze: the ranks split 1 + 2 (or 1.5 + 1.5 on a tie)
+    assert sum(stat.mean for stat in hider_ranks.values()) == 3
+
+
+def test_policies_coarsen_position_and_angle():
+    write_tables("a", "move")
+    policy = load_policy("a/qtable_agent_seeker_0.txt", "seeker", position_step=10, angle_step=90)
+    assert policy.state_from([13, 27, 100]) == (10, 30, 90)
+    records = run_tournament(
+        discover_policies(["a"]), [maze_path()], episodes=1, max_steps=10,
+        epsilon=0.0, position_step=10, angle_step=90, workers=1,
+    )
+    assert len(records) == 1
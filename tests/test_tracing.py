@@ -0,0 +1,45 @@
+# test_tracing.py
+
+import random
+from agent import Agent
+from q_learning import QLearningAgent
+from tracing import DEBUG, INFO, WARNING, Tracer
+
+
+def read_events(path):
+    return [line.split()[1:4] for line in open(path)]
+
+
+def test_levels_filter_events():
+    tracer = Tracer("trace.log", level=INFO, flush_interval=60)
+    agent = QLearningAgent(1, 1, 20, qtable_path="q.txt", id=3, rng=random.Random(0))
+    agent.tracer = tracer
+    agent.choose_action((1, 2, 3))  # new_state / explore are DEBUG
+    agent.update_q_value(1.0, (1, 2, 3))  # No previous action yet
+    tracer.emit(INFO, 3, "caught_hider")
+    tracer.close()
+    assert read_events("trace.log") == [["WARNING", "[3]", "skip_update"], ["INFO", "[3]", "caught_hider"]]
+
+
+def test_door_toggle_is_traced_at_info():
+    maze = [list("www"), list("w w"), list("wdw")]
+    agent = Agent(1, 1, "seeker", 20, id=1)
+    agent.angle = 90  # Facing down, towards the door
+    tracer = Tracer("trace.log", level=INFO, flush_interval=60)
+    agent.tracer = tracer
+    agent.open_door(maze)
+    tracer.close()
+    assert maze[2][1] == "o"
+    assert read_events("trace.log") == [["INFO", "[1]", "door_toggle"]]
+
+
+def test_dropped_events_are_reported():
+    tracer = Tracer("trace.log", level=WARNING, capacity=2, flush_interval=60)
+    for _ in range(5):
+        tracer.emit(WARNING, 0, "skip_update")
+    tracer.emit(DEBUG, 0, "explore")
+    tracer.close()
+    events = read_events("trace.log")
+    assert len(events) == 3
+    assert events[-1][2] == "dropped_events"
+    assert open("trace.log").read().rstrip().endswith("count=3")
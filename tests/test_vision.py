@@ -0,0 +1,30 @@
+# test_vision.py
+
+import vision
+from agent import Agent
+
+
+OPEN = [list(row) for row in ["wwwwwwwww", "w       w", "w       w", "w       w", "wwwwwwwww"]]
+
+
+def test_vision_is_written_into_the_same_arrays():
+    seeker = Agent(1, 2, "seeker", 20)
+    hits, depths, types = seeker.vision_hits, seeker.vision_depths, seeker.vision_agent_types
+    seeker.update_vision_arc(OPEN, [])
+    assert seeker.vision_hits is hits and seeker.vision_depths is depths and seeker.vision_agent_types is types
+    assert set(hits.tolist()) == {vision.HIT_WALL}
+    assert (types == vision.NO_AGENT).all()
+    # The wall straight ahead starts at x = 160, six cells from the agent's center at 30
+    assert depths[len(depths) // 2] == 160 - 30
+
+
+def test_agents_block_rays_and_report_their_type():
+    seeker, hider = Agent(1, 2, "seeker", 20), Agent(4, 2, "hider", 20)
+    seeker.update_vision_arc(OPEN, [seeker, hider])
+    middle = len(seeker.vision_hits) // 2
+    assert seeker.vision_hits[middle] == vision.HIT_AGENT
+    assert seeker.vision_agent_types[middle] == vision.AGENT_TYPE_CODES["hider"]
+    assert 60 - hider.radius <= seeker.vision_depths[middle] < 60
+    hider.destroyed = True
+    seeker.update_vision_arc(OPEN, [seeker, hider])
+    assert vision.HIT_AGENT not in seeker.vision_hits
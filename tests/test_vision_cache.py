@@ -0,0 +1,53 @@
+# test_vision_cache.py
+
+import vision
+from agent import Agent, ray_fan
+from vision import StaticVisionCache, cast_static
+
+
+MAZE = [list(row) for row in ["wwwwwww", "w     w", "w  d  w", "w     w", "wwwwwww"]]
+
+
+def grid():
+    return [row[:] for row in MAZE]
+
+
+def test_cache_returns_the_marched_hits():
+    maze, cache = grid(), StaticVisionCache()
+    agent = Agent(1, 1, "seeker", 20)
+    fan = ray_fan(0, agent.half_fov, agent.step_angle, agent.casted_rays)
+    first = cache.rays(maze, agent.x, agent.y, 0, fan, 20, agent.max_depth)
+    again = cache.rays(maze, agent.x, agent.y, 0, fan, 20, agent.max_depth)
+    assert first is again
+    assert first == cast_static(agent.x, agent.y, fan, maze, 20, agent.max_depth)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_door_toggle_invalidates_cached_hits():
+    maze, cache = grid(), StaticVisionCache()
+    agent = Agent(1, 2, "seeker", 20)
+    agent.angle = 0
+    fan = ray_fan(0, agent.half_fov, agent.step_angle, agent.casted_rays)
+    closed = cache.rays(maze, agent.x, agent.y, 0, fan, 20, agent.max_depth)
+    assert closed[len(fan) // 2][1] == vision.HIT_CLOSED_DOOR
+    maze[2][3] = "o"
+    vision.note_door_toggle()
+    opened = cache.rays(maze, agent.x, agent.y, 0, fan, 20, agent.max_depth)
+    assert opened[len(fan) // 2][1] == vision.HIT_WALL
+    assert cache.misses == 2
+
+
+def test_cached_vision_matches_uncached(monkeypatch):
+    maze = grid()
+    seeker = Agent(1, 2, "seeker", 20)
+    hider = Agent(5, 2, "hider", 20)
+    for cache in (StaticVisionCache(), None):
+        monkeypatch.setattr(Agent, "vision_cache", cache)
+        seeker._vision_key = None
+        seeker.update_vision_arc(maze, [seeker, hider])
+        if cache is not None:
+            cached = (seeker.vision_hits.copy(), seeker.vision_depths.copy(), seeker.vision_agent_types.copy())
+    assert (cached[0] == seeker.vision_hits).all()
+    assert (cached[1] == seeker.vision_depths).all()
+    assert (cached[2] == seeker.vision_agent_types).all()
+    assert vision.HIT_CLOSED_DOOR in cached[0]
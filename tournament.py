@@ -0,0 +1,253 @@
+# tournament.py
+
+import argparse
+import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from agent import ACTIONS
+from environment import HideAndSeekEnv
+from metrics import MetricsWriter, RunningStat
+from q_learning import QLearningAgent
+
+QTABLE_PATTERN = re.compile(r"qtable_agent_(seeker|hider)_(\d+)\.txt$")
+ROUND_STEPS = 60 * 240  # One main1 round at 240 ticks per second
+
+_policies = {}  # Per-process cache: path -> frozen QLearningAgent
+
+
+def discover_policies(directories):
+    """Finds saved Q-tables in each directory; returns {type: [(name, path), ...]}."""
+    pool = {"seeker": [], "hider": []}
+    for directory in directories:
+        for path in sorted(glob.glob(os.path.join(directory, "qtable_agent_*.txt"))):
+            match = QTABLE_PATTERN.search(os.path.basename(path))
+            if match:
+                agent_type, agent_id = match.groups()
+                name = f"{os.path.normpath(directory)}/{agent_type}_{agent_id}"
+                pool[agent_type].append((name, path))
+    return pool
+
+
+def load_policy(path, agent_type, position_step=1, angle_step=1):
+    """Loads a Q-table once per worker process as a frozen greedy policy.
+
+    position_step/angle_step are the coarsening the table was trained with;
+    the policy's state_from() maps observations the same way.
+    """
+    policy = _policies.get(path)
+    if policy is None:
+        policy = QLearningAgent(0, 0, 20, type=agent_type, qtable_path=path)
+        policy.freeze()
+        _policies[path] = policy
+    policy.position_step = position_step
+    policy.angle_step = angle_step
+    return policy
+
+
+def play_match(task):
+    """Plays one headless episode between a seeker and a hider policy.
+
+    Every seeker slot of the maze uses the seeker table and every hider slot
+    the hider table. With epsilon > 0 actions are randomized from the env's
+    seeded RNG, which is what makes repeated episodes differ; greedy policies
+    on a fixed maze are otherwise fully deterministic.
+    """
+    maze_file, seeker, hider, seed, max_steps, epsilon, position_step, angle_step = task
+    env = HideAndSeekEnv(maze_file, seed=seed, max_steps=max_steps)
+    obs, _ = env.reset()
+    policies = [
+        load_policy(seeker[1] if a.type == "seeker" else hider[1], a.type, position_step, angle_step)
+        for a in env.agents
+    ]
+    survival = {h.id: max_steps for h in env.hiders}
+
+    while True:
+        actions = []
+        for i, agent in enumerate(env.agents):
+            if agent.destroyed:
+                actions.append(0)
+            elif epsilon and env.rng.random() < epsilon:
+                actions.append(env.rng.randrange(len(ACTIONS)))
+            else:
+                state = policies[i].state_from(obs[i])
+                actions.append(ACTIONS.index(policies[i].choose_action(state)))
+        obs, _, terminated, truncated, _ = env.step(actions)
+        for h in env.hiders:
+            if h.destroyed and survival[h.id] == max_steps:
+                survival[h.id] = env.step_count
+        if terminated.all() or truncated.any():
+            break
+
+    n_hiders = len(env.hiders)
+    return {
+        "maze": os.path.basename(maze_file),
+        "seeker": seeker[0],
+        "hider": hider[0],
+        "seed": seed,
+        "steps": env.step_count,
+        "catch_rate": sum(h.destroyed for h in env.hiders) / n_hiders,
+        "survival_steps": sum(survival.values()) / n_hiders,
+        "hider_rank_point": sum(h.rank_point for h in env.hiders) / n_hiders,
+        "seeker_reward": float(sum(a.total_reward for a in env.seekers)),
+        "hider_reward": float(sum(a.total_reward for a in env.hiders)),
+    }
+
+
+def playable_mazes(maze_files):
+    """Keeps the mazes that have at least one seeker and one hider spawn."""
+    playable = []
+    for maze_file in maze_files:
+        with open(maze_file, "r") as f:
+            text = f.read()
+        if "s" in text and "h" in text:
+            playable.append(maze_file)
+        else:
+            print(f"Skipping {maze_file}: it needs both a seeker and a hider spawn.")
+    return playable
+
+
+def run_tournament(
+    pool, maze_files, episodes=10, max_steps=ROUND_STEPS, epsilon=0.05,
+    position_step=1, angle_step=1, seed=0, workers=None,
+):
+    """Plays every seeker against every hider on every maze; returns the match records.
+
+    Episode k of every matchup uses seed + k, so all pairings face the same
+    random draws and their differences are not just noise.
+    """
+    tasks = [
+        (maze_file, seeker, hider, seed + k, max_steps, epsilon, position_step, angle_step)
+        for maze_file in maze_files
+        for seeker in pool["seeker"]
+        for hider in pool["hider"]
+        for k in range(episodes)
+    ]
+    if workers == 1:
+        return [play_match(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(play_match, tasks, chunksize=max(1, episodes // 2)))
+
+
+def summarize_matches(records):
+    """Aggregates match records into per-matchup and per-policy RunningStats.
+
+    Returns (matchups, seekers, hiders, hider_ranks). Hider ranks are the
+    position of each hider policy, by mean survival, among all hider policies
+    facing the same seeker on the same maze (1 = survives longest).
+    """
+    fields = ("catch_rate", "survival_steps", "hider_rank_point")
+    matchups, seekers, hiders = {}, {}, {}
+    for record in records:
+        key = (record["maze"], record["seeker"], record["hider"])
+        stats = matchups.setdefault(key, {f: RunningStat() for f in fields})
+        for field in fields:
+            stats[field].add(record[field])
+        seekers.setdefault(record["seeker"], RunningStat()).add(record["catch_rate"])
+        hiders.setdefault(record["hider"], RunningStat()).add(record["survival_steps"])
+
+    hider_ranks = {}
+    groups = {}
+    for (maze, seeker, hider), stats in matchups.items():
+        groups.setdefault((maze, seeker), []).append((stats["survival_steps"].mean, hider))
+    for group in groups.values():
+        for survival, hider in group:
+            # Tied policies share the average of the positions they span
+            better = sum(other > survival for other, _ in group)
+            tied = sum(other == survival for other, _ in group)
+            hider_ranks.setdefault(hider, RunningStat()).add(better + (tied + 1) / 2)
+    return matchups, seekers, hiders, hider_ranks
+
+
+def print_report(matchups, seekers, hiders, hider_ranks):
+    def fmt(stat, digits=2):
+        return f"{stat.mean:.{digits}f} ± {stat.ci95:.{digits}f}"
+
+    print(f"{'maze':<10} {'seeker':<20} {'hider':<20} {'n':>4} {'catch rate':>16} {'survival steps':>20} {'rank points':>22}")
+    for (maze, seeker, hider), stats in sorted(matchups.items()):
+        print(
+            f"{maze:<10} {seeker:<20} {hider:<20} {stats['catch_rate'].count:>4} "
+            f"{fmt(stats['catch_rate']):>16} {fmt(stats['survival_steps'], 0):>20} "
+            f"{fmt(stats['hider_rank_point'], 0):>22}"
+        )
+    print("\nSeekers by catch rate (95% CI):")
+    for name, stat in sorted(seekers.items(), key=lambda item: -item[1].mean):
+        print(f"  {name:<20} {fmt(stat)}  (n={stat.count})")
+    print("\nHiders by survival steps (95% CI), mean rank among hiders:")
+    for name, stat in sorted(hiders.items(), key=lambda item: -item[1].mean):
+        print(f"  {name:<20} {fmt(stat, 0)}  rank {fmt(hider_ranks[name])}  (n={stat.count})")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Round-robin evaluation of saved seeker and hider Q-tables"
+    )
+    parser.add_argument(
+        "qtable_dirs",
+        nargs="+",
+        help="Directories holding qtable_agent_<type>_<id>.txt files, e.g. texts texts2",
+    )
+    parser.add_argument(
+        "--mazes", nargs="+", default=["maze.txt", "maze3.txt", "maze4.txt", "maze5.txt"]
+    )
+    parser.add_argument("--episodes", type=int, default=10, help="Episodes per matchup and maze")
+    parser.add_argument("--max-steps", type=int, default=ROUND_STEPS)
+    parser.add_argument(
+        "--epsilon",
+        type=float,
+        default=0.05,
+        help="Random action rate; 0 makes every episode of a matchup identical",
+    )
+    parser.add_argument(
+        "--position-step",
+        type=int,
+        default=1,
+        help="State coarsening the tables were trained with",
+    )
+    parser.add_argument(
+        "--angle-step",
+        type=int,
+        default=1,
+        help="Angle coarsening the tables were trained with",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: all cores)"
+    )
+    parser.add_argument(
+        "--output", default=None, help="Also write every episode as a JSON-lines match record"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    pool = discover_policies(args.qtable_dirs)
+    mazes = playable_mazes(args.mazes)
+    if not pool["seeker"] or not pool["hider"] or not mazes:
+        print("Need at least one seeker table, one hider table and one playable maze.")
+        return
+    print(
+        f"🏆 {len(pool['seeker'])} seekers x {len(pool['hider'])} hiders x {len(mazes)} mazes x {args.episodes} episodes"
+    )
+    records = run_tournament(
+        pool,
+        mazes,
+        episodes=args.episodes,
+        max_steps=args.max_steps,
+        epsilon=args.epsilon,
+        position_step=args.position_step,
+        angle_step=args.angle_step,
+        seed=args.seed,
+        workers=args.workers,
+    )
+    if args.output:
+        writer = MetricsWriter(args.output)
+        for record in records:
+            writer.record("match", **record)
+        writer.close()
+    print_report(*summarize_matches(records))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# tracing.py
+
+import threading
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING"}
+
+
+class Tracer:
+    """Level-filtered, sampled event trace written to a file off the hot path.
+
+    emit() only appends a tuple of the raw values to a bounded ring buffer;
+    a daemon thread formats and writes them every `flush_interval` seconds.
+    If the writer falls behind, the oldest events are dropped instead of
+    slowing the simulation, and the next flush writes a WARNING line with
+    how many were lost. Sampling keeps every `sample_every`-th event that
+    passes the level filter, using a counter so it never touches an RNG.
+
+    Call sites guard with `if self.tracer.active:` so a disabled tracer costs
+    one attribute check.
+    """
+
+    def __init__(
+        self, path, level=DEBUG, sample_every=1, capacity=65536, flush_interval=0.5
+    ):
+        self.path = path
+        self.level = level
+        self.sample_every = max(1, sample_every)
+        self.buffer = deque(maxlen=capacity)
+        self.flush_interval = flush_interval
+        self.active = True
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._counter = 0
+        self._file = open(path, "a")
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tracer", daemon=True)
+        self._thread.start()
+
+    def emit(self, level, agent_id, event, **fields):
+        """Queues one event; formatting happens later on the writer thread."""
+        if level < self.level:
+            return
+        self._counter += 1
+        if self._counter % self.sample_every:
+            return
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append((time.time(), level, agent_id, event, fields))
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self._write_lock:
+            lines = []
+            while self.buffer:
+                timestamp, level, agent_id, event, fields = self.buffer.popleft()
+                details = " ".join(
+                    f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                    for k, v in fields.items()
+                )
+                lines.append(
+                    f"{timestamp:.6f} {LEVEL_NAMES.get(level, level)} [{agent_id}] {event} {details}\n"
+                )
+            dropped = self.dropped - self._reported_dropped
+            if dropped:
+                lines.append(f"{time.time():.6f} WARNING [-] dropped_events count={dropped}\n")
+                self._reported_dropped = self.dropped
+            if lines:
+                self._file.writelines(lines)
+                self._file.flush()
+
+    def close(self):
+        self.active = False
+        self._stop_event.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+
+
+class _NullTracer:
+    """Tracer stand-in that records nothing; `active` is always False."""
+
+    active = False
+
+    def emit(self, level, agent_id, event, **fields):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_TRACER = _NullTracer()
+
+_default_tracer = None
+
+
+def get_default_tracer():
+    """Shared DEBUG tracer writing to agent_trace.log, created on first use."""
+    global _default_tracer
+    if _default_tracer is None:
+        _default_tracer = Tracer("agent_trace.log")
+    return _default_tracer
@@ -0,0 +1,256 @@
+# vision.py
+
+import math
+import numpy as np
+
+RAY_START_OFFSET = 0.1  # Rays start slightly away from the agent's center
+
+# Per-ray hit codes written to Agent.vision_hits
+HIT_EMPTY = 0
+HIT_WALL = 1
+HIT_CLOSED_DOOR = 2
+HIT_OUT_OF_BOUNDS = 3
+HIT_AGENT = 4
+HIT_NAMES = ["empty", "wall", "closed_door", "out_of_bounds", "agent"]
+
+# Agent type codes written to Agent.vision_agent_types (-1 = no agent on the ray)
+NO_AGENT = -1
+AGENT_TYPE_CODES = {"seeker": 0, "hider": 1}
+OTHER_AGENT_TYPE = 2
+
+# Bumped whenever a door opens or closes anywhere, so cached wall/door hits
+# computed against the old door layout are never reused.
+door_version = 0
+
+
+def note_door_toggle():
+    global door_version
+    door_version += 1
+
+
+def cast_static(x, y, fan, grid, cell_size, max_depth):
+    """Marches each ray of `fan` 1px at a time against walls, closed doors and the maze edge.
+
+    Returns one (limit, code, depth) triple per ray: `limit` is the last
+    depth step the ray reaches, `code` and `depth` the HIT_* code and
+    distance to report if no agent is closer.
+    """
+    rows, cols = len(grid), len(grid[0])
+    rays = []
+    for cos_r, sin_r in fan:
+        limit, code, depth_hit = max_depth - 1, HIT_EMPTY, max_depth
+        for depth_step in range(1, max_depth):
+            depth = depth_step * 1.0
+            target_x = x + cos_r * (depth + RAY_START_OFFSET)
+            target_y = y + sin_r * (depth + RAY_START_OFFSET)
+            col = int(target_x / cell_size)
+            row = int(target_y / cell_size)
+            if not (0 <= row < rows and 0 <= col < cols):
+                limit, code, depth_hit = depth_step, HIT_OUT_OF_BOUNDS, depth_step
+                break
+            cell = grid[row][col]
+            if cell == "w" or cell == "d":  # Open doors do not block vision
+                code = HIT_WALL if cell == "w" else HIT_CLOSED_DOOR
+                limit, depth_hit = depth_step, depth_step
+                break
+        rays.append((limit, code, depth_hit))
+    return rays
+
+
+def first_agent_hit(x, y, cos_r, sin_r, agents, limit):
+    """Smallest depth step <= limit at which the ray is inside an agent's circle.
+
+    `agents` is a sequence of (x, y, radius, type). The interval of depths
+    inside each circle is solved analytically, then only the few integer
+    steps around it are checked with the same expression the pixel march
+    used, so results match it exactly. Ties go to the earlier agent.
+    Returns (depth_step, type), or (None, None) if the ray hits no agent.
+    """
+    best_depth, best_type = limit + 1, None
+    for agent_x, agent_y, radius, agent_type in agents:
+        rel_x, rel_y = agent_x - x, agent_y - y
+        along = rel_x * cos_r + rel_y * sin_r
+        reach_sq = radius * radius - (rel_x * rel_x + rel_y * rel_y - along * along)
+        if reach_sq < -1.0:
+            continue  # Ray passes well clear of this agent
+        reach = math.sqrt(max(reach_sq, 0.0))
+        first = max(1, int(along - reach - RAY_START_OFFSET) - 1)
+        last = min(best_depth - 1, int(along + reach - RAY_START_OFFSET) + 2)
+        radius_sq = radius**2
+        for depth_step in range(first, last + 1):
+            depth = depth_step * 1.0
+            target_x = x + cos_r * (depth + RAY_START_OFFSET)
+            target_y = y + sin_r * (depth + RAY_START_OFFSET)
+            if (target_x - agent_x) ** 2 + (target_y - agent_y) ** 2 < radius_sq:
+                best_depth, best_type = depth_step, agent_type
+                break
+    if best_type is None:
+        return None, None
+    return best_depth, best_type
+
+
+class StaticVisionCache:
+    """Memo of wall/door ray hits per agent pose and wall/closed-door layout.
+
+    Static hits only depend on the pose, the ray fan and which cells are
+    walls or closed doors, so they are shared between all agents and between
+    grids with the same layout, e.g. an env and its clones. A grid's layout
+    is re-read only after a door toggle; beyond `max_entries` the oldest
+    poses go first.
+    """
+
+    MAX_GRIDS = 64  # Grids whose current layout is remembered
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.entries = {}
+        self.layouts = {}  # Wall/closed-door layout -> small int used in the entry keys
+        self.grids = {}  # id(grid) -> (grid, door_version, layout id)
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.layouts.clear()
+        self.grids.clear()
+
+    def layout_id(self, grid):
+        known = self.grids.get(id(grid))
+        if known is not None and known[0] is grid and known[1] == door_version:
+            return known[2]
+        layout = tuple("".join(c if c in ("w", "d") else " " for c in row) for row in grid)
+        layout_id = self.layouts.setdefault(layout, len(self.layouts))
+        if known is None and len(self.grids) >= self.MAX_GRIDS:
+            del self.grids[next(iter(self.grids))]
+        # Holding the grid keeps its identity from being reused
+        self.grids[id(grid)] = (grid, door_version, layout_id)
+        return layout_id
+
+    def rays(self, grid, x, y, angle, fan, cell_size, max_depth):
+        # Fans are cached per (angle, fov, rays) for the life of the process
+        key = (self.layout_id(grid), x, y, angle, id(fan), cell_size, max_depth)
+        rays = self.entries.get(key)
+        if rays is None:
+            self.misses += 1
+            if len(self.entries) >= self.max_entries:
+                del self.entries[next(iter(self.entries))]
+            rays = cast_static(x, y, fan, grid, cell_size, max_depth)
+            self.entries[key] = rays
+        else:
+            self.hits += 1
+        return rays
+
+
+class LineOfSight:
+    """Cell-to-cell line-of-sight bitsets for one maze grid, kept in sync with its doors.
+
+    Bit j of visible_from(i) is set when the segment between the centers of
+    cells i and j (index = row * cols + col) crosses no wall and no closed
+    door. Wall visibility is computed once. Each door has a mask of the pairs
+    it lies between, which is cleared from the affected rows while it is
+    closed and restored when it opens, so a toggle only touches those rows.
+    Door state is re-read from the grid lazily whenever door_version moves.
+    """
+
+    def __init__(self, grid, cell_size, samples_per_cell=4):
+        self.cell_size = cell_size
+        self.rows, self.cols = len(grid), len(grid[0])
+        n = self.rows * self.cols
+        cells = [cell for row in grid for cell in row]
+        is_wall = np.array([cell == "w" for cell in cells], dtype=bool)
+        self.doors = [i for i, cell in enumerate(cells) if cell in ("o", "d")]
+
+        # Sample every center-to-center segment at fixed fractions, symmetric
+        # in t, so i -> j and j -> i cross the same cells
+        samples = samples_per_cell * max(self.rows, self.cols)
+        t = (np.arange(samples) + 0.5) / samples
+        index = np.arange(n)
+        centers_y = index // self.cols + 0.5
+        centers_x = index % self.cols + 0.5
+        self.static = [0] * n
+        door_masks = [dict() for _ in self.doors]
+        for source in range(n):
+            if is_wall[source]:
+                continue
+            px = centers_x[source] + t[None, :] * (centers_x - centers_x[source])[:, None]
+            py = centers_y[source] + t[None, :] * (centers_y - centers_y[source])[:, None]
+            crossed = py.astype(np.int64) * self.cols + px.astype(np.int64)
+            # The end cells themselves never block
+            crossed[(crossed == source) | (crossed == index[:, None])] = -1
+            blocked = (is_wall[crossed] & (crossed >= 0)).any(axis=1)
+            self.static[source] = self._bits(~blocked & ~is_wall)
+            for k, door in enumerate(self.doors):
+                mask = self._bits((crossed == door).any(axis=1) & ~blocked)
+                if mask:
+                    door_masks[k][source] = mask
+        self.door_masks = door_masks
+        self.grid = None
+        self.closed = [False] * len(self.doors)
+        self.visible = list(self.static)
+        self.door_version = None
+
+    @staticmethod
+    def _bits(flags):
+        """Packs a bool array into an int with bit j set for flags[j]."""
+        return int.from_bytes(np.packbits(flags, bitorder="little").tobytes(), "little")
+
+    def attach(self, grid):
+        """Returns a view of this table for `grid`, sharing the precomputed masks."""
+        view = object.__new__(LineOfSight)
+        view.__dict__.update(self.__dict__)
+        view.grid = grid
+        view.closed = [False] * len(self.doors)
+        view.visible = list(self.static)
+        view.door_version = None
+        view.sync()
+        return view
+
+    def copy(self, grid):
+        """Like attach(), but for a copy of this view's grid: its door state is copied, not re-read."""
+        view = object.__new__(LineOfSight)
+        view.__dict__.update(self.__dict__)
+        view.grid = grid
+        view.closed = list(self.closed)
+        view.visible = list(self.visible)
+        return view
+
+    def sync(self):
+        """Applies any doors toggled in the grid since the last sync."""
+        if self.door_version == door_version:
+            return
+        self.door_version = door_version
+        for k, door in enumerate(self.doors):
+            closed = self.grid[door // self.cols][door % self.cols] == "d"
+            if closed != self.closed[k]:
+                self.closed[k] = closed
+                self._update_rows(self.door_masks[k])
+
+    def _update_rows(self, rows):
+        for source in rows:
+            bits = self.static[source]
+            for k, masks in enumerate(self.door_masks):
+                if self.closed[k] and source in masks:
+                    bits &= ~masks[source]
+            self.visible[source] = bits
+
+    def cell(self, x, y):
+        """Cell index of a pixel position."""
+        return int(y // self.cell_size) * self.cols + int(x // self.cell_size)
+
+    def visible_from(self, cell):
+        self.sync()
+        return self.visible[cell]
+
+    def can_see(self, viewer, target):
+        """True if the cells of two agents (anything with x, y) are in line of sight."""
+        return bool(self.visible_from(self.cell(viewer.x, viewer.y)) >> self.cell(target.x, target.y) & 1)
+
+    def seen_by_any(self, target, viewers):
+        """True if any live viewer has line of sight to target's cell."""
+        self.sync()
+        bit = 1 << self.cell(target.x, target.y)
+        return any(
+            self.visible[self.cell(v.x, v.y)] & bit
+            for v in viewers
+            if not getattr(v, "destroyed", False)
+        )